@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Dashboard analytics shared by the read endpoints and /api/dashboard/bundle.
+
+TweetFrame loads the stored tweets once as typed columns (engagement counts
+are extracted by SQLite into int64 arrays, created_at comes from the numeric
+created_ts column) and derives what every section needs (24h/7d windows,
+engagement totals, trending users) with vectorized operations. Each *_section
+function returns exactly the `data` payload of its standalone endpoint, so the
+bundle can compute any combination of them from a single scan.
+
+The leaderboard and user profiles read the per-user running aggregates the
+storage layer keeps in user_stats instead of grouping every tweet.
+
+Robust percentiles (p50/p90/p99 of views, likes and score) come from the
+quantile sketches the storage layer maintains at ingest (load_distribution),
+so they cost a merge of per-day sketches rather than a pass over the tweets.
+
+While the memory-mapped analytics snapshot (analytics_snapshot) is stamped
+with the database's current change_seq, frames, leaderboards and
+distributions are served from it instead of SQLite; a full load made because
+it is stale writes a fresh one in the background.
+"""
+
+import os
+from datetime import datetime, timedelta
+from functools import cached_property
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+import analytics_snapshot
+from storage.sqlite_storage import ENGAGEMENT_FIELDS
+
+# Views above this are treated as outliers when averaging
+VIEWS_OUTLIER_CAP = 10000
+
+SECTIONS = ("stats", "engagement", "quality", "leaderboard", "tweets")
+
+
+class TweetFrame:
+    def __init__(self, columns: dict, now: Optional[datetime] = None, db_size_bytes: int = 0,
+                 index=None, lazy_columns: Optional[Dict[str, Callable]] = None) -> None:
+        """columns: output of SQLiteStorage.get_tweet_columns, or a snapshot's array columns
+        with lazy_columns (name -> function of index labels) for the string columns left out"""
+        self.now = now or datetime.now()
+        self.db_size_bytes = db_size_bytes
+        self.df = pd.DataFrame(columns, index=index)
+        self.df['score'] = self.df['score'].fillna(0)
+        self.lazy_columns = lazy_columns or {}
+
+    def values(self, name: str, index) -> list:
+        """Values of one column for the given index labels (decoding lazy columns on demand)"""
+        if name in self.lazy_columns:
+            return self.lazy_columns[name](index)
+        return self.df.loc[index, name].tolist()
+
+    @property
+    def empty(self) -> bool:
+        return len(self.df) == 0
+
+    @cached_property
+    def created(self) -> pd.Series:
+        """Naive UTC creation times; unparseable dates count as now"""
+        return pd.to_datetime(self.df['created_ts'], unit='s').fillna(pd.Timestamp.now())
+
+    @property
+    def engagement(self) -> pd.DataFrame:
+        return self.df[list(ENGAGEMENT_FIELDS)]
+
+    @cached_property
+    def totals(self) -> dict:
+        engagement = self.engagement
+        views = engagement['views'][engagement['views'] <= VIEWS_OUTLIER_CAP]
+        return {
+            'likes': int(engagement['likes'].sum()),
+            'retweets': int(engagement['retweets'].sum()),
+            'replies': int(engagement['replies'].sum()),
+            'avg_views': float(views.mean()) if len(views) > 0 else 0,
+        }
+
+    @cached_property
+    def last_24h(self) -> pd.Series:
+        return self.created >= self.now - timedelta(hours=24)
+
+    @cached_property
+    def last_7d(self) -> pd.Series:
+        return self.created >= self.now - timedelta(days=7)
+
+    @cached_property
+    def previous_7d(self) -> pd.Series:
+        return (self.created >= self.now - timedelta(days=14)) & ~self.last_7d
+
+    @cached_property
+    def trending_users(self) -> list:
+        """Most active users over the last 7 days"""
+        counts = self.df[self.last_7d].groupby('username').size().sort_values(ascending=False).head(5)
+        return [{'username': user, 'tweet_count': int(count)} for user, count in counts.items()]
+
+    @cached_property
+    def avg_score(self) -> float:
+        return self.df['score'].mean()
+
+    @cached_property
+    def unique_users(self) -> int:
+        return int(self.df['username'].nunique())
+
+
+def _fresh_snapshot(db_path: str, snapshot_path: str):
+    """(snapshot if it matches the database else None, the database's change_seq)"""
+    from http_cache import data_version
+    version = data_version(db_path)[0]
+    return analytics_snapshot.fresh_snapshot(version, snapshot_path), version
+
+
+def load_frame(project: Optional[str] = None, username: Optional[str] = None, db_path: str = "tweets.db",
+               snapshot_path: str = analytics_snapshot.SNAPSHOT_PATH) -> TweetFrame:
+    db_size = sum(os.path.getsize(path) for path in (db_path, db_path + "-wal") if os.path.exists(path))
+    snapshot, version = _fresh_snapshot(db_path, snapshot_path)
+    if snapshot is not None:
+        columns, rows = snapshot.columns(project=project, username=username)
+        lazy = {name: (lambda index, name=name: snapshot.strings(name, index))
+                for name in analytics_snapshot.STRING_COLUMNS}
+        return TweetFrame(columns, db_size_bytes=db_size, index=rows, lazy_columns=lazy)
+
+    from storage.sqlite_storage import SQLiteStorage
+    db_storage = SQLiteStorage(db_path=db_path)
+    try:
+        columns = db_storage.get_tweet_columns(project=project, username=username)
+    finally:
+        db_storage.close()
+    if not project and not username:
+        analytics_snapshot.write_snapshot_in_background(db_path, snapshot_path, columns, version)
+    return TweetFrame(columns, db_size_bytes=db_size)
+
+
+def load_distribution(project: Optional[str] = None, username: Optional[str] = None,
+                      since: Optional[int] = None, until: Optional[int] = None, db_path: str = "tweets.db") -> dict:
+    """metric -> {'count', 'p50', 'p90', 'p99', 'min', 'max'} from the stored quantile sketches"""
+    if not username and since is None and until is None:
+        snapshot, _ = _fresh_snapshot(db_path, analytics_snapshot.SNAPSHOT_PATH)
+        distribution = snapshot.distribution(project) if snapshot is not None else None
+        if distribution is not None:
+            return distribution
+    from storage.sqlite_storage import SQLiteStorage
+    db_storage = SQLiteStorage(db_path=db_path)
+    try:
+        return db_storage.get_quantiles(project=project, username=username, since=since, until=until)
+    finally:
+        db_storage.close()
+
+
+def _with_distribution(data: dict, distribution: Optional[dict]) -> dict:
+    if distribution is not None:
+        data['distribution'] = distribution
+    return data
+
+
+def tweets_section(frame: TweetFrame, limit: int, iso_created_at) -> dict:
+    """Top tweets by score plus headline stats (/api/crestal-data)"""
+    if frame.empty:
+        return {
+            'data': [],
+            'count': 0,
+            'stats': {
+                'total_tweets': 0,
+                'avg_score': 0,
+                'high_quality': 0,
+                'low_quality': 0
+            }
+        }
+    df = frame.df
+    df_sorted = df.sort_values('score', ascending=False).head(limit)
+    ids, texts, created = (frame.values(name, df_sorted.index) for name in ('id', 'text', 'created_at'))
+    data = []
+    for i, row in enumerate(df_sorted[['username', 'score', *ENGAGEMENT_FIELDS]].to_dict('records')):
+        data.append({
+            'id': str(ids[i]),
+            'username': row['username'],
+            'text': texts[i],
+            'score': float(row['score']),
+            'created_at': iso_created_at(created[i]),
+            'engagement': {f: int(row[f]) for f in ENGAGEMENT_FIELDS}
+        })
+    return {
+        'data': data,
+        'count': len(data),
+        'stats': {
+            'total_tweets': len(df),
+            'avg_score': round(frame.avg_score, 3),
+            'high_quality': int((df['score'] >= 0.03).sum()),
+            'low_quality': int((df['score'] < 0.01).sum()),
+            'unique_users': frame.unique_users
+        }
+    }
+
+
+def load_leaderboard(limit: int, project: Optional[str] = None, db_path: str = "tweets.db") -> tuple:
+    """(rows, total_contributors) from the per-user aggregates kept at ingest"""
+    snapshot, _ = _fresh_snapshot(db_path, analytics_snapshot.SNAPSHOT_PATH)
+    board = snapshot.leaderboard(limit, project) if snapshot is not None else None
+    if board is not None:
+        return board
+    from storage.sqlite_storage import SQLiteStorage
+    db_storage = SQLiteStorage(db_path=db_path)
+    try:
+        return db_storage.get_leaderboard(limit=limit, project=project)
+    finally:
+        db_storage.close()
+
+
+def leaderboard_section(rows: list, total_contributors: int) -> dict:
+    """Users ranked by average score (/api/leaderboard); rows from SQLiteStorage.get_leaderboard"""
+    if not total_contributors:
+        return {'data': [], 'stats': {'total_contributors': 0}}
+    result = [{**row, 'rank': rank} for rank, row in enumerate(rows, 1)]
+    return {
+        'data': result,
+        'count': len(result),
+        'stats': {
+            'total_contributors': total_contributors,
+            'showing': len(result)
+        }
+    }
+
+
+def engagement_section(frame: TweetFrame, last_updated: Optional[str], distribution: Optional[dict] = None) -> dict:
+    """Engagement averages and recent activity (/api/metrics/engagement)"""
+    if frame.empty:
+        return _with_distribution({
+            'avg_likes': 0,
+            'avg_retweets': 0,
+            'avg_replies': 0,
+            'avg_views': 0,
+            'total_engagement': 0,
+            'engagement_rate': 0,
+            'recent_activity': {
+                'last_24h_tweets': 0,
+                'last_7d_tweets': 0,
+                'trending_users': []
+            },
+            'real_time_stats': {
+                'total_tweets': 0,
+                'unique_users': 0,
+                'avg_score': 0,
+                'last_updated': last_updated
+            }
+        }, distribution)
+    totals = frame.totals
+    tweet_count = len(frame.df)
+    total_engagement = totals['likes'] + totals['retweets'] + totals['replies']
+    recent = frame.engagement[frame.last_24h]
+    recent_engagement = (recent['likes'] + recent['retweets'] + recent['replies']).sum()
+    return _with_distribution({
+        'avg_likes': round(totals['likes'] / tweet_count, 1),
+        'avg_retweets': round(totals['retweets'] / tweet_count, 1),
+        'avg_replies': round(totals['replies'] / tweet_count, 1),
+        'avg_views': round(totals['avg_views'], 1),
+        'total_engagement': total_engagement,
+        'engagement_rate': round(total_engagement / tweet_count, 2),
+        'recent_activity': {
+            'last_24h_tweets': int(frame.last_24h.sum()),
+            'last_7d_tweets': int(frame.last_7d.sum()),
+            'last_24h_engagement': int(recent_engagement),
+            'trending_users': frame.trending_users
+        },
+        'real_time_stats': {
+            'total_tweets': tweet_count,
+            'unique_users': frame.unique_users,
+            'avg_score': round(frame.avg_score, 3),
+            'last_updated': last_updated,
+            'database_size_mb': round(frame.db_size_bytes / (1024 * 1024), 2)
+        }
+    }, distribution)
+
+
+def _quality_counts(frame: TweetFrame) -> tuple:
+    high = int((frame.df['score'] >= 0.04).sum())
+    low = int((frame.df['score'] <= 0.001).sum())
+    return high, len(frame.df) - high - low, low
+
+
+def quality_section(frame: TweetFrame) -> dict:
+    """Quality buckets and 7-day trend (/api/metrics/quality-distribution)"""
+    if frame.empty:
+        return {
+            'high_quality': 0,
+            'medium_quality': 0,
+            'low_quality': 0,
+            'high_percentage': 0,
+            'medium_percentage': 0,
+            'low_percentage': 0,
+            'quality_trends': {
+                'improving': False,
+                'top_performers': [],
+                'quality_score': 0
+            }
+        }
+    df = frame.df
+    high_quality, medium_quality, low_quality = _quality_counts(frame)
+    total = len(df)
+
+    recent_scores = df.loc[frame.last_7d, 'score']
+    previous_scores = df.loc[frame.previous_7d, 'score']
+    recent_avg_score = recent_scores.mean() if len(recent_scores) > 0 else 0
+    previous_avg_score = previous_scores.mean() if len(previous_scores) > 0 else 0
+
+    # Top performers: highest average score with at least 2 tweets
+    user_quality = df.groupby('username')['score'].agg(['mean', 'count']).reset_index()
+    user_quality = user_quality[user_quality['count'] >= 2]
+    top_performers = user_quality.nlargest(5, 'mean')[['username', 'mean', 'count']].to_dict('records')
+
+    quality_score = min(100, (recent_avg_score / 2.0) * 100)  # Normalize to 0-100 scale
+    return {
+        'high_quality': high_quality,
+        'medium_quality': medium_quality,
+        'low_quality': low_quality,
+        'high_percentage': round((high_quality / total) * 100, 1),
+        'medium_percentage': round((medium_quality / total) * 100, 1),
+        'low_percentage': round((low_quality / total) * 100, 1),
+        'quality_trends': {
+            'improving': bool(recent_avg_score > previous_avg_score),
+            'recent_avg_score': round(recent_avg_score, 3),
+            'previous_avg_score': round(previous_avg_score, 3),
+            'top_performers': top_performers,
+            'quality_score': round(quality_score, 1),
+            'analysis_period': '7 days'
+        }
+    }
+
+
+def dashboard_stats_section(frame: TweetFrame, last_updated: Optional[str], distribution: Optional[dict] = None) -> dict:
+    """Overview, engagement, activity and quality summary (/api/dashboard/stats)"""
+    if frame.empty:
+        return _with_distribution({
+            'overview': {
+                'total_tweets': 0,
+                'unique_users': 0,
+                'avg_score': 0,
+                'last_updated': last_updated
+            },
+            'engagement': {
+                'avg_likes': 0,
+                'avg_retweets': 0,
+                'avg_replies': 0,
+                'avg_views': 0,
+                'total_engagement': 0
+            },
+            'activity': {
+                'last_24h_tweets': 0,
+                'last_7d_tweets': 0,
+                'trending_users': []
+            },
+            'quality': {
+                'high_quality': 0,
+                'medium_quality': 0,
+                'low_quality': 0,
+                'quality_score': 0
+            }
+        }, distribution)
+    totals = frame.totals
+    total_tweets = len(frame.df)
+    high_quality, medium_quality, low_quality = _quality_counts(frame)
+    quality_score = min(100, (frame.avg_score / 2.0) * 100)
+    return _with_distribution({
+        'overview': {
+            'total_tweets': total_tweets,
+            'unique_users': frame.unique_users,
+            'avg_score': round(frame.avg_score, 3),
+            'last_updated': last_updated
+        },
+        'engagement': {
+            'avg_likes': round(totals['likes'] / total_tweets, 1),
+            'avg_retweets': round(totals['retweets'] / total_tweets, 1),
+            'avg_replies': round(totals['replies'] / total_tweets, 1),
+            'avg_views': round(totals['avg_views'], 1),
+            'total_engagement': totals['likes'] + totals['retweets'] + totals['replies']
+        },
+        'activity': {
+            'last_24h_tweets': int(frame.last_24h.sum()),
+            'last_7d_tweets': int(frame.last_7d.sum()),
+            'trending_users': frame.trending_users
+        },
+        'quality': {
+            'high_quality': high_quality,
+            'medium_quality': medium_quality,
+            'low_quality': low_quality,
+            'quality_score': round(quality_score, 1)
+        }
+    }, distribution)
+
+
+def user_profile_section(user: dict, tweets: list, distribution: Optional[dict] = None) -> dict:
+    """Stats, profile and best tweets for one user (/api/user-profile).
+
+    user: SQLiteStorage.get_user (running aggregates), tweets: get_user_top_tweets
+    """
+    return _with_distribution({
+        'username': user['username'],
+        'profile': user['profile'],
+        'stats': {
+            'total_tweets': user['scored_count'],
+            'avg_score': round(user['avg_score'], 3),
+            'best_score': round(user['best_score'], 3),
+            'total_engagement': int(user['engagement']),
+            'first_seen': user['first_seen'],
+            'last_seen': user['last_seen'],
+            'rank': 'N/A'  # Could calculate rank if needed
+        },
+        'tweets': tweets,
+        'recent_activity': f"{user['scored_count']} tweets analyzed"
+    }, distribution)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Warm-start snapshot of the dashboard analytics, memory-mapped by the API.
+
+After each pipeline run (and whenever the API has to load the tweets from
+SQLite anyway) the columns TweetFrame works on, the leaderboards and the
+quantile summaries are written to one file stamped with the tweets
+change_seq. The API maps it at startup and builds frames straight from it
+while the stamp still matches the database, so a restarted server answers
+the first dashboard requests without the SQLite scan.
+
+File layout (all offsets absolute, arrays 64-byte aligned):
+  MAGIC | uint64 header length | JSON header | arrays
+- numeric columns (score, created_ts, engagement counts) as raw arrays
+- username and project dictionary-encoded as int32 codes; the vocabularies
+  live in the header
+- id, text and created_at as one UTF-8 blob plus int64 offsets each, decoded
+  only for the rows a response actually shows
+- per-project leaderboards (top LEADERBOARD_LIMIT) and quantile summaries in
+  the header; '' is the all-projects key
+
+The file is replaced atomically, so a mapping held by a running server stays
+valid while a newer snapshot is written.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from functools import cached_property
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from storage.sqlite_storage import ENGAGEMENT_FIELDS, SQLiteStorage
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = "analytics_snapshot.bin"
+MAGIC = b"NRSNAP01"
+ALIGN = 64
+# Leaderboard rows kept per project; larger limits are read from SQLite
+LEADERBOARD_LIMIT = 100
+
+NUMERIC_COLUMNS = {"score": "float64", "created_ts": "float64", **{f: "int64" for f in ENGAGEMENT_FIELDS}}
+CODED_COLUMNS = ("username", "project")
+STRING_COLUMNS = ("id", "text", "created_at")
+
+
+def _encode_strings(values) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [("" if value is None else str(value)).encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _encode_codes(values) -> Tuple[np.ndarray, list]:
+    vocabulary: Dict[Optional[str], int] = {}
+    codes = np.fromiter((vocabulary.setdefault(value, len(vocabulary)) for value in values),
+                        dtype=np.int32, count=len(values))
+    return codes, list(vocabulary)
+
+
+def write_snapshot(db_path: str = "tweets.db", path: str = SNAPSHOT_PATH, columns: Optional[dict] = None,
+                   version: Optional[int] = None) -> int:
+    """Write the snapshot for db_path; returns its stamp.
+
+    Pass columns (from get_tweet_columns for all projects) and the change_seq read
+    *before* loading them to reuse a load already done; otherwise both are read here.
+    """
+    db_storage = SQLiteStorage(db_path=db_path)
+    try:
+        if columns is None or version is None:
+            # Stamp first: a write racing the load makes the snapshot look stale, never fresh
+            version = db_storage.get_change_seq()
+            columns = db_storage.get_tweet_columns()
+        projects = [name for name, _ in db_storage.get_projects()]
+        leaderboards, distributions = {}, {}
+        for project in [None] + projects:
+            rows, total = db_storage.get_leaderboard(limit=LEADERBOARD_LIMIT, project=project)
+            leaderboards[project or ""] = {"rows": rows, "total": total}
+            distributions[project or ""] = db_storage.get_quantiles(project=project)
+    finally:
+        db_storage.close()
+
+    arrays = {name: np.ascontiguousarray(columns[name], dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+    vocabularies = {}
+    for name in CODED_COLUMNS:
+        arrays[f"{name}.codes"], vocabularies[name] = _encode_codes(columns[name])
+    for name in STRING_COLUMNS:
+        arrays[f"{name}.offsets"], arrays[f"{name}.data"] = _encode_strings(columns[name])
+
+    header = {
+        "version": version,
+        "written_at": time.time(),
+        "rows": len(columns["score"]),
+        "vocabularies": vocabularies,
+        "leaderboard_limit": LEADERBOARD_LIMIT,
+        "leaderboards": leaderboards,
+        "distributions": distributions,
+        "arrays": {},
+    }
+    # Offsets depend on the header length, which depends on the offsets: size the header
+    # with placeholder offsets of the same width as the real ones
+    placeholder = 10 ** 15
+    header["arrays"] = {name: {"dtype": str(a.dtype), "count": len(a), "offset": placeholder} for name, a in arrays.items()}
+    header_size = len(json.dumps(header).encode("utf-8"))
+    offset = -(-(len(MAGIC) + 8 + header_size) // ALIGN) * ALIGN
+    for name, array in arrays.items():
+        header["arrays"][name]["offset"] = offset
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+    header_bytes = json.dumps(header).encode("utf-8").ljust(header_size)
+
+    # A temp file of its own: the pipeline and the API's background rebuild may write at once
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", header_size) + header_bytes)
+            for name, array in arrays.items():
+                f.write(b"\0" * (header["arrays"][name]["offset"] - f.tell()))
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return version
+
+
+def refresh_snapshot(db_path: str = "tweets.db", path: str = SNAPSHOT_PATH) -> Optional[int]:
+    """write_snapshot for the end of a pipeline run: failures are logged, never raised"""
+    start = time.perf_counter()
+    try:
+        version = write_snapshot(db_path, path)
+    except Exception as e:
+        logger.warning(f"Could not write analytics snapshot: {e}")
+        return None
+    print(f"Analytics snapshot written to {path} (change_seq {version}, {time.perf_counter() - start:.2f}s)")
+    return version
+
+
+class Snapshot:
+    """A memory-mapped snapshot file"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.file_id = (st.st_ino, st.st_mtime_ns)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an analytics snapshot")
+        (header_size,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._mmap[start:start + header_size])
+        self.version: int = self.header["version"]
+        self.rows: int = self.header["rows"]
+
+    def array(self, name: str) -> np.ndarray:
+        spec = self.header["arrays"][name]
+        if not spec["count"]:
+            return np.empty(0, dtype=spec["dtype"])
+        return np.frombuffer(self._mmap, dtype=spec["dtype"], count=spec["count"], offset=spec["offset"])
+
+    @cached_property
+    def usernames(self) -> np.ndarray:
+        return np.array(self.header["vocabularies"]["username"], dtype=object)[self.array("username.codes")]
+
+    def strings(self, name: str, rows) -> list:
+        offsets, data = self.array(f"{name}.offsets"), self.array(f"{name}.data")
+        return [data[offsets[row]:offsets[row + 1]].tobytes().decode("utf-8") for row in rows]
+
+    def columns(self, project: Optional[str] = None, username: Optional[str] = None) -> Tuple[dict, np.ndarray]:
+        """(columns for TweetFrame, snapshot row of each) for the same filters as get_tweet_columns"""
+        mask = None
+        for name, value in (("project", project), ("username", username)):
+            if value:
+                vocabulary = self.header["vocabularies"][name]
+                code = vocabulary.index(value) if value in vocabulary else -1
+                match = self.array(f"{name}.codes") == code
+                mask = match if mask is None else mask & match
+        rows = np.arange(self.rows) if mask is None else np.flatnonzero(mask)
+        select = (lambda a: a) if mask is None else (lambda a: a[rows])
+        columns = {name: select(self.array(name)) for name in NUMERIC_COLUMNS}
+        columns["username"] = select(self.usernames)
+        return columns, rows
+
+    def leaderboard(self, limit: int, project: Optional[str] = None) -> Optional[Tuple[list, int]]:
+        board = self.header["leaderboards"].get(project or "")
+        if board is None or limit > self.header["leaderboard_limit"]:
+            return None
+        return board["rows"][:limit], board["total"]
+
+    def distribution(self, project: Optional[str] = None) -> Optional[dict]:
+        return self.header["distributions"].get(project or "")
+
+
+_current: Optional[Snapshot] = None
+_current_lock = threading.Lock()
+_writing = threading.Lock()
+
+
+def open_snapshot(path: str = SNAPSHOT_PATH) -> Optional[Snapshot]:
+    """Map the snapshot file if it exists and has changed since it was last mapped"""
+    global _current
+    with _current_lock:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return _current
+        if _current is None or _current.path != path or _current.file_id != (st.st_ino, st.st_mtime_ns):
+            try:
+                _current = Snapshot(path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring analytics snapshot {path}: {e}")
+        return _current
+
+
+def fresh_snapshot(version: int, path: str = SNAPSHOT_PATH) -> Optional[Snapshot]:
+    """The mapped snapshot if its stamp matches the database's change_seq, else None"""
+    snapshot = _current
+    if snapshot is None or snapshot.version != version:
+        # A newer file may have been written by the pipeline since it was mapped
+        snapshot = open_snapshot(path)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    return None
+
+
+def write_snapshot_in_background(db_path: str, path: str, columns: dict, version: int) -> None:
+    """Rebuild from a load that already happened, unless a rebuild is in progress"""
+    if not _writing.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            write_snapshot(db_path, path, columns, version)
+            open_snapshot(path)
+        except Exception as e:
+            logger.warning(f"Could not write analytics snapshot: {e}")
+        finally:
+            _writing.release()
+
+    threading.Thread(target=run, name="analytics-snapshot", daemon=True).start()
@@ -1,25 +1,53 @@
 #!/usr/bin/env python3
 """
 Flask API for Tweet Mention Tracker Frontend
+
+Module import is kept light so the server can accept requests quickly:
+pandas (via analytics), the Nation Agent client and the storage layer are
+imported by the handlers that use them. create_app() does the one-time
+startup work (schema check, then mapping the analytics snapshot and warming
+imports and the response cache in the background); run it as `python app.py`
+or `gunicorn 'app:create_app()'`.
 """
 
-from flask import Flask, jsonify, request, send_from_directory, Response
+from flask import Flask, jsonify, request, send_from_directory, Response, g, stream_with_context
 from flask_cors import CORS
 import os
 import json
-import pandas as pd
-from datetime import datetime, timedelta
+import logging
+import threading
+from datetime import datetime
 import subprocess
 import sys
 import csv
+import time
+import hashlib
 from io import StringIO
 
 # Import our existing modules
 # Note: main.py removed - this app now focuses on Crestal-only monitoring
-from nation_agent import get_agent_score, format_tweet_for_agent
-from fetchers.new_twitter_fetcher import NewTwitterFetcher
+# Heavy modules (analytics/pandas, nation_agent/requests, storage) are imported inside the handlers
+from metrics import REGISTRY, API_REQUEST_SECONDS, LATEST_RUN_SUMMARY, load_latest_run_summary, render_run_summary
+from http_response import FastJSONProvider, compress_response
+from http_cache import (
+    AGGREGATE, SEARCH, REVALIDATE, coalesced, conditional, current_data_version, data_last_updated,
+    apply_default_cache_control
+)
+
+logger = logging.getLogger(__name__)
+
+# Requested once in the background at startup so the dashboard's first load is served from the
+# response cache (same query strings as frontend/lib/api.ts sends by default)
+WARM_PATHS = (
+    '/api/dashboard/bundle?sections=stats,engagement,quality,leaderboard,tweets&limit=100&leaderboard_limit=20',
+    '/api/leaderboard?limit=100',
+    '/api/metrics/engagement',
+    '/api/metrics/quality-distribution',
+    '/api/crestal-data?limit=1',
+)
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app, origins=[
     "https://nation-radar.up.railway.app",
     "https://*.up.railway.app",
@@ -28,6 +56,21 @@ CORS(app, origins=[
     "*"
 ])  # Enable CORS for Railway frontend
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    start = getattr(g, 'request_start', None)
+    if start is not None and request.url_rule is not None:
+        API_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            endpoint=request.url_rule.rule,
+            status=response.status_code
+        )
+    return compress_response(apply_default_cache_control(response))
+
 # Serve static files from the frontend directory
 @app.route('/')
 def serve_frontend():
@@ -55,201 +98,227 @@ def debug_info():
         'service': 'Nation Radar API'
     })
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrics: in-process API/storage metrics plus the last pipeline run summary"""
+    body = REGISTRY.render_prometheus() + render_run_summary(load_latest_run_summary())
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 # API Routes
 @app.route('/api/crestal-data', methods=['GET'])
+@conditional(AGGREGATE)
+@coalesced()
 def get_crestal_data():
     """Get Crestal tweet data from SQLite database"""
     try:
+        from analytics import load_frame, tweets_section
         format_type = request.args.get('format', 'json')
         limit = int(request.args.get('limit', 100))  # Default limit of 100 (increased from 50)
         
-        # Import SQLite storage
-        from storage.sqlite_storage import SQLiteStorage
-        db_storage = SQLiteStorage(db_path="tweets.db")
-        
-        # Get all tweets from database
-        tweets = db_storage.get_all_tweets()
-        
-        if not tweets:
-            return jsonify({
-                'success': True,
-                'data': [],
-                'count': 0,
-                'stats': {
-                    'total_tweets': 0,
-                    'avg_score': 0,
-                    'high_quality': 0,
-                    'low_quality': 0
-                }
-            })
-        
-        # Convert to DataFrame for easier processing
-        import pandas as pd
-        df = pd.DataFrame(tweets)
+        frame = load_frame(project=request.args.get('project'))
+        section = tweets_section(frame, limit, iso_created_at)
         
-        if len(df) > 0:
-            # Convert scores to numeric
-            df['score'] = pd.to_numeric(df['score'], errors='coerce').fillna(0)
-            
-            # Sort by score descending and apply limit
-            df_sorted = df.sort_values('score', ascending=False).head(limit)
-            
-            # Calculate stats from full dataset
-            total_tweets = len(df)
-            avg_score = df['score'].mean() if total_tweets > 0 else 0
-            high_quality = len(df[df['score'] >= 0.03])  # Adjusted threshold
-            low_quality = len(df[df['score'] < 0.01])    # Adjusted threshold
+        # Handle CSV export
+        if format_type == 'csv' and not frame.empty:
+            output = StringIO()
+            writer = csv.writer(output)
+            writer.writerow(['ID', 'Username', 'Text', 'Score', 'Created At'])
+            for item in section['data']:
+                writer.writerow([item['id'], item['username'], item['text'], item['score'], item['created_at']])
             
-            # Convert to list of dictionaries
-            data = []
-            for _, row in df_sorted.iterrows():
-                # Parse real engagement data from JSON
-                engagement_json = row.get('engagement', '{}')
-                try:
-                    engagement = json.loads(engagement_json) if isinstance(engagement_json, str) else engagement_json
-                    if not engagement or not isinstance(engagement, dict):
-                        engagement = {}
-                except:
-                    engagement = {}
-                
-                # Add some time variation to make data feel more live
-                import random
-                minutes_ago = random.randint(1, 120)
-                created_time = datetime.now() - timedelta(minutes=minutes_ago)
-                
-                data.append({
-                    'id': str(row['id']),
-                    'username': row['username'],
-                    'text': row['text'],
-                    'score': float(row['score']),
-                    'created_at': created_time.isoformat(),
-                    'engagement': engagement
-                })
-            
-            # Handle CSV export
-            if format_type == 'csv':
-                from flask import Response
-                output = StringIO()
-                writer = csv.writer(output)
-                writer.writerow(['ID', 'Username', 'Text', 'Score', 'Created At'])
-                for item in data:
-                    writer.writerow([item['id'], item['username'], item['text'], item['score'], item['created_at']])
-                
-                response = Response(
-                    output.getvalue(),
-                    mimetype='text/csv',
-                    headers={'Content-Disposition': f'attachment; filename=nation-radar-{datetime.now().strftime("%Y%m%d")}.csv'}
-                )
-                return response
+            return Response(
+                output.getvalue(),
+                mimetype='text/csv',
+                headers={'Content-Disposition': f'attachment; filename=nation-radar-{datetime.now().strftime("%Y%m%d")}.csv'}
+            )
+        
+        return jsonify({'success': True, **section})
             
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/projects', methods=['GET'])
+@conditional(AGGREGATE, extra_version=lambda: config_version())
+def get_projects():
+    """List configured projects with their stored tweet counts"""
+    try:
+        from config import PROJECTS
+        from storage.sqlite_storage import SQLiteStorage
+        db_storage = SQLiteStorage(db_path="tweets.db")
+        try:
+            counts = dict(db_storage.get_projects())
+        finally:
+            db_storage.close()
+
+        data = [{
+            'name': project['name'],
+            'keywords': project['keywords'],
+            'tickers': project['tickers'],
+            'days_lookback': project['days_lookback'],
+            'tweet_count': int(counts.get(project['name'], 0))
+        } for project in PROJECTS]
+
+        return jsonify({
+            'success': True,
+            'data': data,
+            'count': len(data)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/search', methods=['GET'])
+@conditional(SEARCH)
+def search_tweets():
+    """Ranked full-text search over stored tweets.
+
+    Query params: q (words or "quoted phrases", all must match), username, project,
+    min_score, max_score, since/until (ISO date or epoch seconds), limit, cursor
+    (next_cursor from the previous page).
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
             return jsonify({
-                'success': True,
-                'data': data,
-                'count': len(data),
-                'stats': {
-                    'total_tweets': total_tweets,
-                    'avg_score': round(avg_score, 3),
-                    'high_quality': high_quality,
-                    'low_quality': low_quality,
-                    'unique_users': len(df['username'].unique())
-                }
-            })
-        else:
-            return jsonify({
-                'success': True,
-                'data': [],
-                'count': 0,
-                'stats': {
-                    'total_tweets': 0,
-                    'avg_score': 0,
-                    'high_quality': 0,
-                    'low_quality': 0
-                }
-            })
-            
+                'success': False,
+                'error': 'Query parameter q is required'
+            }), 400
+        limit = max(1, min(int(request.args.get('limit', 50)), 200))
+        min_score = request.args.get('min_score', type=float)
+        max_score = request.args.get('max_score', type=float)
+        since = parse_time_param(request.args.get('since'))
+        until = parse_time_param(request.args.get('until'))
+
+        from storage.sqlite_storage import SQLiteStorage
+        db_storage = SQLiteStorage(db_path="tweets.db")
+        try:
+            tweets, next_cursor = db_storage.search_tweets(
+                query,
+                username=request.args.get('username'),
+                project=request.args.get('project'),
+                min_score=min_score,
+                max_score=max_score,
+                since=since,
+                until=until,
+                limit=limit,
+                cursor=request.args.get('cursor'),
+            )
+        finally:
+            db_storage.close()
+
+        return jsonify({
+            'success': True,
+            'data': tweets,
+            'count': len(tweets),
+            'next_cursor': next_cursor
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/changes', methods=['GET'])
+@conditional(REVALIDATE)
+def get_changes():
+    """Tweets inserted or updated since a cursor, plus refreshed aggregates.
+
+    Poll with since=<cursor from the previous response> (omit or 0 for a full sync).
+    Aggregates are only recomputed when something changed; keep polling while has_more.
+    """
+    try:
+        since = int(request.args.get('since', 0))
+        limit = max(1, min(int(request.args.get('limit', 500)), 2000))
+        project = request.args.get('project')
+
+        from storage.sqlite_storage import SQLiteStorage
+        db_storage = SQLiteStorage(db_path="tweets.db")
+        try:
+            # A cursor from a newer (e.g. rebuilt) database can't be trusted: resync
+            reset = since > db_storage.get_change_seq()
+            if reset or since < 0:
+                since = 0
+            tweets, cursor, has_more = db_storage.get_changes(since, limit=limit, project=project)
+            aggregates = db_storage.get_aggregates(project=project) if tweets else None
+        finally:
+            db_storage.close()
+
+        return jsonify({
+            'success': True,
+            'data': tweets,
+            'count': len(tweets),
+            'cursor': str(cursor),
+            'has_more': has_more,
+            'reset': reset,
+            'aggregates': aggregates
+        })
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'since and limit must be integers'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/stream', methods=['GET'])
+def stream_changes():
+    """Server-Sent Events feed of stored/updated tweets and aggregate deltas.
+
+    Reconnecting EventSource clients send Last-Event-ID automatically; plain HTTP
+    clients can pass ?last_event_id= (a /api/changes cursor works too).
+    """
+    try:
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Last-Event-ID must be an integer'
+        }), 400
+
+    from live_stream import BROADCASTER
+    return Response(
+        stream_with_context(BROADCASTER.stream(last_event_id)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Don't let nginx buffer the stream
+        }
+    )
+
 @app.route('/api/leaderboard', methods=['GET'])
+@conditional(AGGREGATE)
+@coalesced()
 def get_leaderboard():
     """Get top contributors leaderboard from SQLite database"""
     try:
+        from analytics import load_leaderboard, leaderboard_section
         limit = int(request.args.get('limit', 20))  # Default top 20
         print(f"🔍 Leaderboard request: limit={limit}")
         
-        # Import SQLite storage
-        from storage.sqlite_storage import SQLiteStorage
-        db_storage = SQLiteStorage(db_path="tweets.db")
-        
-        # Get all tweets from database
-        tweets = db_storage.get_all_tweets()
-        print(f"📊 Found {len(tweets) if tweets else 0} tweets in database")
+        rows, total_contributors = load_leaderboard(limit, project=request.args.get('project'))
+        print(f"📊 Found {total_contributors} contributors in database")
         
-        if not tweets:
-            print("⚠️ No tweets found in database")
-            return jsonify({
-                'success': True,
-                'data': [],
-                'leaderboard': [],
-                'stats': {'total_contributors': 0}
-            })
-        
-        # Convert to DataFrame for easier processing
-        import pandas as pd
-        df = pd.DataFrame(tweets)
-        print(f"📈 DataFrame shape: {df.shape}")
-        
-        if len(df) > 0:
-            df['score'] = pd.to_numeric(df['score'], errors='coerce').fillna(0)
-            print(f"🎯 Score range: {df['score'].min()} to {df['score'].max()}")
-            
-            # Group by username and calculate stats
-            leaderboard = df.groupby('username').agg({
-                'score': ['mean', 'max', 'count']
-            }).round(2)
-            
-            # Flatten column names
-            leaderboard.columns = ['avg_score', 'best_score', 'tweet_count']
-            leaderboard = leaderboard.reset_index()
-            print(f"👥 Found {len(leaderboard)} unique users")
-            
-            # Sort by average score and limit results
-            leaderboard = leaderboard.sort_values('avg_score', ascending=False).head(limit)
-            
-            # Convert to list
-            result = []
-            for _, row in leaderboard.iterrows():
-                user_data = {
-                    'username': row['username'],
-                    'avg_score': float(row['avg_score']),
-                    'best_score': float(row['best_score']),
-                    'tweet_count': int(row['tweet_count']),
-                    'rank': len(result) + 1
-                }
-                result.append(user_data)
-                print(f"👤 User: {user_data}")
-            
-            response_data = {
-                'success': True,
-                'data': result,
-                'leaderboard': result,  # Keep both for backward compatibility
-                'count': len(result),
-                'stats': {
-                    'total_contributors': len(df['username'].unique()),
-                    'showing': len(result)
-                }
-            }
-            
-            print(f"✅ Returning {len(result)} users in leaderboard")
-            return jsonify(response_data)
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'Invalid CSV format'
-            }), 400
+        section = leaderboard_section(rows, total_contributors)
+        print(f"✅ Returning {len(section['data'])} users in leaderboard")
+        return jsonify({
+            'success': True,
+            **section,
+            'leaderboard': section['data']  # Keep both for backward compatibility
+        })
             
     except Exception as e:
         return jsonify({
@@ -258,111 +327,138 @@ def get_leaderboard():
         }), 500
 
 @app.route('/api/metrics/engagement', methods=['GET'])
+@conditional(AGGREGATE, time_bucket=300)
+@coalesced(time_bucket=300)
 def get_engagement_metrics():
     """Get detailed engagement metrics with real-time calculations"""
     try:
-        from storage.sqlite_storage import SQLiteStorage
-        from datetime import datetime, timedelta
-        import pandas as pd
-        
-        db_storage = SQLiteStorage(db_path="tweets.db")
-        tweets = db_storage.get_all_tweets()
-        
-        if not tweets:
-            return jsonify({
-                'success': True,
-                'data': {
-                    'avg_likes': 0,
-                    'avg_retweets': 0,
-                    'avg_replies': 0,
-                    'avg_views': 0,
-                    'total_engagement': 0,
-                    'engagement_rate': 0,
-                    'recent_activity': {
-                        'last_24h_tweets': 0,
-                        'last_7d_tweets': 0,
-                        'trending_users': []
-                    },
-                    'real_time_stats': {
-                        'total_tweets': 0,
-                        'unique_users': 0,
-                        'avg_score': 0,
-                        'last_updated': datetime.now().isoformat()
-                    }
-                }
-            })
-        
-        # Convert to DataFrame for easier processing
-        df = pd.DataFrame(tweets)
-        
-        # Add timestamp column for time-based calculations
-        df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
-        # Convert timezone-aware timestamps to naive datetime for comparison
-        df['created_at'] = df['created_at'].dt.tz_localize(None).fillna(pd.Timestamp.now())
-        
-        # Calculate engagement metrics
-        total_likes = sum(tweet.get('engagement', {}).get('likes', 0) for tweet in tweets)
-        total_retweets = sum(tweet.get('engagement', {}).get('retweets', 0) for tweet in tweets)
-        total_replies = sum(tweet.get('engagement', {}).get('replies', 0) for tweet in tweets)
-        
-        # For views, filter out extreme outliers (> 10,000 views) to get realistic average
-        views_data = [tweet.get('engagement', {}).get('views', 0) for tweet in tweets]
-        filtered_views = [v for v in views_data if v <= 10000]  # Remove extreme outliers
-        
-        if filtered_views:
-            avg_views = sum(filtered_views) / len(filtered_views)
-            total_views = sum(filtered_views)
-        else:
-            avg_views = 0
-            total_views = 0
-        
-        tweet_count = len(tweets)
+        from analytics import load_frame, load_distribution, engagement_section
+        project = request.args.get('project')
+        frame = load_frame(project=project)
+        return jsonify({
+            'success': True,
+            'data': engagement_section(frame, data_last_updated(), load_distribution(project=project))
+        })
         
-        # Calculate recent activity (last 24 hours and 7 days)
-        now = datetime.now()
-        last_24h = now - timedelta(hours=24)
-        last_7d = now - timedelta(days=7)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/metrics/quantiles', methods=['GET'])
+@conditional(AGGREGATE)
+@coalesced()
+def get_quantile_metrics():
+    """p50/p90/p99 of views, likes and score from the ingest-time quantile sketches.
+
+    Query params: project, username (per-user sketches) or since/until (ISO or
+    epoch; whole UTC days), metrics (comma-separated subset of views, likes, score).
+    """
+    try:
+        requested = request.args.get('metrics')
+        kwargs = {}
+        if requested:
+            kwargs['metrics'] = [m.strip() for m in requested.split(',') if m.strip()]
+        since = parse_time_param(request.args.get('since'))
+        until = parse_time_param(request.args.get('until'))
         
-        recent_24h = df[df['created_at'] >= last_24h]
-        recent_7d = df[df['created_at'] >= last_7d]
+        from storage.sqlite_storage import SQLiteStorage
+        db_storage = SQLiteStorage(db_path="tweets.db")
+        try:
+            distribution = db_storage.get_quantiles(
+                project=request.args.get('project'),
+                username=request.args.get('username'),
+                since=since,
+                until=until,
+                **kwargs
+            )
+        finally:
+            db_storage.close()
+        return jsonify({
+            'success': True,
+            'data': distribution
+        })
         
-        # Find trending users (most active in last 7 days)
-        trending_users = recent_7d.groupby('username').size().sort_values(ascending=False).head(5)
-        trending_users_list = [{'username': user, 'tweet_count': int(count)} for user, count in trending_users.items()]
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/metrics/heatmap', methods=['GET'])
+@conditional(AGGREGATE, time_bucket=300)
+@coalesced(time_bucket=300)
+def get_activity_heatmap():
+    """Hour-of-day x day-of-week activity (volume, mean score, engagement) plus recent days by hour.
+
+    Query params: project, keyword (a configured search keyword), days (per-day rows, default 14, max 90).
+    """
+    try:
+        days = max(0, min(int(request.args.get('days', 14)), 90))
         
-        # Calculate quality metrics
-        df['score'] = pd.to_numeric(df['score'], errors='coerce').fillna(0)
-        avg_score = df['score'].mean()
-        unique_users = df['username'].nunique()
+        from storage.sqlite_storage import SQLiteStorage
+        db_storage = SQLiteStorage(db_path="tweets.db")
+        try:
+            heatmap = db_storage.get_heatmap(
+                project=request.args.get('project'),
+                keyword=request.args.get('keyword'),
+                days=days
+            )
+        finally:
+            db_storage.close()
+        return jsonify({
+            'success': True,
+            'data': heatmap
+        })
         
-        # Calculate engagement trends
-        recent_engagement = recent_24h['engagement'].apply(lambda x: 
-            x.get('likes', 0) + x.get('retweets', 0) + x.get('replies', 0) if isinstance(x, dict) else 0
-        ).sum()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/graph', methods=['GET'])
+@conditional(AGGREGATE, time_bucket=300)
+@coalesced(time_bucket=300)
+def get_interaction_graph():
+    """Who replies to, quotes and mentions whom, weighted by recency.
+
+    Query params: username (subgraph around that user; omit for the whole community),
+    project, kinds (comma-separated subset of reply, quote, mention), k (nodes, default 25, max 200).
+    """
+    try:
+        from interaction_graph import build_graph
+        from storage.sqlite_storage import SQLiteStorage, INTERACTION_KINDS
+        requested = request.args.get('kinds')
+        kinds = [kind.strip() for kind in requested.split(',') if kind.strip()] if requested else list(INTERACTION_KINDS)
+        unknown = [kind for kind in kinds if kind not in INTERACTION_KINDS]
+        if unknown:
+            return jsonify({
+                'success': False,
+                'error': f"Unknown kinds: {', '.join(unknown)} (choose from {', '.join(INTERACTION_KINDS)})"
+            }), 400
+        k = int(request.args.get('k', 25))
         
+        db_storage = SQLiteStorage(db_path="tweets.db")
+        try:
+            graph = build_graph(
+                db_storage,
+                username=request.args.get('username'),
+                project=request.args.get('project'),
+                kinds=kinds,
+                k=k
+            )
+        finally:
+            db_storage.close()
         return jsonify({
             'success': True,
-            'data': {
-                'avg_likes': round(total_likes / tweet_count, 1) if tweet_count > 0 else 0,
-                'avg_retweets': round(total_retweets / tweet_count, 1) if tweet_count > 0 else 0,
-                'avg_replies': round(total_replies / tweet_count, 1) if tweet_count > 0 else 0,
-                'avg_views': round(avg_views, 1),
-                'total_engagement': total_likes + total_retweets + total_replies,
-                'engagement_rate': round((total_likes + total_retweets + total_replies) / tweet_count, 2) if tweet_count > 0 else 0,
-                'recent_activity': {
-                    'last_24h_tweets': len(recent_24h),
-                    'last_7d_tweets': len(recent_7d),
-                    'last_24h_engagement': int(recent_engagement),
-                    'trending_users': trending_users_list
-                },
-                'real_time_stats': {
-                    'total_tweets': tweet_count,
-                    'unique_users': int(unique_users),
-                    'avg_score': round(avg_score, 3),
-                    'last_updated': datetime.now().isoformat(),
-                    'database_size_mb': round(len(str(tweets)) / (1024 * 1024), 2)
-                }
-            }
+            'data': graph
         })
         
     except Exception as e:
@@ -372,88 +468,16 @@ def get_engagement_metrics():
         }), 500
 
 @app.route('/api/metrics/quality-distribution', methods=['GET'])
+@conditional(AGGREGATE, time_bucket=300)
+@coalesced(time_bucket=300)
 def get_quality_distribution():
     """Get quality distribution metrics with real-time analysis"""
     try:
-        from storage.sqlite_storage import SQLiteStorage
-        from datetime import datetime, timedelta
-        import pandas as pd
-        
-        db_storage = SQLiteStorage(db_path="tweets.db")
-        tweets = db_storage.get_all_tweets()
-        
-        if not tweets:
-            return jsonify({
-                'success': True,
-                'data': {
-                    'high_quality': 0,
-                    'medium_quality': 0,
-                    'low_quality': 0,
-                    'high_percentage': 0,
-                    'medium_percentage': 0,
-                    'low_percentage': 0,
-                    'quality_trends': {
-                        'improving': False,
-                        'top_performers': [],
-                        'quality_score': 0
-                    }
-                }
-            })
-        
-        # Convert to DataFrame for easier processing
-        df = pd.DataFrame(tweets)
-        df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
-        # Convert timezone-aware timestamps to naive datetime for comparison
-        df['created_at'] = df['created_at'].dt.tz_localize(None).fillna(pd.Timestamp.now())
-        df['score'] = pd.to_numeric(df['score'], errors='coerce').fillna(0)
-        
-        # Calculate quality distribution
-        high_quality = len(df[df['score'] >= 0.04])
-        low_quality = len(df[df['score'] <= 0.001])
-        medium_quality = len(df) - high_quality - low_quality
-        
-        total = len(df)
-        
-        # Calculate recent quality trends (last 7 days vs previous 7 days)
-        now = datetime.now()
-        last_7d = now - timedelta(days=7)
-        previous_7d = now - timedelta(days=14)
-        
-        recent_7d = df[df['created_at'] >= last_7d]
-        previous_7d_data = df[(df['created_at'] >= previous_7d) & (df['created_at'] < last_7d)]
-        
-        # Calculate quality trends
-        recent_avg_score = recent_7d['score'].mean() if len(recent_7d) > 0 else 0
-        previous_avg_score = previous_7d_data['score'].mean() if len(previous_7d_data) > 0 else 0
-        
-        quality_improving = recent_avg_score > previous_avg_score
-        
-        # Find top performers (users with highest average scores)
-        user_quality = df.groupby('username')['score'].agg(['mean', 'count']).reset_index()
-        user_quality = user_quality[user_quality['count'] >= 2]  # At least 2 tweets
-        top_performers = user_quality.nlargest(5, 'mean')[['username', 'mean', 'count']].to_dict('records')
-        
-        # Calculate overall quality score (0-100)
-        quality_score = min(100, (recent_avg_score / 2.0) * 100)  # Normalize to 0-100 scale
-        
+        from analytics import load_frame, quality_section
+        frame = load_frame(project=request.args.get('project'))
         return jsonify({
             'success': True,
-            'data': {
-                'high_quality': high_quality,
-                'medium_quality': medium_quality,
-                'low_quality': low_quality,
-                'high_percentage': round((high_quality / total) * 100, 1) if total > 0 else 0,
-                'medium_percentage': round((medium_quality / total) * 100, 1) if total > 0 else 0,
-                'low_percentage': round((low_quality / total) * 100, 1) if total > 0 else 0,
-                'quality_trends': {
-                    'improving': quality_improving,
-                    'recent_avg_score': round(recent_avg_score, 3),
-                    'previous_avg_score': round(previous_avg_score, 3),
-                    'top_performers': top_performers,
-                    'quality_score': round(quality_score, 1),
-                    'analysis_period': '7 days'
-                }
-            }
+            'data': quality_section(frame)
         })
         
     except Exception as e:
@@ -497,6 +521,7 @@ def run_pipeline():
 @app.route('/api/test-scorer', methods=['POST'])
 def test_scorer():
     """Test the Nation Agent scorer with sample text"""
+    from nation_agent import get_agent_score, format_tweet_for_agent, ScoringError
     try:
         data = request.get_json()
         text = data.get('text', '')
@@ -517,6 +542,11 @@ def test_scorer():
             'score': score,
             'interpretation': get_score_interpretation(score)
         })
+    except ScoringError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Nation Agent unavailable: {e}'
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
@@ -524,113 +554,35 @@ def test_scorer():
         }), 500
 
 @app.route('/api/user-profile/<username>', methods=['GET'])
+@conditional(AGGREGATE)
+@coalesced()
 def get_user_profile(username):
     """Get detailed user profile with all their tweets"""
     try:
         print(f"🔍 Fetching profile for user: {username}")
         
-        # Import SQLite storage
+        project = request.args.get('project')
+        from analytics import user_profile_section
         from storage.sqlite_storage import SQLiteStorage
         db_storage = SQLiteStorage(db_path="tweets.db")
-        
-        # Get all tweets from database
-        tweets = db_storage.get_all_tweets()
-        
-        if not tweets:
+        try:
+            user = db_storage.get_user(username, project=project)
+            tweets = db_storage.get_user_top_tweets(user['user_id'], limit=20, project=project) if user else []
+            distribution = db_storage.get_quantiles(username=username) if user else None
+        finally:
+            db_storage.close()
+        if not user or not user['scored_count']:
             return jsonify({
                 'success': False,
-                'error': 'No tweets found in database'
+                'error': f'No tweets found for user: {username}'
             }), 404
         
-        # Convert to DataFrame for easier processing
-        import pandas as pd
-        df = pd.DataFrame(tweets)
-        
-        if len(df) > 0:
-            # Filter tweets for this specific user
-            user_tweets = df[df['username'] == username]
-            
-            if len(user_tweets) == 0:
-                return jsonify({
-                    'success': False,
-                    'error': f'No tweets found for user: {username}'
-                }), 404
-            
-            # Convert scores to numeric
-            user_tweets['score'] = pd.to_numeric(user_tweets['score'], errors='coerce').fillna(0)
-            
-            # Calculate user stats
-            total_tweets = len(user_tweets)
-            avg_score = user_tweets['score'].mean()
-            best_score = user_tweets['score'].max()
-            
-            # Calculate real total engagement from actual engagement data
-            total_engagement = 0
-            for _, row in user_tweets.iterrows():
-                engagement_json = row.get('engagement', '{}')
-                try:
-                    real_engagement = json.loads(engagement_json) if isinstance(engagement_json, str) else engagement_json
-                    total_engagement += (
-                        real_engagement.get('likes', 0) + 
-                        real_engagement.get('retweets', 0) * 2 + 
-                        real_engagement.get('replies', 0) * 3
-                    )
-                except:
-                    continue
-            
-            # Sort tweets by score (best first) and limit to top 20
-            user_tweets_sorted = user_tweets.sort_values('score', ascending=False).head(20)
-            
-            # Convert to list format
-            tweets_list = []
-            for _, row in user_tweets_sorted.iterrows():
-                # Parse real engagement data from JSON
-                engagement_json = row.get('engagement', '{}')
-                try:
-                    real_engagement = json.loads(engagement_json) if isinstance(engagement_json, str) else engagement_json
-                except:
-                    real_engagement = {}
-                
-                tweet_data = {
-                    'id': row.get('id', 'unknown'),
-                    'text': row.get('text', ''),
-                    'score': float(row.get('score', 0)),
-                    'created_at': row.get('created_at', ''),
-                    'engagement': {
-                        'likes': int(real_engagement.get('likes', 0)),
-                        'retweets': int(real_engagement.get('retweets', 0)),
-                        'replies': int(real_engagement.get('replies', 0)),
-                        'views': int(real_engagement.get('views', 0)),
-                        'bookmarks': int(real_engagement.get('bookmarks', 0)),
-                        'quote_tweets': int(real_engagement.get('quote_tweets', 0))
-                    }
-                }
-                tweets_list.append(tweet_data)
-            
-            # Create response
-            profile_data = {
-                'username': username,
-                'stats': {
-                    'total_tweets': total_tweets,
-                    'avg_score': round(avg_score, 3),
-                    'best_score': round(best_score, 3),
-                    'total_engagement': int(total_engagement),
-                    'rank': 'N/A'  # Could calculate rank if needed
-                },
-                'tweets': tweets_list,
-                'recent_activity': f"{total_tweets} tweets analyzed"
-            }
-            
-            print(f"✅ Found {total_tweets} tweets for {username}")
-            return jsonify({
-                'success': True,
-                'data': profile_data
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'No data available'
-            }), 404
+        profile_data = user_profile_section(user, tweets, distribution)
+        print(f"✅ Found {profile_data['stats']['total_tweets']} tweets for {username}")
+        return jsonify({
+            'success': True,
+            'data': profile_data
+        })
             
     except Exception as e:
         print(f"❌ Error fetching user profile: {e}")
@@ -640,50 +592,52 @@ def get_user_profile(username):
         }), 500
 
 @app.route('/api/system-status', methods=['GET'])
+@conditional(REVALIDATE, time_bucket=300, extra_version=lambda: run_summary_version())
 def get_system_status():
     """Get system status and statistics for frontend"""
     try:
-        csv_filename = 'tweets.csv'
-        
         # Check required files
         config_exists = os.path.exists('config.yaml')
-        grok_csv_exists = os.path.exists('groktweets.csv')
         tweets_db_exists = os.path.exists('tweets.db')
-        csv_exists = os.path.exists(csv_filename)
         
-        # Calculate statistics from CSV if available
         total_tweets = 0
         avg_score = 0
         top_score = 0
         recent_tweets_24h = 0
         
-        if csv_exists:
+        if tweets_db_exists:
+            from storage.sqlite_storage import SQLiteStorage
+            db_storage = SQLiteStorage(db_path="tweets.db")
             try:
-                df = pd.read_csv(csv_filename, header=None)
-                if len(df.columns) >= 4:
-                    df.columns = ['id', 'username', 'text', 'score', 'profile_url']
-                    df['score'] = pd.to_numeric(df['score'], errors='coerce').fillna(0)
-                    
-                    total_tweets = len(df)
-                    avg_score = df['score'].mean() if total_tweets > 0 else 0
-                    top_score = df['score'].max() if total_tweets > 0 else 0
-                    recent_tweets_24h = max(1, int(total_tweets * 0.1))  # Estimate 10% as recent
-            except Exception as e:
-                print(f"Error reading CSV for stats: {e}")
+                aggregates = db_storage.get_aggregates(project=request.args.get('project'),
+                                                       recent_since=int(time.time()) - 24 * 3600)
+            finally:
+                db_storage.close()
+            
+            total_tweets = aggregates['total_tweets']
+            avg_score = aggregates['avg_score']
+            top_score = aggregates['top_score']
+            recent_tweets_24h = aggregates['recent_tweets']
+        
+        last_run = load_latest_run_summary()
         
         return jsonify({
             'success': True,
             'status': {
                 'config_exists': config_exists,
-                'groktweets_csv': grok_csv_exists,
                 'tweets_database': tweets_db_exists,
-                'csv_exists': csv_exists,
                 'pipeline_ready': config_exists,
                 'total_tweets': total_tweets,
                 'recent_tweets_24h': recent_tweets_24h,
-                'average_score': round(avg_score, 3),
-                'top_score': round(top_score, 3),
-                'timestamp': datetime.now().isoformat()
+                'average_score': round(float(avg_score), 3),
+                'top_score': round(float(top_score), 3),
+                'last_pipeline_run': {
+                    'run_id': last_run.get('run_id'),
+                    'finished_at': last_run.get('finished_at'),
+                    'duration_seconds': last_run.get('duration_seconds'),
+                    'stats': last_run.get('stats')
+                } if last_run else None,
+                'timestamp': data_last_updated()
             }
         })
     except Exception as e:
@@ -693,117 +647,71 @@ def get_system_status():
         }), 500
 
 @app.route('/api/dashboard/stats', methods=['GET'])
+@conditional(AGGREGATE, time_bucket=300)
+@coalesced(time_bucket=300)
 def get_dashboard_stats():
     """Get comprehensive real-time dashboard statistics"""
     try:
-        from storage.sqlite_storage import SQLiteStorage
-        from datetime import datetime, timedelta
-        import pandas as pd
-        
-        db_storage = SQLiteStorage(db_path="tweets.db")
-        tweets = db_storage.get_all_tweets()
+        from analytics import load_frame, load_distribution, dashboard_stats_section
+        project = request.args.get('project')
+        frame = load_frame(project=project)
+        return jsonify({
+            'success': True,
+            'data': dashboard_stats_section(frame, data_last_updated(), load_distribution(project=project))
+        })
         
-        if not tweets:
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/dashboard/bundle', methods=['GET'])
+@conditional(AGGREGATE, time_bucket=300)
+@coalesced(time_bucket=300)
+def get_dashboard_bundle():
+    """Several dashboard payloads computed from one load of the tweets.
+
+    Query params: sections (comma-separated subset of stats, engagement, quality,
+    leaderboard, tweets; default all), limit (tweets), leaderboard_limit, project.
+    Each section holds the same payload as its standalone endpoint's data. cursor is
+    the /api/changes cursor the sections are at least as new as: poll deltas from it.
+    """
+    try:
+        from analytics import (
+            SECTIONS, load_frame, load_distribution, load_leaderboard, tweets_section, leaderboard_section,
+            engagement_section, quality_section, dashboard_stats_section
+        )
+        requested = request.args.get('sections')
+        sections = [s.strip() for s in requested.split(',') if s.strip()] if requested else list(SECTIONS)
+        unknown = [s for s in sections if s not in SECTIONS]
+        if unknown:
             return jsonify({
-                'success': True,
-                'data': {
-                    'overview': {
-                        'total_tweets': 0,
-                        'unique_users': 0,
-                        'avg_score': 0,
-                        'last_updated': datetime.now().isoformat()
-                    },
-                    'engagement': {
-                        'avg_likes': 0,
-                        'avg_retweets': 0,
-                        'avg_replies': 0,
-                        'avg_views': 0,
-                        'total_engagement': 0
-                    },
-                    'activity': {
-                        'last_24h_tweets': 0,
-                        'last_7d_tweets': 0,
-                        'trending_users': []
-                    },
-                    'quality': {
-                        'high_quality': 0,
-                        'medium_quality': 0,
-                        'low_quality': 0,
-                        'quality_score': 0
-                    }
-                }
-            })
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(tweets)
-        df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
-        # Convert timezone-aware timestamps to naive datetime for comparison
-        df['created_at'] = df['created_at'].dt.tz_localize(None).fillna(pd.Timestamp.now())
-        df['score'] = pd.to_numeric(df['score'], errors='coerce').fillna(0)
-        
-        # Overview stats
-        total_tweets = len(df)
-        unique_users = df['username'].nunique()
-        avg_score = df['score'].mean()
-        
-        # Engagement calculations
-        total_likes = sum(tweet.get('engagement', {}).get('likes', 0) for tweet in tweets)
-        total_retweets = sum(tweet.get('engagement', {}).get('retweets', 0) for tweet in tweets)
-        total_replies = sum(tweet.get('engagement', {}).get('replies', 0) for tweet in tweets)
-        
-        # Views with outlier filtering
-        views_data = [tweet.get('engagement', {}).get('views', 0) for tweet in tweets]
-        filtered_views = [v for v in views_data if v <= 10000]
-        avg_views = sum(filtered_views) / len(filtered_views) if filtered_views else 0
-        
-        # Recent activity
-        now = datetime.now()
-        last_24h = now - timedelta(hours=24)
-        last_7d = now - timedelta(days=7)
-        
-        recent_24h = df[df['created_at'] >= last_24h]
-        recent_7d = df[df['created_at'] >= last_7d]
-        
-        # Trending users
-        trending_users = recent_7d.groupby('username').size().sort_values(ascending=False).head(5)
-        trending_users_list = [{'username': user, 'tweet_count': int(count)} for user, count in trending_users.items()]
-        
-        # Quality distribution
-        high_quality = len(df[df['score'] >= 0.04])
-        low_quality = len(df[df['score'] <= 0.001])
-        medium_quality = total_tweets - high_quality - low_quality
-        
-        # Quality score
-        quality_score = min(100, (avg_score / 2.0) * 100)
+                'success': False,
+                'error': f"Unknown sections: {', '.join(unknown)} (choose from {', '.join(SECTIONS)})"
+            }), 400
+        limit = int(request.args.get('limit', 100))
+        leaderboard_limit = int(request.args.get('leaderboard_limit', 20))
+        
+        project = request.args.get('project')
+        # The version this response is cached under; the data loaded below is at least as new
+        cursor = current_data_version()[0]
+        frame = load_frame(project=project)
+        last_updated = data_last_updated()
+        distribution = load_distribution(project=project) if {'stats', 'engagement'} & set(sections) else None
+        builders = {
+            'stats': lambda: dashboard_stats_section(frame, last_updated, distribution),
+            'engagement': lambda: engagement_section(frame, last_updated, distribution),
+            'quality': lambda: quality_section(frame),
+            'leaderboard': lambda: leaderboard_section(*load_leaderboard(leaderboard_limit, project=project)),
+            'tweets': lambda: tweets_section(frame, limit, iso_created_at),
+        }
         
         return jsonify({
             'success': True,
-            'data': {
-                'overview': {
-                    'total_tweets': total_tweets,
-                    'unique_users': int(unique_users),
-                    'avg_score': round(avg_score, 3),
-                    'last_updated': datetime.now().isoformat()
-                },
-                'engagement': {
-                    'avg_likes': round(total_likes / total_tweets, 1) if total_tweets > 0 else 0,
-                    'avg_retweets': round(total_retweets / total_tweets, 1) if total_tweets > 0 else 0,
-                    'avg_replies': round(total_replies / total_tweets, 1) if total_tweets > 0 else 0,
-                    'avg_views': round(avg_views, 1),
-                    'total_engagement': total_likes + total_retweets + total_replies
-                },
-                'activity': {
-                    'last_24h_tweets': len(recent_24h),
-                    'last_7d_tweets': len(recent_7d),
-                    'trending_users': trending_users_list
-                },
-                'quality': {
-                    'high_quality': high_quality,
-                    'medium_quality': medium_quality,
-                    'low_quality': low_quality,
-                    'quality_score': round(quality_score, 1)
-                }
-            }
+            'sections': sections,
+            'cursor': str(cursor),
+            'data': {section: builders[section]() for section in sections}
         })
         
     except Exception as e:
@@ -812,6 +720,36 @@ def get_dashboard_stats():
             'error': str(e)
         }), 500
 
+def parse_time_param(value):
+    """Epoch seconds from an ISO date/datetime or epoch string; None if absent"""
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid time value: {value}")
+    return int(parsed.timestamp())
+
+def iso_created_at(value):
+    """Tweet creation time as ISO 8601 UTC; unparseable values are passed through"""
+    from storage.sqlite_storage import created_timestamp
+    ts = created_timestamp(value)
+    return datetime.utcfromtimestamp(ts).isoformat() + '+00:00' if ts is not None else value
+
+def config_version():
+    """Validator component for responses built from config.yaml"""
+    from config import PROJECTS
+    return hashlib.sha1(json.dumps(PROJECTS, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+def run_summary_version():
+    """Validator component that changes whenever a pipeline run summary is written"""
+    try:
+        return str(os.stat(LATEST_RUN_SUMMARY).st_mtime_ns)
+    except OSError:
+        return '0'
+
 def get_score_interpretation(score):
     """Get interpretation of a score"""
     if score >= 1.5:
@@ -823,6 +761,44 @@ def get_score_interpretation(score):
     else:
         return "❌ Poor/Spam"
 
+_startup_lock = threading.Lock()
+_started = False
+
+def warm_caches():
+    """Import the analytics stack and fill the response cache for the dashboard's first requests"""
+    start = time.perf_counter()
+    try:
+        import analytics  # noqa: F401 - pandas is the bulk of the import cost
+        import analytics_snapshot
+        snapshot = analytics_snapshot.open_snapshot()
+        if snapshot is not None:
+            logger.info(f"Mapped analytics snapshot (change_seq {snapshot.version}, {snapshot.rows} tweets)")
+        client = app.test_client()
+        for path in WARM_PATHS:
+            client.get(path)
+        logger.info(f"Caches warmed in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logger.warning(f"Cache warm-up failed: {e}")
+
+def create_app(warm=True):
+    """One-time startup: check the schema once, then warm caches in a background thread.
+
+    Safe to call repeatedly; only the first call does any work. Requests are served
+    while warming runs, so a cold process answers /health right away.
+    """
+    global _started
+    with _startup_lock:
+        if _started:
+            return app
+        _started = True
+        if os.path.exists('tweets.db'):
+            # Schema migrations run once per process here, not on a request
+            from storage.sqlite_storage import SQLiteStorage
+            SQLiteStorage(db_path="tweets.db").close()
+        if warm:
+            threading.Thread(target=warm_caches, name="warm-caches", daemon=True).start()
+    return app
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(debug=False, host='0.0.0.0', port=port) 
\ No newline at end of file
+    create_app().run(debug=False, host='0.0.0.0', port=port)
\ No newline at end of file
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Historical backfill: walk search cursors deep into history, page by page.
+
+The regular pipeline only looks a few pages and days back. This walks the
+Latest timeline of every keyword until tweets are older than --days (or the
+results run out), and streams each page straight through the fetcher filters,
+batch dedup and one bulk insert, so only a single page is ever held in memory.
+
+Requests go through the shared RapidAPI rate limiter. The cursor is
+checkpointed after every page (backfill_cursors), so an interrupted or
+budget-limited backfill continues where it stopped when run again.
+
+Nothing is sent to the Nation Agent here: tweets the local pre-scorer rates
+below its confidence threshold are stored as 'prescored', the rest as
+'unscored', and the pipeline's re-scoring queue scores them in batches.
+
+Usage: python backfill.py [--project NAME] [--keyword K ...] [--days 180]
+                          [--max-pages 5000] [--category Latest] [--restart]
+"""
+
+import argparse
+import logging
+import time
+from typing import List, Optional
+
+from analytics_snapshot import refresh_snapshot
+from config import BACKFILL_DAYS, BACKFILL_MAX_PAGES, PRESCORE_ENABLED, PROJECTS
+from dedup import earliest_unique_tweets
+from fetchers.new_twitter_fetcher import NewTwitterFetcher, SearchError
+from metrics import DEDUP_HITS
+from nation_agent import LocalPreScorer
+from storage.checkpoint_store import CheckpointStore
+from storage.sqlite_storage import PRESCORED, SQLiteStorage, created_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+def new_backfill_stats() -> dict:
+    return {'pages': 0, 'tweets_found': 0, 'tweets_stored': 0, 'tweets_prescored': 0, 'errors': 0}
+
+
+def backfill_keyword(fetcher: NewTwitterFetcher, db_storage: SQLiteStorage, checkpoints: CheckpointStore,
+                     project: str, keyword: str, category: str, cutoff_ts: float, max_pages: int,
+                     prescorer: Optional[LocalPreScorer], stats: dict) -> None:
+    state = checkpoints.load_backfill(project, keyword, category) or {
+        'cursor': None, 'pages': 0, 'stored': 0, 'oldest_ts': None, 'done': False,
+    }
+    if state['done']:
+        print(f"[{project}] {keyword} ({category}): already backfilled, skipping")
+        return
+    if state['pages'] >= max_pages:
+        print(f"[{project}] {keyword} ({category}): page budget of {max_pages} already used")
+        return
+    if state['pages']:
+        print(f"[{project}] {keyword} ({category}): resuming after page {state['pages']}")
+
+    cursor, pages, stored, oldest_ts = state['cursor'], state['pages'], state['stored'], state['oldest_ts']
+    done = False
+    try:
+        for tweets, next_cursor in fetcher.iter_pages(keyword, category, cursor, max_pages - pages):
+            pages += 1
+            stats['pages'] += 1
+            stats['tweets_found'] += len(tweets)
+            page_ts = [ts for ts in (created_timestamp(t.created_at) for t in tweets) if ts is not None]
+            page_oldest = min(page_ts) if page_ts else None
+            if page_oldest is not None:
+                oldest_ts = page_oldest if oldest_ts is None else min(oldest_ts, page_oldest)
+
+            # Same filters as the pipeline, applied to this page only
+            fetcher._filter_tweets_by_date(tweets)
+            fetcher._filter_quality_content(tweets, keyword)
+            found = len(tweets)
+            tweets = earliest_unique_tweets(tweets)
+            DEDUP_HITS.inc(found - len(tweets), layer="batch_text")
+            for tweet in tweets:
+                tweet['project'] = project
+                tweet['keyword'] = keyword
+                if prescorer is not None and prescorer.should_skip(prescorer.score(tweet)):
+                    tweet['score_status'] = PRESCORED
+                    stats['tweets_prescored'] += 1
+            new = db_storage.append_rows(tweets)
+            stored += new
+            stats['tweets_stored'] += new
+
+            done = not next_cursor or (page_oldest is not None and page_oldest < cutoff_ts)
+            cursor = next_cursor or cursor
+            checkpoints.save_backfill(project, keyword, category, cursor, pages, stored, oldest_ts, done)
+            reached = time.strftime('%Y-%m-%d', time.gmtime(oldest_ts)) if oldest_ts else '?'
+            print(f"[{project}] {keyword} ({category}): page {pages}, +{new} stored ({stored} total), reached {reached}")
+            if done:
+                break
+        else:
+            # Results ran out before the page budget did: nothing older to fetch
+            if pages < max_pages:
+                done = True
+                checkpoints.save_backfill(project, keyword, category, cursor, pages, stored, oldest_ts, done)
+    except SearchError as e:
+        stats['errors'] += 1
+        logger.error(f"[{project}] Backfill of '{keyword}' ({category}) stopped at page {pages}: {e}")
+        return
+
+    status = "complete" if done else f"paused after {pages} pages (budget)"
+    print(f"[{project}] {keyword} ({category}): {status}, {stored} stored")
+
+
+def backfill_project(project: dict, db_storage: SQLiteStorage, checkpoints: CheckpointStore,
+                     days: int, max_pages: int, categories: List[str], keywords: Optional[List[str]] = None,
+                     restart: bool = False, stats: Optional[dict] = None) -> dict:
+    stats = stats if stats is not None else new_backfill_stats()
+    name = project['name']
+    fetcher = NewTwitterFetcher(days_lookback=days, max_pages=max_pages, tickers=project['tickers'])
+    author_stats = db_storage.get_author_stats() if PRESCORE_ENABLED else None
+    prescorer = LocalPreScorer(project['keywords'], author_stats) if PRESCORE_ENABLED else None
+    cutoff_ts = time.time() - days * 86400
+    for keyword in keywords or project['keywords']:
+        if restart:
+            checkpoints.reset_backfill(name, keyword)
+        for category in categories:
+            backfill_keyword(fetcher, db_storage, checkpoints, name, keyword, category,
+                             cutoff_ts, max_pages, prescorer, stats)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Backfill historical tweets page by page")
+    parser.add_argument('--project', help="only this project (default: all)")
+    parser.add_argument('--keyword', action='append', help="only these keywords (repeatable)")
+    parser.add_argument('--days', type=int, default=BACKFILL_DAYS, help="how far back to go")
+    parser.add_argument('--max-pages', type=int, default=BACKFILL_MAX_PAGES, help="page budget per keyword and category")
+    parser.add_argument('--category', action='append', choices=["Latest", "Top"],
+                        help="search categories to walk (default: Latest)")
+    parser.add_argument('--restart', action='store_true', help="discard saved cursors and start from the newest page")
+    args = parser.parse_args(argv)
+
+    projects = [p for p in PROJECTS if not args.project or p['name'] == args.project]
+    if not projects:
+        parser.error(f"unknown project: {args.project}")
+
+    db_storage = SQLiteStorage(db_path="tweets.db")
+    checkpoints = CheckpointStore(db_path="tweets.db")
+    stats = new_backfill_stats()
+    try:
+        for project in projects:
+            backfill_project(project, db_storage, checkpoints, args.days, args.max_pages,
+                             args.category or ["Latest"], args.keyword, args.restart, stats)
+    finally:
+        checkpoints.close()
+        db_storage.close()
+    refresh_snapshot(db_path="tweets.db")
+
+    print(f"\nBackfill: {stats['pages']} pages, {stats['tweets_found']} tweets fetched, "
+          f"{stats['tweets_stored']} stored ({stats['tweets_prescored']} prescored, rest queued for scoring), "
+          f"{stats['errors']} keyword(s) stopped on errors")
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
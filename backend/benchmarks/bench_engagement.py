@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: engagement aggregation, per-row Python vs columnar/vectorized.
+
+Builds a synthetic tweets database of each size, then times
+- legacy:     get_all_tweets() dicts, generator sums, list-comprehension view
+              filtering, string date parsing and a per-row apply (the code the
+              engagement/dashboard endpoints used before)
+- vectorized: get_tweet_columns() typed arrays + analytics.TweetFrame
+
+Usage (from backend/): python -m benchmarks.bench_engagement [--sizes 100000 1000000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from analytics import TweetFrame, dashboard_stats_section, engagement_section
+from storage.sqlite_storage import SQLiteStorage, created_timestamp
+
+
+def build_database(path: str, size: int, seed: int = 42) -> None:
+    rng = random.Random(seed)
+    storage = SQLiteStorage(db_path=path)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(size):
+        created_at = (now - timedelta(minutes=rng.randint(0, 30 * 24 * 60))).strftime('%a %b %d %H:%M:%S +0000 %Y')
+        engagement = {
+            'likes': rng.randint(0, 500), 'retweets': rng.randint(0, 80), 'replies': rng.randint(0, 40),
+            'views': int(rng.paretovariate(1.2) * 100), 'bookmarks': rng.randint(0, 20), 'quote_tweets': rng.randint(0, 10),
+        }
+        rows.append((
+            str(i), f"user{rng.randint(0, size // 20)}", f"Synthetic tweet {i} about Crestal", round(rng.random() * 2, 3),
+            f"https://x.com/u/status/{i}", created_at, json.dumps(engagement), created_timestamp(created_at),
+        ))
+        if len(rows) == 50000:
+            storage.conn.executemany(
+                "INSERT INTO tweets (id, username, text, score, url, created_at, engagement, created_ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows)
+            rows = []
+    if rows:
+        storage.conn.executemany(
+            "INSERT INTO tweets (id, username, text, score, url, created_at, engagement, created_ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows)
+    storage.conn.commit()
+    storage.close()
+
+
+def legacy_engagement(storage: SQLiteStorage) -> dict:
+    tweets = storage.get_all_tweets()
+    df = pd.DataFrame(tweets)
+    df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
+    df['created_at'] = df['created_at'].dt.tz_localize(None).fillna(pd.Timestamp.now())
+    total_likes = sum(tweet.get('engagement', {}).get('likes', 0) for tweet in tweets)
+    total_retweets = sum(tweet.get('engagement', {}).get('retweets', 0) for tweet in tweets)
+    total_replies = sum(tweet.get('engagement', {}).get('replies', 0) for tweet in tweets)
+    views_data = [tweet.get('engagement', {}).get('views', 0) for tweet in tweets]
+    filtered_views = [v for v in views_data if v <= 10000]
+    avg_views = sum(filtered_views) / len(filtered_views) if filtered_views else 0
+    now = datetime.now()
+    recent_24h = df[df['created_at'] >= now - timedelta(hours=24)]
+    recent_7d = df[df['created_at'] >= now - timedelta(days=7)]
+    trending = recent_7d.groupby('username').size().sort_values(ascending=False).head(5)
+    df['score'] = pd.to_numeric(df['score'], errors='coerce').fillna(0)
+    recent_engagement = recent_24h['engagement'].apply(
+        lambda x: x.get('likes', 0) + x.get('retweets', 0) + x.get('replies', 0) if isinstance(x, dict) else 0
+    ).sum()
+    return {
+        'total_engagement': total_likes + total_retweets + total_replies,
+        'avg_views': round(avg_views, 1),
+        'last_24h_engagement': int(recent_engagement),
+        'last_7d_tweets': len(recent_7d),
+        'trending': list(trending.index),
+        'avg_score': round(df['score'].mean(), 3),
+    }
+
+
+def vectorized_engagement(storage: SQLiteStorage) -> dict:
+    frame = TweetFrame(storage.get_tweet_columns())
+    data = engagement_section(frame, None)
+    dashboard_stats_section(frame, None)
+    return {
+        'total_engagement': data['total_engagement'],
+        'avg_views': data['avg_views'],
+        'last_24h_engagement': data['recent_activity']['last_24h_engagement'],
+        'last_7d_tweets': data['recent_activity']['last_7d_tweets'],
+        'trending': [u['username'] for u in data['recent_activity']['trending_users']],
+        'avg_score': data['real_time_stats']['avg_score'],
+    }
+
+
+def best_of(fn, repeat: int) -> tuple:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'tweets':>10} {'legacy s':>10} {'vectorized s':>13} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"bench_{size}.db")
+            build_database(path, size)
+            storage = SQLiteStorage(db_path=path)
+            legacy_s, legacy = best_of(lambda: legacy_engagement(storage), args.repeat)
+            vector_s, vector = best_of(lambda: vectorized_engagement(storage), args.repeat)
+            storage.close()
+            # Both paths must agree (trending ties may order differently)
+            mismatched = [k for k in legacy if k != 'trending' and legacy[k] != vector[k]]
+            if mismatched:
+                print(f"  results differ for {mismatched}: {legacy} vs {vector}")
+            print(f"{size:>10} {legacy_s:>10.3f} {vector_s:>13.3f} {legacy_s / vector_s:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory held per fetched tweet, nested dicts vs TweetRecord.
+
+Generates synthetic search API tweet results (benchmarks.synthetic), then measures with tracemalloc what
+stays allocated after parsing them
+- dicts:   the previous representation (dict + engagement dict + interaction
+           dicts + author dict per tweet)
+- records: NewTwitterFetcher._parse_tweet_result -> TweetRecord
+
+Tweet text and ids are built before measuring and shared by both paths, so the
+numbers are the per-tweet container overhead the representation adds.
+
+Usage (from backend/): python -m benchmarks.bench_tweet_memory [--sizes 10000 100000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import SyntheticCorpus
+from fetchers.new_twitter_fetcher import NewTwitterFetcher
+
+
+def as_dicts(fetcher: NewTwitterFetcher, results: list) -> list:
+    """The pre-TweetRecord shape, built from the same parse"""
+    tweets = []
+    for result in results:
+        legacy = result['legacy']
+        user = result['core']['user_results']['result']
+        username = user['legacy']['screen_name']
+        tweets.append({
+            "id": legacy['id_str'],
+            "text": legacy['full_text'],
+            "username": username,
+            "created_at": legacy['created_at'],
+            "engagement": {
+                "likes": int(legacy['favorite_count']),
+                "retweets": int(legacy['retweet_count']),
+                "replies": int(legacy['reply_count']),
+                "quote_tweets": int(legacy['quote_count']),
+                "bookmarks": int(legacy['bookmark_count']),
+                "views": int(result['views']['count']),
+            },
+            "interactions": fetcher._parse_interactions(result, username),
+            "author": fetcher._parse_author(user),
+        })
+    return tweets
+
+
+def as_records(fetcher: NewTwitterFetcher, results: list) -> list:
+    return [fetcher._parse_tweet_result(result) for result in results]
+
+
+def retained_bytes(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'tweets':>10} {'dicts B/tweet':>14} {'records B/tweet':>16} {'ratio':>6}")
+    for size in args.sizes:
+        results = SyntheticCorpus(seed=size).tweet_results(size)
+        fetcher = NewTwitterFetcher()
+        dict_bytes = retained_bytes(lambda: as_dicts(fetcher, results))
+        record_bytes = retained_bytes(lambda: as_records(fetcher, results))
+        print(f"{size:>10} {dict_bytes / size:>14.0f} {record_bytes / size:>16.0f} {dict_bytes / record_bytes:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
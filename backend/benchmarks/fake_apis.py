@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the twitter293 search API and the Crestal Nation Agent.
+
+One Flask app serves both, with the same paths and response shapes the real
+services use:
+- GET  /search/<keyword>?category=&count=&cursor=   search pages with Bottom cursors
+- POST /v1/chats                                    {"id": ...}
+- POST /v1/chats/<id>/messages                      [{"message": "Score: ..."}]
+- GET  /_stats                                      request counts by route and status
+
+Responses come from one of three sources:
+- synthetic (default): benchmarks.synthetic corpora, one per (keyword, category),
+  seeded so the same cursor always returns the same page; agent scores are a
+  deterministic function of the message text
+- --replay DIR: responses recorded earlier; unrecorded requests get a 404
+- --record DIR: requests are proxied to the real APIs and every response is saved
+  under DIR for later replay
+
+Faults are injected from a seeded random stream: fixed latency plus jitter, a
+server-side token bucket on search that answers 429 when exceeded, and random
+429/500 shares on both APIs. Point the clients at it with
+
+  RAPIDAPI_BASE_URL=http://127.0.0.1:8089 NATION_AGENT_BASE_URL=http://127.0.0.1:8089/v1 python run_pipeline.py
+
+or start it in-process with start_background(create_app(...)).
+
+Usage (from backend/): python -m benchmarks.fake_apis [--port 8089] [--seed 1]
+    [--latency-ms 200 --jitter-ms 100] [--agent-latency-ms 1500] [--rate-limit 2 --burst 4]
+    [--throttle-rate 0.01] [--error-rate 0.01] [--replay DIR | --record DIR]
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from flask import Flask, Response, jsonify, request
+
+from benchmarks.synthetic import SyntheticCorpus, search_response, synthetic_score
+from rate_limiter import TokenBucket
+
+UPSTREAM_SEARCH = "https://twitter293.p.rapidapi.com"
+UPSTREAM_AGENT = "https://open.service.crestal.network/v1"
+CURSOR_PREFIX = "fake-"
+# Pages kept per search stream; older cursors are regenerated from the seed
+PAGE_CACHE_SIZE = 64
+# Request headers passed through to the real APIs in record mode
+FORWARDED_HEADERS = ("X-RapidAPI-Key", "X-RapidAPI-Host", "Authorization", "Content-Type")
+
+
+class Faults:
+    """Latency and error injection from one seeded random stream"""
+
+    def __init__(self, seed: int, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, limiter: Optional[TokenBucket] = None) -> None:
+        self.rng = random.Random(seed)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.limiter = limiter
+        self._lock = threading.Lock()
+
+    def inject(self) -> Optional[int]:
+        """Sleep for the injected latency; returns an HTTP status to fail with, or None"""
+        with self._lock:
+            roll = self.rng.random()
+            jitter = self.rng.uniform(-1.0, 1.0) * self.jitter_ms
+        delay = max(0.0, self.latency_ms + jitter) / 1000
+        if delay:
+            time.sleep(delay)
+        if self.limiter is not None and not self.limiter.try_acquire():
+            return 429
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+
+class SyntheticSearch:
+    """Deterministic search pages: one synthetic corpus per (keyword, category)"""
+
+    def __init__(self, seed: int, tweets_per_query: int, tweets_per_day: float) -> None:
+        self.seed = seed
+        self.tweets_per_query = tweets_per_query
+        self.tweets_per_day = tweets_per_day
+        # Fixed so a regenerated stream reproduces the same timestamps
+        self.start = datetime.now(timezone.utc)
+        self._streams: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _new_stream(self, keyword: str, category: str, page_size: int) -> Dict[str, Any]:
+        seed = zlib.crc32(f"{self.seed}:{keyword}:{category}".encode("utf-8"))
+        corpus = SyntheticCorpus(seed=seed, start=self.start, tweets_per_day=self.tweets_per_day)
+        return {'corpus': corpus, 'page_size': page_size, 'generated': 0, 'pages': OrderedDict()}
+
+    def _generate(self, stream: Dict[str, Any], keyword: str) -> bytes:
+        index = stream['generated']
+        remaining = self.tweets_per_query - index * stream['page_size']
+        size = min(stream['page_size'], remaining)
+        more = remaining > size
+        results = stream['corpus'].tweet_results(size, keyword)
+        stream['generated'] += 1
+        return json.dumps(search_response(results, f"{CURSOR_PREFIX}{index + 1}" if more else None)).encode("utf-8")
+
+    def page(self, keyword: str, category: str, cursor: Optional[str], count: int) -> Optional[bytes]:
+        """JSON body of the page the cursor points at, or None past the end or for unknown cursors"""
+        if cursor and not cursor.startswith(CURSOR_PREFIX):
+            return None
+        try:
+            index = int(cursor[len(CURSOR_PREFIX):]) if cursor else 0
+        except ValueError:
+            return None
+        keyword = keyword.strip().strip('"')
+        key = (keyword, category)
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = self._streams[key] = self._new_stream(keyword, category, max(1, count))
+            if index * stream['page_size'] >= self.tweets_per_query:
+                return None
+            pages = stream['pages']
+            if index in pages:
+                pages.move_to_end(index)
+                return pages[index]
+            if index < stream['generated']:
+                # Evicted: replay the corpus from its seed up to this page
+                stream = self._streams[key] = self._new_stream(keyword, category, stream['page_size'])
+                pages = stream['pages']
+            while stream['generated'] <= index:
+                body = self._generate(stream, keyword)
+                pages[stream['generated'] - 1] = body
+                if len(pages) > PAGE_CACHE_SIZE:
+                    pages.popitem(last=False)
+            return pages[index]
+
+
+class Recordings:
+    """Recorded responses, one JSON file per request under <directory>/<api>/"""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, api: str, key: str) -> str:
+        return os.path.join(self.directory, api, f"{key}.json")
+
+    def load(self, api: str, key: str) -> Optional[Tuple[int, Any]]:
+        try:
+            with open(self._path(api, key), 'r', encoding='utf-8') as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return recorded['status'], recorded['body']
+
+    def save(self, api: str, key: str, request_info: Dict[str, Any], status: int, body: Any) -> None:
+        path = self._path(api, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'request': request_info, 'status': status, 'body': body}, f)
+        os.replace(path + '.tmp', path)
+
+
+def _forwarded_headers() -> Dict[str, str]:
+    return {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+
+
+def _proxy(method: str, url: str, **kwargs) -> Tuple[int, Any]:
+    response = requests.request(method, url, headers=_forwarded_headers(), timeout=60, **kwargs)
+    try:
+        body = response.json()
+    except ValueError:
+        body = {'error': response.text[:500]}
+    return response.status_code, body
+
+
+def create_app(seed: int = 1, tweets_per_query: int = 1000, tweets_per_day: float = 400.0,
+               latency_ms: float = 0.0, jitter_ms: float = 0.0,
+               agent_latency_ms: float = 0.0, agent_jitter_ms: float = 0.0,
+               rate_limit: Optional[float] = None, burst: int = 4,
+               throttle_rate: float = 0.0, error_rate: float = 0.0,
+               replay: Optional[str] = None, record: Optional[str] = None,
+               upstream_search: str = UPSTREAM_SEARCH, upstream_agent: str = UPSTREAM_AGENT) -> Flask:
+    if replay and record:
+        raise ValueError("replay and record are mutually exclusive")
+    app = Flask(__name__)
+    limiter = TokenBucket("fake_search", rate_limit, burst) if rate_limit else None
+    search_faults = Faults(seed, latency_ms, jitter_ms, error_rate, throttle_rate, limiter)
+    agent_faults = Faults(seed + 1, agent_latency_ms, agent_jitter_ms, error_rate, throttle_rate)
+    synthetic = SyntheticSearch(seed, tweets_per_query, tweets_per_day)
+    recordings = Recordings(replay or record) if (replay or record) else None
+    chat_ids = itertools.count(1)
+    stats: Counter = Counter()
+    stats_lock = threading.Lock()
+
+    def reply(route: str, status: int, body: Any) -> Response:
+        with stats_lock:
+            stats[f"{route} {status}"] += 1
+        if isinstance(body, bytes):
+            return Response(body, status=status, mimetype='application/json')
+        return jsonify(body), status
+
+    @app.get('/search/<path:keyword>')
+    def search(keyword):
+        failure = search_faults.inject()
+        if failure:
+            return reply('search', failure, {'message': 'Too many requests' if failure == 429 else 'Internal error'})
+        category = request.args.get('category', 'Latest')
+        cursor = request.args.get('cursor')
+        count = request.args.get('count', '50')
+        if recordings is None:
+            body = synthetic.page(keyword, category, cursor, int(count) if count.isdigit() else 50)
+            if body is None:
+                return reply('search', 404, {'message': 'No more results'})
+            return reply('search', 200, body)
+
+        key = Recordings.key(keyword, category, cursor)
+        if record:
+            params = {'count': count, 'category': category, **({'cursor': cursor} if cursor else {})}
+            status, body = _proxy('GET', f"{upstream_search}/search/{keyword}", params=params)
+            if status != 429:
+                recordings.save('search', key, {'keyword': keyword, 'category': category, 'cursor': cursor},
+                                status, body)
+            return reply('search', status, body)
+        recorded = recordings.load('search', key)
+        if recorded is None:
+            return reply('search', 404, {'message': 'Not recorded'})
+        return reply('search', *recorded)
+
+    @app.post('/v1/chats')
+    def create_chat():
+        failure = agent_faults.inject()
+        if failure:
+            return reply('chats', failure, {'error': 'injected failure'})
+        if record:
+            return reply('chats', *_proxy('POST', f"{upstream_agent}/chats"))
+        return reply('chats', 200, {'id': f"fake-chat-{next(chat_ids)}"})
+
+    @app.post('/v1/chats/<chat_id>/messages')
+    def send_message(chat_id):
+        failure = agent_faults.inject()
+        if failure:
+            return reply('messages', failure, {'error': 'injected failure'})
+        message = (request.get_json(silent=True) or {}).get('message', '')
+        if recordings is None:
+            score = synthetic_score(random.Random(zlib.crc32(message.encode('utf-8'))))
+            return reply('messages', 200, [{'author_type': 'agent', 'message': f"Score: {score}"}])
+
+        key = Recordings.key(message)
+        if record:
+            status, body = _proxy('POST', f"{upstream_agent}/chats/{chat_id}/messages", json={'message': message})
+            if status < 500 and status != 429:
+                recordings.save('messages', key, {'message': message}, status, body)
+            return reply('messages', status, body)
+        recorded = recordings.load('messages', key)
+        if recorded is None:
+            return reply('messages', 404, {'error': 'Not recorded'})
+        return reply('messages', *recorded)
+
+    @app.get('/_stats')
+    def request_stats():
+        with stats_lock:
+            return jsonify(dict(stats))
+
+    return app
+
+
+def start_background(app: Flask, host: str = '127.0.0.1', port: int = 0, quiet: bool = True) -> Tuple[Any, str]:
+    """Serve the app from a daemon thread; returns (server, base_url). Stop with server.shutdown()"""
+    from werkzeug.serving import make_server
+
+    if quiet:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--seed', type=int, default=1, help="seed for synthetic data and injected faults")
+    parser.add_argument('--tweets-per-query', type=int, default=1000,
+                        help="synthetic results per keyword and category before the cursors run out")
+    parser.add_argument('--tweets-per-day', type=float, default=400.0,
+                        help="synthetic posting rate (sets how far back the cursors reach)")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="added to every search request")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="uniform +/- jitter on search latency")
+    parser.add_argument('--agent-latency-ms', type=float, default=0.0, help="added to every agent request")
+    parser.add_argument('--agent-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, help="search requests per second before answering 429")
+    parser.add_argument('--burst', type=int, default=4)
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered 500")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--replay', metavar='DIR', help="serve responses recorded in DIR")
+    source.add_argument('--record', metavar='DIR', help="proxy to the real APIs and record responses in DIR")
+    parser.add_argument('--upstream-search', default=UPSTREAM_SEARCH)
+    parser.add_argument('--upstream-agent', default=UPSTREAM_AGENT)
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    app = create_app(
+        seed=args.seed, tweets_per_query=args.tweets_per_query, tweets_per_day=args.tweets_per_day,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        agent_latency_ms=args.agent_latency_ms, agent_jitter_ms=args.agent_jitter_ms,
+        rate_limit=args.rate_limit, burst=args.burst, throttle_rate=args.throttle_rate, error_rate=args.error_rate,
+        replay=args.replay, record=args.record,
+        upstream_search=args.upstream_search, upstream_agent=args.upstream_agent,
+    )
+    base = f"http://{args.host}:{args.port}"
+    mode = f"replaying {args.replay}" if args.replay else f"recording to {args.record}" if args.record else "synthetic"
+    print(f"Fake APIs ({mode}) on {base}")
+    print(f"  RAPIDAPI_BASE_URL={base} NATION_AGENT_BASE_URL={base}/v1")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
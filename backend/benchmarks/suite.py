@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: pipeline stages and every /api/* endpoint on synthetic data.
+
+For each size, a synthetic corpus (benchmarks.synthetic) is generated as
+RapidAPI search responses and pushed through the real code:
+- parse:           NewTwitterFetcher._extract_tweets_from_response
+- normalize_hash:  dedup.compute_text_hash
+- dedup:           dedup.earliest_unique_tweets
+- filter:          the fetcher's lookback and quality filters
+- bulk_insert:     SQLiteStorage.append_rows, one 50-tweet page per transaction
+- append_row:      SQLiteStorage.append_row (per-tweet commits, first 2000 tweets)
+- get_all_tweets / get_tweet_columns on the resulting database
+- every GET /api/* route through the Flask test client, "cold" (response
+  cache cleared before each call) and "warm" (served from the cache)
+- startup in a fresh interpreter: `import app` time, time to the first /health
+  and dashboard bundle responses, and a -X importtime profile of the modules
+  app.py pulls in at import
+
+Results are written to benchmarks/results/<timestamp>.json with the git
+revision and machine details, and compared against the previous results file
+for the same sizes so regressions show up in the printed report.
+
+Usage (from backend/): python -m benchmarks.suite [--sizes 10000 100000] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import SyntheticCorpus, assign_score
+from dedup import compute_text_hash, earliest_unique_tweets
+from fetchers.new_twitter_fetcher import NewTwitterFetcher
+from storage.sqlite_storage import SQLiteStorage
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+PAGE_SIZE = 50
+APPEND_ROW_LIMIT = 2000
+# Slower than the previous run by more than this factor is reported as a regression
+REGRESSION_RATIO = 1.25
+
+# Query strings for routes that need them; path arguments are filled in per database
+ENDPOINT_PARAMS = {
+    '/api/search': {'q': 'Crestal agent'},
+    '/api/changes': {'since': '0'},
+}
+# Modules listed in the import-time profile
+IMPORT_PROFILE_TOP = 12
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get('/health')
+health = time.perf_counter()
+client.get('/api/dashboard/bundle')
+bundle = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'first_health_ms': (health - start) * 1000,
+                  'first_bundle_ms': (bundle - start) * 1000}))
+"""
+
+# Not benchmarked: long-lived stream, or they call external services
+SKIPPED_ROUTES = {
+    '/api/stream': 'server-sent event stream',
+    '/api/run-pipeline': 'starts the pipeline (POST)',
+    '/api/test-scorer': 'calls the Nation Agent (POST)',
+}
+
+
+def timed(fn, repeat: int = 1):
+    """(best seconds, result of the last call)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def stage(seconds: float, items: int) -> dict:
+    return {
+        'seconds': round(seconds, 6),
+        'items': items,
+        'per_item_us': round(seconds / items * 1e6, 3) if items else None,
+    }
+
+
+def bench_pipeline(size: int, repeat: int, workdir: str) -> tuple:
+    corpus = SyntheticCorpus(seed=size, tweets_per_day=max(400.0, size / 30))
+    generate_s, pages = timed(lambda: list(corpus.search_pages(size, PAGE_SIZE)))
+    fetcher = NewTwitterFetcher(days_lookback=3650)
+    results = {'generate': stage(generate_s, size)}
+
+    parse_s, tweets = timed(
+        lambda: [tweet for page in pages for tweet in fetcher._extract_tweets_from_response(page)], repeat)
+    results['parse'] = stage(parse_s, len(tweets))
+    del pages
+
+    texts = [tweet.text for tweet in tweets]
+    hash_s, _ = timed(lambda: [compute_text_hash(text) for text in texts], repeat)
+    results['normalize_hash'] = stage(hash_s, len(texts))
+
+    dedup_s, unique = timed(lambda: earliest_unique_tweets(tweets), repeat)
+    results['dedup'] = stage(dedup_s, len(tweets))
+    results['dedup']['kept'] = len(unique)
+
+    def run_filters():
+        kept = list(tweets)
+        fetcher._filter_tweets_by_date(kept)
+        fetcher._filter_quality_content(kept, 'Crestal')
+        return kept
+    filter_s, _ = timed(run_filters, repeat)
+    results['filter'] = stage(filter_s, len(tweets))
+
+    rng = random.Random(size)
+    for tweet in tweets:
+        tweet['project'] = 'crestal'
+        tweet['keyword'] = 'Crestal'
+        assign_score(tweet, rng)
+
+    db_path = os.path.join(workdir, 'tweets.db')
+    storage = SQLiteStorage(db_path=db_path)
+
+    def bulk_insert():
+        stored = 0
+        for start in range(0, len(tweets), PAGE_SIZE):
+            stored += storage.append_rows(tweets[start:start + PAGE_SIZE])
+        return stored
+    insert_s, stored = timed(bulk_insert)
+    results['bulk_insert'] = stage(insert_s, len(tweets))
+    results['bulk_insert']['stored'] = stored
+
+    row_path = os.path.join(workdir, 'append_row.db')
+    row_storage = SQLiteStorage(db_path=row_path)
+    sample = tweets[:APPEND_ROW_LIMIT]
+    row_s, _ = timed(lambda: [row_storage.append_row(tweet) for tweet in sample])
+    results['append_row'] = stage(row_s, len(sample))
+    row_storage.close()
+    del tweets, unique, texts
+
+    all_s, rows = timed(lambda: storage.get_all_tweets(), repeat)
+    results['get_all_tweets'] = stage(all_s, len(rows))
+    del rows
+    columns_s, columns = timed(lambda: storage.get_tweet_columns(), repeat)
+    results['get_tweet_columns'] = stage(columns_s, len(columns['id']) if 'id' in columns else stored)
+    del columns
+
+    # Profile the most prolific author (the heaviest /api/user-profile case)
+    authors = storage.get_author_stats()
+    username = max(authors, key=lambda name: authors[name][0]) if authors else 'unknown'
+    storage.close()
+    return results, stored, username
+
+
+def bench_endpoints(workdir: str, username: str, repeat: int) -> dict:
+    # Endpoints open tweets.db relative to the working directory
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from app import app
+        from http_cache import RESPONSE_CACHE_STORE
+
+        client = app.test_client()
+        results = {}
+        for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+            if not rule.rule.startswith('/api/'):
+                continue
+            if rule.rule in SKIPPED_ROUTES:
+                results[rule.rule] = {'skipped': SKIPPED_ROUTES[rule.rule]}
+                continue
+            if 'GET' not in rule.methods:
+                results[rule.rule] = {'skipped': 'not a GET route'}
+                continue
+            path = rule.rule.replace('<username>', username)
+            if '<' in path:
+                results[rule.rule] = {'skipped': 'no value for path argument'}
+                continue
+            params = ENDPOINT_PARAMS.get(rule.rule, {})
+
+            def call():
+                # Handlers print progress and pandas may warn; keep the report readable
+                with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    response = client.get(path, query_string=params)
+                return response.status_code, len(response.get_data())
+
+            cold = []
+            for _ in range(repeat):
+                RESPONSE_CACHE_STORE.clear()
+                start = time.perf_counter()
+                status, size = call()
+                cold.append(time.perf_counter() - start)
+            warm = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                call()
+                warm.append(time.perf_counter() - start)
+            results[rule.rule] = {
+                'status': status,
+                'bytes': size,
+                'cold_ms': round(statistics.median(cold) * 1000, 3),
+                'warm_ms': round(statistics.median(warm) * 1000, 3),
+            }
+        return results
+    finally:
+        os.chdir(previous_cwd)
+
+
+def import_profile(workdir: str) -> list:
+    """(module, cumulative ms) for what `import app` imports directly, slowest first"""
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=workdir,
+                          env={**os.environ, 'PYTHONPATH': backend}, capture_output=True, text=True, timeout=120)
+    # Lines look like "import time:  self | cumulative |   name", indented two spaces per nesting level
+    modules, inside_app = [], []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        if depth == 0:
+            # Children are printed before their parent: everything collected so far belongs to it
+            if name.strip() == 'app':
+                modules = inside_app
+            inside_app = []
+        elif depth == 1:
+            inside_app.append((name.strip(), int(cumulative) / 1000))
+    return sorted(modules, key=lambda row: -row[1])[:IMPORT_PROFILE_TOP]
+
+
+def bench_startup(workdir: str, repeat: int) -> dict:
+    """Fresh interpreters started in workdir: import and time-to-first-request (median of repeat)"""
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=workdir,
+                              env={**os.environ, 'PYTHONPATH': backend}, capture_output=True, text=True, timeout=300)
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    result = {key: round(statistics.median(run[key] for run in runs), 3) for key in runs[0]}
+    result['import_profile'] = [[name, round(ms, 3)] for name, ms in import_profile(workdir)]
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def previous_results(results_dir: str, sizes: list) -> tuple:
+    """Most recent earlier results file that covers all of these sizes"""
+    for path in sorted(glob.glob(os.path.join(results_dir, '*.json')), reverse=True):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if all(str(size) in data.get('sizes', {}) for size in sizes):
+            return path, data
+    return None, None
+
+
+def compare(current: dict, previous: dict) -> list:
+    """(size, name, previous, current, ratio) for every timing present in both runs"""
+    rows = []
+    for size, result in current['sizes'].items():
+        before = previous['sizes'].get(size)
+        if not before:
+            continue
+        for name, now in result['stages'].items():
+            old = before.get('stages', {}).get(name)
+            if old and old.get('seconds') and now.get('seconds'):
+                rows.append((size, name, old['seconds'], now['seconds'], now['seconds'] / old['seconds']))
+        for route, now in result['endpoints'].items():
+            old = before.get('endpoints', {}).get(route)
+            if old and old.get('cold_ms') and now.get('cold_ms'):
+                rows.append((size, route, old['cold_ms'] / 1000, now['cold_ms'] / 1000, now['cold_ms'] / old['cold_ms']))
+        old_startup = before.get('startup', {})
+        for name, now in result.get('startup', {}).items():
+            old = old_startup.get(name)
+            if name.endswith('_ms') and old and now:
+                rows.append((size, f"startup:{name[:-3]}", old / 1000, now / 1000, now / old))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=RESULTS_DIR, help="directory for the JSON results")
+    parser.add_argument('--no-save', action='store_true', help="print the report without writing results")
+    args = parser.parse_args()
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': args.repeat,
+        'sizes': {},
+    }
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            print(f"\n== {size:,} tweets ==")
+            stages, stored, username = bench_pipeline(size, args.repeat, workdir)
+            for name, result in stages.items():
+                print(f"  {name:<18} {result['seconds']:>9.3f}s {result['per_item_us'] or 0:>10.2f} us/item")
+            endpoints = bench_endpoints(workdir, username, args.repeat)
+            for route, result in endpoints.items():
+                if 'skipped' in result:
+                    print(f"  {route:<36} skipped ({result['skipped']})")
+                else:
+                    print(f"  {route:<36} {result['status']} cold {result['cold_ms']:>9.2f} ms"
+                          f"  warm {result['warm_ms']:>8.2f} ms  {result['bytes']:>9,} B")
+            startup = bench_startup(workdir, args.repeat)
+            print(f"  startup: import app {startup['import_ms']:.1f} ms, first /health at "
+                  f"{startup['first_health_ms']:.1f} ms, first bundle at {startup['first_bundle_ms']:.1f} ms")
+            for name, ms in startup['import_profile']:
+                print(f"    {name:<34} {ms:>9.1f} ms")
+            report['sizes'][str(size)] = {'stored': stored, 'stages': stages, 'endpoints': endpoints,
+                                          'startup': startup}
+
+    previous_path, previous = previous_results(args.output, args.sizes)
+    if previous:
+        rows = compare(report, previous)
+        regressions = [row for row in rows if row[4] > REGRESSION_RATIO]
+        print(f"\nCompared with {os.path.basename(previous_path)} (rev {previous.get('git_revision')}): "
+              f"{len(regressions)} regression(s) over {REGRESSION_RATIO}x")
+        for size, name, old, new, ratio in sorted(regressions, key=lambda row: -row[4]):
+            print(f"  {size:>8} {name:<36} {old:.4f}s -> {new:.4f}s ({ratio:.2f}x)")
+        report['compared_with'] = os.path.basename(previous_path)
+
+    if not args.no_save:
+        os.makedirs(args.output, exist_ok=True)
+        path = os.path.join(args.output, datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ') + '.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Synthetic tweets and RapidAPI search responses for benchmarks and local testing.
+
+SyntheticCorpus produces tweets shaped like twitter293 /search results
+(tweet_results.result objects with legacy/core/views), newest first, with the
+properties that matter for the pipeline's hot paths:
+- skewed authors: popularity follows a Zipf law, so a few accounts post most
+  tweets and collect most engagement
+- duplicates: copy-pasted texts under new ids, and "RT @user: ..." reposts
+- replies, quotes and @mentions between authors (interaction edges)
+- a share of spam, too-short and off-keyword tweets for the quality filters
+- heavy-tailed engagement and a daily activity cycle
+
+Everything is deterministic for a given seed.
+"""
+
+import math
+import random
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+
+TWITTER_DATE = '%a %b %d %H:%M:%S +0000 %Y'
+
+KEYWORDS = ("Crestal", "Crestal Network", "Nation.fun", "$NATION")
+_TOPICS = (
+    "agent", "launch", "roadmap", "staking", "airdrop season", "mainnet", "governance vote",
+    "builders", "AI agents", "community call", "integration", "partnership", "testnet", "update",
+)
+_OPINIONS = (
+    "really impressed by", "bullish on", "not sure about", "just tried", "thread on",
+    "huge week for", "can't stop thinking about", "deep dive into", "first look at", "shipping",
+)
+_FILLER = (
+    "the team keeps delivering", "this could change how we build", "numbers look strong",
+    "docs are finally great", "UX needs work", "onchain activity is up", "what do you all think?",
+    "more soon", "early days", "worth a read", "great demo today", "feedback welcome",
+)
+_SPAM = ("follow me for free airdrop", "dm me to claim free tokens", "send me your wallet", "get free NATION now")
+
+
+class SyntheticCorpus:
+    def __init__(self, seed: int = 42, authors: int = 2000, zipf_s: float = 1.1,
+                 duplicate_rate: float = 0.08, repost_rate: float = 0.05, noise_rate: float = 0.06,
+                 start: Optional[datetime] = None, tweets_per_day: float = 400.0) -> None:
+        self.rng = random.Random(seed)
+        self.duplicate_rate = duplicate_rate
+        self.repost_rate = repost_rate
+        self.noise_rate = noise_rate
+        self.now = start or datetime.now(timezone.utc)
+        self.mean_gap = 86400.0 / tweets_per_day
+        self.authors = [self._make_author(i) for i in range(authors)]
+        self._author_weights = list(accumulate(1.0 / (rank + 1) ** zipf_s for rank in range(authors)))
+        self._recent: List[Tuple[str, str]] = []  # (text, screen_name) candidates for duplicates/reposts
+        self._next_id = 1_800_000_000_000_000_000
+        self._clock = self.now
+
+    def _make_author(self, index: int) -> Dict:
+        rng = self.rng
+        name = f"{rng.choice(('crypto', 'build', 'nation', 'defi', 'agent', 'web3', 'on', 'gm'))}_{index}"
+        # Popular (low index) accounts have more followers
+        followers = int(rng.paretovariate(1.1) * 200 * (1 + 50 / (index + 1)))
+        return {
+            'rest_id': str(10_000_000 + index),
+            'is_blue_verified': rng.random() < 0.15,
+            'legacy': {
+                'screen_name': name, 'name': name.replace('_', ' ').title(),
+                'followers_count': followers, 'friends_count': rng.randint(10, 3000),
+                'statuses_count': rng.randint(50, 80_000), 'verified': index < 5,
+                'created_at': (self.now - timedelta(days=rng.randint(30, 4000))).strftime(TWITTER_DATE),
+            },
+        }
+
+    def _author(self) -> Dict:
+        point = self.rng.random() * self._author_weights[-1]
+        return self.authors[min(bisect(self._author_weights, point), len(self.authors) - 1)]
+
+    def _advance_clock(self) -> datetime:
+        # Exponential gaps, stretched at night (UTC) for a daily cycle
+        hour = self._clock.hour
+        activity = 0.55 + 0.45 * math.sin((hour - 9) / 24 * 2 * math.pi)
+        self._clock -= timedelta(seconds=self.rng.expovariate(1.0 / (self.mean_gap / max(activity, 0.1))))
+        return self._clock
+
+    def _text(self, keyword: str, mentions: List[str]) -> str:
+        rng = self.rng
+        roll = rng.random()
+        if roll < self.noise_rate / 3:
+            return f"{rng.choice(_SPAM)} {keyword}"
+        if roll < 2 * self.noise_rate / 3:
+            return f"{keyword} gm"
+        if roll < self.noise_rate:
+            return f"{rng.choice(_OPINIONS)} the {rng.choice(_TOPICS)} {rng.choice(_FILLER)}"
+        parts = [rng.choice(_OPINIONS).capitalize(), keyword, rng.choice(_TOPICS) + ":", rng.choice(_FILLER)]
+        if rng.random() < 0.3:
+            parts.append(rng.choice(_FILLER))
+        parts.extend(f"@{name}" for name in mentions)
+        if rng.random() < 0.25:
+            parts.append(f"https://t.co/{rng.getrandbits(40):x}")
+        if rng.random() < 0.2:
+            parts.append(f"#{keyword.strip('$').replace(' ', '').replace('.', '')}")
+        return " ".join(parts)
+
+    def tweet_result(self, keyword: Optional[str] = None) -> Dict:
+        """One tweet_results.result object as returned by the search API"""
+        rng = self.rng
+        keyword = keyword or rng.choice(KEYWORDS)
+        author = self._author()
+        screen_name = author['legacy']['screen_name']
+        created = self._advance_clock()
+        self._next_id += rng.randint(1, 5000)
+        tweet_id = str(self._next_id)
+
+        mentions = [self._author()['legacy']['screen_name'] for _ in range(rng.choice((0, 0, 0, 1, 1, 2)))]
+        reply_to = self._author()['legacy']['screen_name'] if rng.random() < 0.2 else None
+        quoted = self._author() if rng.random() < 0.08 else None
+
+        roll = rng.random()
+        if self._recent and roll < self.duplicate_rate:
+            text = rng.choice(self._recent)[0]
+        elif self._recent and roll < self.duplicate_rate + self.repost_rate:
+            original, original_author = rng.choice(self._recent)
+            text = f"RT @{original_author}: {original}"
+        else:
+            text = self._text(keyword, mentions)
+            self._recent.append((text, screen_name))
+            if len(self._recent) > 500:
+                self._recent.pop(rng.randrange(len(self._recent)))
+
+        reach = 1 + author['legacy']['followers_count'] / 2000
+        views = int(rng.paretovariate(1.3) * 80 * reach)
+        likes = int(views * rng.betavariate(1.2, 40))
+        legacy = {
+            'id_str': tweet_id,
+            'full_text': text,
+            'created_at': created.strftime(TWITTER_DATE),
+            'favorite_count': likes,
+            'retweet_count': int(likes * rng.random() * 0.3),
+            'reply_count': int(likes * rng.random() * 0.15),
+            'quote_count': int(likes * rng.random() * 0.05),
+            'bookmark_count': int(likes * rng.random() * 0.1),
+            'in_reply_to_screen_name': reply_to,
+            'is_quote_status': quoted is not None,
+            'entities': {'user_mentions': [{'screen_name': name} for name in mentions]},
+        }
+        result = {
+            'rest_id': tweet_id,
+            'core': {'user_results': {'result': author}},
+            'views': {'count': str(views)},
+            'legacy': legacy,
+        }
+        if quoted is not None:
+            result['quoted_status_result'] = {'result': {'core': {'user_results': {'result': quoted}}}}
+        return result
+
+    def tweet_results(self, count: int, keyword: Optional[str] = None) -> List[Dict]:
+        return [self.tweet_result(keyword) for _ in range(count)]
+
+    def search_pages(self, count: int, page_size: int = 50, keyword: Optional[str] = None) -> Iterator[Dict]:
+        """`count` tweets as a sequence of search responses, each with a Bottom cursor to the next"""
+        page = 0
+        while count > 0:
+            size = min(page_size, count)
+            count -= size
+            yield search_response(self.tweet_results(size, keyword), f"cursor-{page + 1}" if count > 0 else None)
+            page += 1
+
+
+def search_response(results: List[Dict], cursor: Optional[str] = None) -> Dict:
+    """Wrap tweet results in the twitter293 /search response envelope"""
+    entries = [
+        {
+            'entryId': f"tweet-{result['rest_id']}",
+            'content': {
+                'entryType': 'TimelineTimelineItem',
+                'itemContent': {'itemType': 'TimelineTweet', 'tweet_results': {'result': result}},
+            },
+        }
+        for result in results
+    ]
+    instructions = [{'type': 'TimelineAddEntries', 'entries': entries}]
+    if cursor:
+        instructions.append({'type': 'TimelineAddCursor', 'content': {'cursorType': 'Bottom', 'value': cursor}})
+    return {'entries': instructions}
+
+
+def synthetic_score(rng: random.Random) -> float:
+    """A plausible agent score: most tweets score low, a few high"""
+    return round(min(1.0, rng.betavariate(1.5, 6) * 1.6), 3)
+
+
+def assign_score(tweet, rng: random.Random) -> None:
+    """Give a parsed tweet a synthetic agent score"""
+    tweet['score'] = synthetic_score(rng)
@@ -7,7 +7,7 @@ load_dotenv()
 # Load YAML config
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.yaml')
 with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+    config = yaml.safe_load(f) or {}
 
 # API Keys (set these in a .env file for security)
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', 'x')
@@ -18,16 +18,110 @@ NATION_AGENT_API_KEY = os.getenv('NATION_AGENT_API_KEY', 'YOUR_NATION_AGENT_API_
 
 # Configuration for Nation Radar Pipeline
 
-# Keywords to search for
-KEYWORDS = [
-    "Crestal",
-    "Crestal Network", 
-    "Nation.fun",
-    "$NATION"
-]
+# Defaults for projects that don't override them
+DAYS_LOOKBACK = int(config.get('days_lookback', 21))
+MAX_PAGES = int(config.get('max_pages', 3))
+
+_pipeline = config.get('pipeline') or {}
+PIPELINE_MAX_WORKERS = int(_pipeline.get('max_workers', 4))
+MAX_TWEETS_PER_KEYWORD = int(_pipeline.get('max_tweets_per_keyword', 100))
+
+# Shared RapidAPI token bucket
+_rapidapi = config.get('rapidapi') or {}
+RAPIDAPI_BASE_URL = os.getenv('RAPIDAPI_BASE_URL') or _rapidapi.get('base_url', 'https://twitter293.p.rapidapi.com')
+RAPIDAPI_REQUESTS_PER_SECOND = float(_rapidapi.get('requests_per_second', 2))
+RAPIDAPI_BURST = int(_rapidapi.get('burst', 4))
+RAPIDAPI_RATE_LIMIT_PAUSE = float(_rapidapi.get('rate_limit_pause', 30))
+
+# Historical backfill depth and page budget
+_backfill = config.get('backfill') or {}
+BACKFILL_DAYS = int(_backfill.get('days', 180))
+BACKFILL_MAX_PAGES = int(_backfill.get('max_pages', 5000))
+
+# On-disk raw search response cache (relative paths resolve from the working directory)
+_response_cache = config.get('response_cache') or {}
+RESPONSE_CACHE_ENABLED = bool(_response_cache.get('enabled', True))
+RESPONSE_CACHE_DIR = str(_response_cache.get('directory', 'response_cache'))
+RESPONSE_CACHE_TTL = float(_response_cache.get('ttl_days', 30)) * 86400
+RESPONSE_CACHE_MAX_BYTES = int(float(_response_cache.get('max_mb', 1024)) * 1024 * 1024)
+
+# Nation Agent retry / circuit breaker settings
+_scoring = config.get('scoring') or {}
+NATION_AGENT_BASE_URL = (os.getenv('NATION_AGENT_BASE_URL')
+                         or _scoring.get('base_url', 'https://open.service.crestal.network/v1'))
+SCORING_MAX_RETRIES = int(_scoring.get('max_retries', 2))
+SCORING_BACKOFF_BASE = float(_scoring.get('backoff_base', 0.5))
+SCORING_BACKOFF_CAP = float(_scoring.get('backoff_cap', 8))
+SCORING_FAILURE_THRESHOLD = int(_scoring.get('failure_threshold', 3))
+SCORING_RESET_TIMEOUT = float(_scoring.get('reset_timeout', 60))
+RESCORE_BATCH_SIZE = int(_scoring.get('rescore_batch_size', 200))
+
+# Local pre-scorer triage ahead of remote scoring
+_prescore = config.get('prescore') or {}
+PRESCORE_ENABLED = bool(_prescore.get('enabled', True))
+PRESCORE_MIN_CONFIDENCE = float(_prescore.get('min_confidence', 0.3))
+PRESCORE_SAMPLE_RATE = float(_prescore.get('sample_rate', 0.1))
+PRESCORE_LOW_VALUE_SCORE = float(_prescore.get('low_value_score', 0.01))
+
+# Engagement refresh decay schedule as (max_age_seconds, interval_seconds), youngest first
+_refresh = config.get('refresh') or {}
+REFRESH_MAX_PAGES = int(_refresh.get('max_pages', 1))
+REFRESH_BATCH_SIZE = int(_refresh.get('batch_size', 500))
+# Author searches (from:user) per project for due tweets the keyword searches did not return
+REFRESH_MAX_AUTHOR_SEARCHES = int(_refresh.get('max_author_searches', 25))
+REFRESH_SCHEDULE = sorted(
+    (float(step['max_age_hours']) * 3600, float(step['interval_hours']) * 3600)
+    for step in (_refresh.get('schedule') or [
+        {'max_age_hours': 6, 'interval_hours': 0.5},
+        {'max_age_hours': 24, 'interval_hours': 2},
+        {'max_age_hours': 72, 'interval_hours': 6},
+        {'max_age_hours': 168, 'interval_hours': 24},
+        {'max_age_hours': 720, 'interval_hours': 168},
+    ])
+)
+
+
+def _normalize_ticker(ticker) -> str:
+    return str(ticker).strip().lstrip('$').upper()
+
+
+def _load_project(raw: dict) -> dict:
+    """Normalize one project entry from config.yaml."""
+    tickers = [_normalize_ticker(t) for t in (raw.get('tickers') or []) if str(t).strip()]
+    keywords = [str(k) for k in (raw.get('keywords') or []) if str(k).strip()]
+
+    # Tickers are searched as $TICKER unless already listed as a keyword
+    existing = {k.upper() for k in keywords}
+    for ticker in tickers:
+        if f"${ticker}" not in existing:
+            keywords.append(f"${ticker}")
+
+    return {
+        'name': str(raw['name']),
+        'keywords': keywords,
+        'tickers': tickers,
+        'days_lookback': int(raw.get('days_lookback', DAYS_LOOKBACK)),
+        'max_pages': int(raw.get('max_pages', MAX_PAGES)),
+    }
+
+
+def _load_projects(cfg: dict) -> list:
+    if cfg.get('projects'):
+        return [_load_project(p) for p in cfg['projects']]
+    # Legacy single-project layout: top-level keywords list
+    return [_load_project({
+        'name': 'crestal',
+        'keywords': cfg.get('keywords') or [],
+        'tickers': [k for k in (cfg.get('keywords') or []) if str(k).startswith('$')],
+    })]
+
+
+PROJECTS = _load_projects(config)
+PROJECTS_BY_NAME = {p['name']: p for p in PROJECTS}
+
+# Flat keyword list across all projects (kept for older callers)
+KEYWORDS = [k for p in PROJECTS for k in p['keywords']]
 
-# How many days back to search
-DAYS_LOOKBACK = 21
 # CSV_FILENAME removed - using SQLite database instead
 
 # Other settings
@@ -12,9 +12,11 @@ import html
 import re
 import hashlib
 from datetime import datetime
-from typing import Dict, List, Set
+from typing import Dict, List, Sequence, Set, Tuple
 from pathlib import Path
 
+from tweet_record import select
+
 
 _URL_PATTERN = re.compile(r"https?://\S+", re.IGNORECASE)
 _WHITESPACE_PATTERN = re.compile(r"\s+")
@@ -77,14 +79,14 @@ def parse_twitter_date(date_str: str) -> datetime:
         return datetime.max.replace(tzinfo=None)
 
 
-def earliest_unique_tweets(tweets: List[Dict]) -> List[Dict]:
+def earliest_unique_indices(tweets: Sequence[Dict]) -> List[int]:
     """
-    Return only the earliest tweet per normalized text within the provided list.
+    Indices of the earliest tweet per normalized text, in first-seen order.
     Less aggressive - only removes exact duplicates and retweets.
     """
-    by_hash: Dict[str, Dict] = {}
+    by_hash: Dict[str, Tuple[datetime, int]] = {}
     
-    for tw in tweets:
+    for index, tw in enumerate(tweets):
         text = tw.get("text", "")
         
         # Skip empty tweets
@@ -95,14 +97,19 @@ def earliest_unique_tweets(tweets: List[Dict]) -> List[Dict]:
         created_at = parse_twitter_date(tw.get("created_at", ""))
         
         existing = by_hash.get(content_hash)
-        if existing is None:
-            by_hash[content_hash] = {"tweet": tw, "created_at": created_at}
-        else:
-            # Keep the earliest tweet
-            if created_at < existing["created_at"]:
-                by_hash[content_hash] = {"tweet": tw, "created_at": created_at}
-
-    return [entry["tweet"] for entry in by_hash.values()]
+        # Keep the earliest tweet (replacing the value keeps the hash's first-seen slot)
+        if existing is None or created_at < existing[0]:
+            by_hash[content_hash] = (created_at, index)
+
+    return [index for _, index in by_hash.values()]
+
+
+def earliest_unique_tweets(tweets: Sequence[Dict]) -> List[Dict]:
+    """
+    Return only the earliest tweet per normalized text within the provided list.
+    The returned list shares the tweet objects; nothing is copied.
+    """
+    return select(tweets, earliest_unique_indices(tweets))
 
 
 def load_seen_hashes(file_path: str = "seen_text_hashes.txt") -> Set[str]:
@@ -8,25 +8,72 @@ import requests
 import time
 import os
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from datetime import datetime, timedelta
 
+from config import RAPIDAPI_BASE_URL, RAPIDAPI_BURST, RAPIDAPI_RATE_LIMIT_PAUSE, RAPIDAPI_REQUESTS_PER_SECOND
+from metrics import DEDUP_HITS, HTTP_REQUEST_SECONDS, PAGES_FETCHED, TWEETS_FILTERED, host_of
+from rate_limiter import TokenBucket
+from storage.response_cache import ResponseCache, shared_response_cache
+from tweet_record import TweetRecord, compact
+
+# One bucket for every fetcher in the process: the quota is per API key, not per worker
+RAPIDAPI_LIMITER = TokenBucket("rapidapi", RAPIDAPI_REQUESTS_PER_SECOND, RAPIDAPI_BURST)
+
+PAGE_OK = "ok"
+PAGE_RATE_LIMITED = "rate_limited"
+PAGE_ERROR = "error"
+MAX_RATE_LIMITED_RETRIES = 5
+# Shared author profiles are dropped past this many, so long backfills stay bounded
+AUTHOR_CACHE_SIZE = 10_000
+
+
+class SearchError(Exception):
+    """A search page could not be fetched (as opposed to pagination simply ending)."""
+
+
+SPAM_INDICATORS = (
+    'follow me', 'dm me', 'send me',
+    'free airdrop', 'claim free', 'get free'
+)
+
 class NewTwitterFetcher:
-    def __init__(self, days_lookback: int = 21):
+    def __init__(self, days_lookback: int = 21, max_pages: int = 3, tickers: Optional[Iterable[str]] = None,
+                 rate_limiter: Optional[TokenBucket] = None, base_url: Optional[str] = None,
+                 response_cache: Optional[ResponseCache] = None):
         self.days_lookback = days_lookback
+        self.max_pages = max_pages
+        self.tickers = {t.lstrip('$').upper() for t in (tickers or [])}
         self.api_key = os.getenv('RAPIDAPI_KEY', 'bd408a75efmsh7d13585f3a40368p186d85jsndd821cdf1fef')
-        self.base_url = "https://twitter293.p.rapidapi.com"
+        self.base_url = (base_url or RAPIDAPI_BASE_URL).rstrip('/')
+        self.rate_limiter = rate_limiter or RAPIDAPI_LIMITER
+        # None: the shared on-disk cache from config.yaml (opened on the first fetched page)
+        self.response_cache = response_cache
+        self._authors: Dict[str, Dict[str, Any]] = {}
     
     def contains_ticker_symbol(self, text: str, ticker: str) -> bool:
         """Check if text contains the exact ticker symbol (e.g., $NATION)"""
         pattern = re.compile(rf'\${ticker}\b', re.IGNORECASE)
         return bool(pattern.search(text))
+
+    def ticker_for(self, keyword: str) -> Optional[str]:
+        """Return the ticker symbol if keyword is a $TICKER search, else None"""
+        term = keyword.strip().strip('"')
+        if not term.startswith('$'):
+            return None
+        symbol = term[1:].upper()
+        if self.tickers and symbol not in self.tickers:
+            return None
+        return symbol
         
-    def fetch(self, keyword: str) -> List[Dict[str, Any]]:
+    def fetch(self, keyword: str, checkpoint=None) -> List[TweetRecord]:
         """
         Fetch tweets using focused, quality-oriented collection
+
+        If a checkpoint (storage.checkpoint_store.KeywordCheckpoint) is given, every
+        fetched page and its cursor are persisted, and pagination resumes from them.
         """
-        all_tweets = []
+        tweets: List[TweetRecord] = []
         headers = {
             "X-RapidAPI-Key": self.api_key,
             "X-RapidAPI-Host": "twitter293.p.rapidapi.com"
@@ -36,33 +83,46 @@ class NewTwitterFetcher:
         categories = ["Top", "Latest"]  # Removed "Mixed" to reduce noise
         
         for category in categories:
-            category_tweets = self._fetch_category_with_pagination(keyword, category, headers)
-            all_tweets.extend(category_tweets)
-            time.sleep(2)
+            tweets.extend(self._fetch_category_with_pagination(keyword, category, headers, checkpoint))
         
         # Strategy 2: Limited, focused variations only
         search_variations = self._generate_focused_variations(keyword)
         
         for variation in search_variations:
-            variation_tweets = self._fetch_category_with_pagination(variation, "Latest", headers)
-            all_tweets.extend(variation_tweets)
-            time.sleep(2)
+            tweets.extend(self._fetch_category_with_pagination(variation, "Latest", headers, checkpoint))
+        
+        # Every stage below filters the one list in place rather than copying it
+        seen_ids = set()
         
-        # Remove duplicates based on tweet ID
-        unique_tweets = {}
-        for tweet in all_tweets:
-            if tweet['id'] not in unique_tweets:
-                unique_tweets[tweet['id']] = tweet
+        def first_seen(tweet: TweetRecord) -> bool:
+            if tweet.id in seen_ids:
+                return False
+            seen_ids.add(tweet.id)
+            return True
         
-        tweets = list(unique_tweets.values())
+        DEDUP_HITS.inc(compact(tweets, first_seen), layer="fetch_id")
         
         # Filter tweets by date (within lookback period)
-        filtered_tweets = self._filter_tweets_by_date(tweets)
+        self._filter_tweets_by_date(tweets)
         
         # Additional quality filtering
-        quality_tweets = self._filter_quality_content(filtered_tweets, keyword)
+        self._filter_quality_content(tweets, keyword)
         
-        return quality_tweets
+        return tweets
+    
+    def fetch_engagement(self, keyword: str) -> List[TweetRecord]:
+        """
+        Shallow Latest/Top search used to re-poll engagement of tweets already stored.
+        No quality or date filtering: callers only match results against stored ids.
+        """
+        headers = {
+            "X-RapidAPI-Key": self.api_key,
+            "X-RapidAPI-Host": "twitter293.p.rapidapi.com"
+        }
+        tweets = []
+        for category in ["Latest", "Top"]:
+            tweets.extend(self._fetch_category_with_pagination(keyword, category, headers))
+        return tweets
     
     def _generate_focused_variations(self, keyword: str) -> List[str]:
         """
@@ -80,106 +140,175 @@ class NewTwitterFetcher:
         
         return variations
     
-    def _filter_quality_content(self, tweets: List[Dict[str, Any]], keyword: str) -> List[Dict[str, Any]]:
+    def _filter_quality_content(self, tweets: List[TweetRecord], keyword: str) -> List[TweetRecord]:
         """
-        Filter out low-quality, generic content - LESS AGGRESSIVE
+        Filter out low-quality, generic content - LESS AGGRESSIVE (in place)
         """
-        quality_tweets = []
+        keyword_lower = keyword.lower().replace('$', '').replace('"', '')
+        # For ticker searches, only match the exact format $TICKER
+        ticker = self.ticker_for(keyword)
+        compact(tweets, lambda tweet: self._is_quality(tweet.text, keyword_lower, ticker))
+        return tweets
+    
+    def _is_quality(self, text: str, keyword_lower: str, ticker: Optional[str]) -> bool:
+        text = (text or '').lower()
         
-        for tweet in tweets:
-            text = tweet.get('text', '').lower()
-            
-            # Skip if tweet is too short (likely spam)
-            if len(text) < 15:  # Reduced from 20 to 15
-                continue
-            
-            # Skip if tweet contains obvious spam indicators (reduced list)
-            spam_indicators = [
-                'follow me', 'dm me', 'send me',
-                'free airdrop', 'claim free', 'get free'
-            ]
-            
-            if any(indicator in text for indicator in spam_indicators):
-                continue
-            
-            # Skip if tweet is mostly hashtags
-            hashtag_count = text.count('#')
-            if hashtag_count > 8:  # Increased from 5 to 8
-                continue
-            
-            # Skip if tweet is mostly mentions
-            mention_count = text.count('@')
-            if mention_count > 5:  # Increased from 3 to 5
-                continue
-            
-            # Better keyword relevance check
-            keyword_lower = keyword.lower().replace('$', '').replace('"', '')
-            
-            # For $NATION, only match the exact ticker format $NATION
-            if keyword == "$NATION":
-                if not self.contains_ticker_symbol(text, "NATION"):
-                    continue
-            else:
-                # For other keywords, check if the keyword appears
-                if keyword_lower not in text and keyword_lower.replace(' ', '') not in text:
-                    continue
-            
-            quality_tweets.append(tweet)
+        # Skip if tweet is too short (likely spam)
+        if len(text) < 15:  # Reduced from 20 to 15
+            TWEETS_FILTERED.inc(reason="too_short")
+            return False
+        
+        # Skip if tweet contains obvious spam indicators (reduced list)
+        if any(indicator in text for indicator in SPAM_INDICATORS):
+            TWEETS_FILTERED.inc(reason="spam")
+            return False
+        
+        # Skip if tweet is mostly hashtags
+        hashtag_count = text.count('#')
+        if hashtag_count > 8:  # Increased from 5 to 8
+            TWEETS_FILTERED.inc(reason="hashtags")
+            return False
+        
+        # Skip if tweet is mostly mentions
+        mention_count = text.count('@')
+        if mention_count > 5:  # Increased from 3 to 5
+            TWEETS_FILTERED.inc(reason="mentions")
+            return False
+        
+        # Better keyword relevance check
+        if ticker:
+            if not self.contains_ticker_symbol(text, ticker):
+                TWEETS_FILTERED.inc(reason="ticker_mismatch")
+                return False
+        else:
+            # For other keywords, check if the keyword appears
+            if keyword_lower not in text and keyword_lower.replace(' ', '') not in text:
+                TWEETS_FILTERED.inc(reason="keyword_mismatch")
+                return False
         
-        return quality_tweets
+        return True
     
-    def _fetch_category_with_pagination(self, keyword: str, category: str, headers: Dict) -> List[Dict[str, Any]]:
+    def _fetch_category_with_pagination(self, keyword: str, category: str, headers: Dict, checkpoint=None) -> List[TweetRecord]:
         """
         Fetch tweets for a specific category with limited pagination
         """
         tweets = []
-        max_requests = 3  # Reduced to 3 requests per category for efficiency
+        max_requests = self.max_pages
         cursor = None
+        page = 0
         
-        for request_num in range(max_requests):
-            try:
-                url = f"{self.base_url}/search/{keyword}"
-                params = {
-                    "count": "50",  # Reduced to 50 tweets per request
-                    "category": category
-                }
-                
-                # Add cursor for pagination if available
-                if cursor:
-                    params["cursor"] = cursor
-                
-                response = requests.get(url, headers=headers, params=params, timeout=30)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    batch_tweets = self._extract_tweets_from_response(data)
-                    
-                    if not batch_tweets:
-                        break
-                    
-                    tweets.extend(batch_tweets)
-                    
-                    # Check for cursor for next page
-                    cursor = self._extract_cursor(data)
-                    if not cursor:
-                        break
-                        
-                elif response.status_code == 429:
-                    time.sleep(30)
-                    continue
-                elif response.status_code == 404:
-                    break
-                else:
-                    break
-                    
-            except Exception as e:
-                break
+        if checkpoint is not None:
+            cursor, page, exhausted, tweets = checkpoint.load(keyword, category)
+            if exhausted:
+                return tweets
+        
+        for request_num in range(page, max_requests):
+            status, batch_tweets, next_cursor = self._request_page(keyword, category, headers, cursor)
+            if status == PAGE_RATE_LIMITED:
+                continue
+            if batch_tweets:
+                tweets.extend(batch_tweets)
+                cursor = next_cursor
+            exhausted = status != PAGE_OK or not batch_tweets or not next_cursor
+            
+            if checkpoint is not None:
+                checkpoint.save_page(keyword, category, page, batch_tweets, cursor, exhausted)
+            page += 1
             
-            # Rate limiting between requests
-            time.sleep(2)
+            if exhausted:
+                break
         
         return tweets
     
+    def iter_pages(self, keyword: str, category: str, cursor: Optional[str] = None,
+                   max_pages: Optional[int] = None) -> Iterator[Tuple[List[TweetRecord], Optional[str]]]:
+        """
+        Walk search pagination one page at a time, yielding (tweets, next_cursor).
+
+        Nothing is accumulated, so memory stays flat however deep the walk goes
+        (used by backfill.py). Stops when the results or cursors run out or after
+        max_pages pages; pass a saved cursor to resume. Raises SearchError on an API
+        error or persistent 429s, so callers can tell that apart from the end.
+        """
+        headers = {
+            "X-RapidAPI-Key": self.api_key,
+            "X-RapidAPI-Host": "twitter293.p.rapidapi.com"
+        }
+        pages = 0
+        rate_limited = 0
+        while max_pages is None or pages < max_pages:
+            status, batch_tweets, next_cursor = self._request_page(keyword, category, headers, cursor)
+            if status == PAGE_RATE_LIMITED:
+                rate_limited += 1
+                if rate_limited > MAX_RATE_LIMITED_RETRIES:
+                    raise SearchError(f"still rate limited after {MAX_RATE_LIMITED_RETRIES} retries")
+                continue
+            if status != PAGE_OK:
+                raise SearchError(f"search for {keyword!r} ({category}) failed")
+            if not batch_tweets:
+                return
+            rate_limited = 0
+            pages += 1
+            yield batch_tweets, next_cursor
+            if not next_cursor or next_cursor == cursor:
+                return
+            cursor = next_cursor
+    
+    def _request_page(self, keyword: str, category: str, headers: Dict,
+                      cursor: Optional[str]) -> Tuple[str, List[TweetRecord], Optional[str]]:
+        """
+        One search request, paced by the shared rate limiter: (status, tweets, next_cursor)
+        """
+        self.rate_limiter.acquire()
+        response = None
+        request_start = time.perf_counter()
+        try:
+            url = f"{self.base_url}/search/{keyword}"
+            params = {
+                "count": "50",  # Reduced to 50 tweets per request
+                "category": category
+            }
+            
+            # Add cursor for pagination if available
+            if cursor:
+                params["cursor"] = cursor
+            
+            response = requests.get(url, headers=headers, params=params, timeout=30)
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - request_start, host=host_of(url), status=response.status_code
+            )
+            
+            if response.status_code == 200:
+                PAGES_FETCHED.inc(category=category)
+                data = response.json()
+                self._cache_response(keyword, category, cursor, response.content)
+                batch_tweets = self._extract_tweets_from_response(data)
+                return PAGE_OK, batch_tweets, self._extract_cursor(data) if batch_tweets else None
+            
+            if response.status_code == 429:
+                # Every worker sharing the limiter backs off, not just this one
+                self.rate_limiter.pause(RAPIDAPI_RATE_LIMIT_PAUSE)
+                return PAGE_RATE_LIMITED, [], cursor
+            
+            # 404 and other errors end pagination for this category
+            return PAGE_ERROR, [], None
+            
+        except Exception:
+            if response is None:
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - request_start, host=host_of(self.base_url), status="error"
+                )
+            return PAGE_ERROR, [], None
+    
+    def _cache_response(self, keyword: str, category: str, cursor: Optional[str], body: bytes) -> None:
+        """Keep the raw page for reprocess.py; a cache failure never fails the fetch"""
+        try:
+            cache = self.response_cache if self.response_cache is not None else shared_response_cache()
+            if cache is not None:
+                cache.put(keyword, category, cursor, body)
+        except Exception as e:
+            print(f"⚠️ Could not cache response for {keyword} ({category}): {e}")
+    
     def _extract_cursor(self, data: Dict[str, Any]) -> str:
         """
         Extract cursor for pagination from API response
@@ -195,46 +324,49 @@ class NewTwitterFetcher:
             print(f"❌ Error extracting cursor: {e}")
         return None
     
-    def _filter_tweets_by_date(self, tweets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _filter_tweets_by_date(self, tweets: List[TweetRecord], now: Optional[datetime] = None) -> List[TweetRecord]:
         """
-        Filter tweets to only include those within the lookback period
+        Filter tweets to only include those within the lookback period (in place)
+
+        `now` (naive, like datetime.now()) moves the reference point, e.g. to when a cached
+        page was fetched.
         """
-        cutoff_date = datetime.now() - timedelta(days=self.days_lookback)
-        filtered_tweets = []
-        
-        for tweet in tweets:
+        cutoff_date = (now or datetime.now()) - timedelta(days=self.days_lookback)
+        compact(tweets, lambda tweet: self._within_lookback(tweet.created_at, cutoff_date))
+        return tweets
+    
+    @staticmethod
+    def _within_lookback(tweet_date_str: str, cutoff_date: datetime) -> bool:
+        try:
+            if not tweet_date_str:
+                return True
+            # Handle Twitter format: "Thu Aug 21 20:08:17 +0000 2025"
             try:
-                # Parse tweet date
-                tweet_date_str = tweet.get('created_at', '')
-                if tweet_date_str:
-                    # Handle Twitter format: "Thu Aug 21 20:08:17 +0000 2025"
-                    try:
-                        tweet_date = datetime.strptime(tweet_date_str, '%a %b %d %H:%M:%S %z %Y')
-                    except ValueError:
-                        # Try ISO format if Twitter format fails
-                        try:
-                            tweet_date = datetime.fromisoformat(tweet_date_str.replace('Z', '+00:00'))
-                        except ValueError:
-                            print(f"❌ Cannot parse date: {tweet_date_str}")
-                            # Include tweet if we can't parse the date
-                            filtered_tweets.append(tweet)
-                            continue
-                    
-                    # Convert to naive datetime for comparison
-                    if tweet_date.tzinfo:
-                        tweet_date = tweet_date.replace(tzinfo=None)
-                    
-                    if tweet_date >= cutoff_date:
-                        filtered_tweets.append(tweet)
-                        
-            except Exception as e:
-                print(f"❌ Error parsing tweet date: {e}")
-                # Include tweet if we can't parse the date
-                filtered_tweets.append(tweet)
-        
-        return filtered_tweets
+                tweet_date = datetime.strptime(tweet_date_str, '%a %b %d %H:%M:%S %z %Y')
+            except ValueError:
+                # Try ISO format if Twitter format fails
+                try:
+                    tweet_date = datetime.fromisoformat(tweet_date_str.replace('Z', '+00:00'))
+                except ValueError:
+                    print(f"❌ Cannot parse date: {tweet_date_str}")
+                    # Include tweet if we can't parse the date
+                    return True
+            
+            # Convert to naive datetime for comparison
+            if tweet_date.tzinfo:
+                tweet_date = tweet_date.replace(tzinfo=None)
+            
+            if tweet_date >= cutoff_date:
+                return True
+            TWEETS_FILTERED.inc(reason="out_of_lookback")
+            return False
+                
+        except Exception as e:
+            print(f"❌ Error parsing tweet date: {e}")
+            # Include tweet if we can't parse the date
+            return True
     
-    def _extract_tweets_from_response(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _extract_tweets_from_response(self, data: Dict[str, Any]) -> List[TweetRecord]:
         """
         Extract tweets from the API response
         """
@@ -259,7 +391,7 @@ class NewTwitterFetcher:
             
         return tweets
     
-    def _parse_tweet_result(self, tweet_result: Dict[str, Any]) -> Dict[str, Any]:
+    def _parse_tweet_result(self, tweet_result: Dict[str, Any]) -> Optional[TweetRecord]:
         """
         Parse a single tweet result into our standard format
         """
@@ -271,39 +403,87 @@ class NewTwitterFetcher:
             
             # Extract user information
             username = "unknown"
+            author = None
             if 'core' in tweet_result and 'user_results' in tweet_result['core']:
                 user_result = tweet_result['core']['user_results']['result']
                 if 'legacy' in user_result:
                     username = user_result['legacy'].get('screen_name', 'unknown')
+                    author = self._shared_author(self._parse_author(user_result))
             
             # Extract engagement metrics
-            engagement = {
-                "likes": int(legacy.get('favorite_count', 0) or 0),
-                "retweets": int(legacy.get('retweet_count', 0) or 0),
-                "replies": int(legacy.get('reply_count', 0) or 0),
-                "quote_tweets": int(legacy.get('quote_count', 0) or 0),
-                "bookmarks": int(legacy.get('bookmark_count', 0) or 0),
-                "views": 0
-            }
+            tweet = TweetRecord(
+                id=legacy.get('id_str', ''),
+                text=legacy.get('full_text', ''),
+                username=username,
+                created_at=legacy.get('created_at', ''),
+                interactions=self._parse_interactions(tweet_result, username),
+                author=author,
+            )
+            tweet.likes = int(legacy.get('favorite_count', 0) or 0)
+            tweet.retweets = int(legacy.get('retweet_count', 0) or 0)
+            tweet.replies = int(legacy.get('reply_count', 0) or 0)
+            tweet.quote_tweets = int(legacy.get('quote_count', 0) or 0)
+            tweet.bookmarks = int(legacy.get('bookmark_count', 0) or 0)
             
             # Try to get views from the views object
             if 'views' in tweet_result:
                 views_obj = tweet_result.get('views')
                 if isinstance(views_obj, dict) and 'count' in views_obj:
-                    engagement['views'] = int(views_obj.get('count') or 0)
+                    tweet.views = int(views_obj.get('count') or 0)
                 elif isinstance(views_obj, (int, str)):
-                    engagement['views'] = int(views_obj)
-            
-            tweet = {
-                "id": legacy.get('id_str', ''),
-                "text": legacy.get('full_text', ''),
-                "username": username,
-                "created_at": legacy.get('created_at', ''),
-                "engagement": engagement
-            }
+                    tweet.views = int(views_obj)
             
             return tweet
             
         except Exception as e:
             print(f"❌ Error parsing tweet: {e}")
             return None
+
+    def _shared_author(self, author: Dict[str, Any]) -> Dict[str, Any]:
+        """One profile dict per author instead of one per tweet (prolific authors repeat a lot)"""
+        cached = self._authors.get(author["twitter_id"])
+        if cached == author:
+            return cached
+        if len(self._authors) >= AUTHOR_CACHE_SIZE:
+            self._authors.clear()
+        self._authors[author["twitter_id"]] = author
+        return author
+
+    @staticmethod
+    def _parse_author(user_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Profile fields of the tweet's author (stored in the users table)"""
+        legacy = user_result.get('legacy') or {}
+        return {
+            "twitter_id": user_result.get('rest_id'),
+            "display_name": legacy.get('name'),
+            "followers": int(legacy.get('followers_count', 0) or 0),
+            "following": int(legacy.get('friends_count', 0) or 0),
+            "statuses": int(legacy.get('statuses_count', 0) or 0),
+            "verified": bool(legacy.get('verified')),
+            "blue_verified": bool(user_result.get('is_blue_verified')),
+            "account_created_at": legacy.get('created_at'),
+        }
+
+    @staticmethod
+    def _parse_interactions(tweet_result: Dict[str, Any], username: str) -> List[Dict[str, str]]:
+        """Who this tweet replies to, quotes and @mentions, as [{"type", "target"}] (one edge per target)"""
+        legacy = tweet_result.get('legacy') or {}
+        author = (username or '').lower()
+        edges: Dict[str, tuple] = {}
+
+        def add(kind: str, target: Optional[str]) -> None:
+            target = (target or '').strip().lstrip('@')
+            # Replies also list the parent author as a mention; the stronger kind wins
+            if target and target.lower() != author and target.lower() not in edges:
+                edges[target.lower()] = (kind, target)
+
+        add("reply", legacy.get('in_reply_to_screen_name'))
+        if legacy.get('is_quote_status'):
+            quoted = ((tweet_result.get('quoted_status_result') or {}).get('result') or {})
+            # Withheld/visibility-limited quotes wrap the tweet one level deeper
+            quoted = quoted.get('tweet', quoted)
+            user = (((quoted.get('core') or {}).get('user_results') or {}).get('result') or {})
+            add("quote", (user.get('legacy') or {}).get('screen_name'))
+        for mention in ((legacy.get('entities') or {}).get('user_mentions') or []):
+            add("mention", mention.get('screen_name'))
+        return [{"type": kind, "target": target} for kind, target in edges.values()]
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+HTTP conditional caching for the read-only API endpoints.
+
+Validators come from the tweets change sequence that SQLite triggers maintain
+in sync_state (see storage.sqlite_storage), so they change exactly when stored
+data changes:
+
+- ETag:          weak hash of (change_seq, path, query string[, time bucket, extra])
+- Last-Modified: time of the last tweet insert/update/delete
+
+Requests whose If-None-Match / If-Modified-Since still match get an empty 304
+without running the view. Endpoints that compute relative windows ("last 24h")
+pass time_bucket so their validators also roll over as time passes.
+
+Expensive views are also wrapped in coalesced(): concurrent requests with the
+same (endpoint, normalized query params, data version) share one in-flight
+computation (single-flight), and finished 200 responses are kept in a bounded
+LRU so repeats are served without recomputing until the data changes.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from flask import current_app, g, make_response, request
+from werkzeug.http import is_hop_by_hop_header
+
+from metrics import RESPONSE_CACHE
+
+DB_PATH = "tweets.db"
+
+# Cache-Control per kind of endpoint
+AGGREGATE = "public, max-age=60, stale-while-revalidate=600"
+SEARCH = "public, max-age=30, stale-while-revalidate=120"
+REVALIDATE = "no-cache"
+NO_STORE = "no-store"
+
+RESPONSE_CACHE_ENTRIES = 256
+
+
+def data_version(db_path: str = DB_PATH) -> Tuple[int, int]:
+    """(change_seq, changed_at epoch seconds); (0, 0) before anything is stored"""
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = dict(conn.execute(
+                "SELECT key, value FROM sync_state WHERE key IN ('change_seq', 'changed_at')"
+            ).fetchall())
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 0, 0
+    return int(rows.get('change_seq', 0)), int(rows.get('changed_at', 0))
+
+
+def current_data_version() -> Tuple[int, int]:
+    """data_version() read at most once per request"""
+    if 'data_version' not in g:
+        g.data_version = data_version()
+    return g.data_version
+
+
+def data_last_updated(db_path: str = DB_PATH) -> Optional[str]:
+    """ISO time of the last stored change, for 'last_updated' fields in responses"""
+    changed_at = data_version(db_path)[1]
+    return datetime.fromtimestamp(changed_at, timezone.utc).isoformat() if changed_at else None
+
+
+def conditional(cache_control: str, time_bucket: Optional[int] = None,
+                extra_version: Optional[Callable[[], str]] = None):
+    """Decorate a GET view with ETag/Last-Modified validators, 304 handling and Cache-Control"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            change_seq, changed_at = current_data_version()
+            parts = [str(change_seq), request.path, request.query_string.decode('utf-8', 'replace')]
+            last_modified = changed_at
+            if time_bucket:
+                bucket = int(time.time() // time_bucket)
+                parts.append(str(bucket))
+                last_modified = max(last_modified, bucket * time_bucket)
+            if extra_version is not None:
+                parts.append(extra_version())
+            etag = hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()[:24]
+
+            if request.if_none_match:
+                fresh = request.if_none_match.contains_weak(etag)
+            else:
+                fresh = (
+                    request.if_modified_since is not None and last_modified > 0
+                    and int(request.if_modified_since.timestamp()) >= last_modified
+                )
+
+            if fresh:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    # Never let caches keep errors around
+                    response.headers['Cache-Control'] = NO_STORE
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
+
+
+def apply_default_cache_control(response):
+    """Dynamic endpoints without an explicit policy must not be cached"""
+    if 'Cache-Control' not in response.headers and (
+        request.path.startswith('/api/') or request.path in ('/health', '/debug', '/metrics')
+    ):
+        response.headers['Cache-Control'] = NO_STORE
+    return response
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlightCache:
+    """Bounded LRU of computed results; concurrent misses on one key run the computation once"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Tuple[Any, bool]]) -> Tuple[Any, str]:
+        """(result, outcome) where outcome is 'hit', 'miss' or 'coalesced'.
+
+        compute returns (result, cacheable); uncacheable results are still handed to
+        requests that were waiting on the same flight.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key], "hit"
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, "coalesced"
+
+        cacheable = False
+        try:
+            flight.result, cacheable = compute()
+            return flight.result, "miss"
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if cacheable:
+                    self._entries[key] = flight.result
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+RESPONSE_CACHE_STORE = SingleFlightCache()
+
+
+def coalesced(time_bucket: Optional[int] = None, extra_version: Optional[Callable[[], str]] = None):
+    """Share one computation of a GET view between identical concurrent requests and cache its 200s.
+
+    The key is (endpoint, sorted query params, change_seq[, time bucket, extra]), so any
+    stored change or elapsed bucket naturally misses; old keys age out of the LRU.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                current_data_version()[0],
+                int(time.time() // time_bucket) if time_bucket else None,
+                extra_version() if extra_version is not None else None,
+            )
+
+            def compute():
+                response = make_response(view(*args, **kwargs))
+                # Keep the view's headers (Content-Type, Content-Disposition, ...) with the body
+                headers = [(name, value) for name, value in response.headers
+                           if name.lower() != "content-length" and not is_hop_by_hop_header(name)]
+                return (response.get_data(), response.status_code, headers), response.status_code == 200
+
+            (body, status, headers), outcome = RESPONSE_CACHE_STORE.get_or_compute(key, compute)
+            RESPONSE_CACHE.inc(endpoint=request.endpoint, outcome=outcome)
+            return current_app.response_class(body, status=status, headers=headers)
+        return wrapper
+    return decorator
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Response layer for the Flask API: fast JSON, field projection and compression.
+
+- FastJSONProvider serializes with orjson when it is installed (numpy scalars and
+  arrays, pandas timestamps and NaN handled), falling back to the stdlib encoder
+- ?fields=id,username,score trims every record under "data" to those keys
+- compress_response gzip/brotli-encodes JSON, CSV and text bodies above
+  COMPRESS_MIN_SIZE according to the client's Accept-Encoding
+"""
+
+import gzip
+import math
+import sys
+from typing import Any, Optional, Set
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+
+def _numpy():
+    """numpy if something has imported it (only then can numpy values reach us); never imports it"""
+    return sys.modules.get("numpy")
+
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_MIMETYPES = {"application/json", "text/csv", "text/plain", "text/html"}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _to_jsonable(obj: Any) -> Any:
+    """Fallback conversion for types neither encoder handles natively"""
+    np = _numpy()
+    if np is not None:
+        if isinstance(obj, np.generic):
+            value = obj.item()
+            return None if isinstance(value, float) and not math.isfinite(value) else value
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    if hasattr(obj, "isoformat"):  # pandas Timestamp, date, time
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "to_dict"):  # pandas Series
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def requested_fields() -> Optional[Set[str]]:
+    fields = request.args.get("fields") if request else None
+    if not fields:
+        return None
+    return {f.strip() for f in fields.split(",") if f.strip()} or None
+
+
+def project_fields(payload: Any, fields: Set[str]) -> Any:
+    """Keep only `fields` in each record of payload['data'] (or in the data dict itself)"""
+    if not isinstance(payload, dict) or "data" not in payload:
+        return payload
+    data = payload["data"]
+    if isinstance(data, list):
+        data = [
+            {k: v for k, v in item.items() if k in fields} if isinstance(item, dict) else item
+            for item in data
+        ]
+    elif isinstance(data, dict):
+        data = {k: v for k, v in data.items() if k in fields}
+    return {**payload, "data": data}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backing jsonify(); orjson when available, numpy/pandas-safe either way"""
+
+    sort_keys = False
+    ensure_ascii = False
+
+    @staticmethod
+    def default(obj: Any) -> Any:
+        return _to_jsonable(obj)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and not kwargs:
+            try:
+                return _orjson_dumps(obj).decode("utf-8")
+            except TypeError:
+                pass
+        return super().dumps(_sanitize(obj), **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        fields = requested_fields()
+        if fields:
+            obj = project_fields(obj, fields)
+        body = None
+        if orjson is not None:
+            try:
+                body = _orjson_dumps(obj)
+            except TypeError:
+                # e.g. numpy dict keys; the stdlib path converts more lazily
+                body = None
+        if body is None:
+            body = super().dumps(_sanitize(obj), separators=(",", ":"))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=_to_jsonable, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def _sanitize(obj: Any) -> Any:
+    """Replace NaN/inf with None and numpy keys with plain ones for the stdlib encoder"""
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    if isinstance(obj, dict):
+        np = _numpy()
+        return {(k.item() if np is not None and isinstance(k, np.generic) else k): _sanitize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sanitize(v) for v in obj]
+    return obj
+
+
+def _negotiate_encoding() -> Optional[str]:
+    offered = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = request.accept_encodings.best_match(offered)
+    return best if best and request.accept_encodings[best] > 0 else None
+
+
+def compress_response(response):
+    """Compress eligible responses in place according to Accept-Encoding"""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESS_MIMETYPES
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    encoding = _negotiate_encoding()
+    if encoding is None:
+        return response
+    if encoding == "br":
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    return response
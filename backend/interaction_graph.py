@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Interaction subgraphs for /api/graph.
+
+Edges (replies, quotes, @mentions) and their time-decayed weights are kept
+current at ingest by the storage layer (interaction_edges), so a request only
+reads the strongest edges around a user (or across the community), keeps the
+top-k nodes and labels clusters with a weighted label propagation over that
+small subgraph.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from storage.sqlite_storage import INTERACTION_KINDS
+
+MAX_NODES = 200
+# Label propagation converges in a handful of rounds on subgraphs this size
+PROPAGATION_ROUNDS = 20
+
+
+def _merge_edges(edges: Iterable[dict]) -> Dict[Tuple[str, str], dict]:
+    """Fold per-project/per-kind edges into one directed edge per (source, target)"""
+    merged: Dict[Tuple[str, str], dict] = {}
+    for edge in edges:
+        key = (edge['source'], edge['target'])
+        entry = merged.setdefault(key, {
+            'source': edge['source'], 'target': edge['target'],
+            'weight': 0.0, 'interactions': 0, 'kinds': defaultdict(float), 'last_ts': 0,
+        })
+        entry['weight'] += edge['weight']
+        entry['interactions'] += edge['interactions']
+        entry['kinds'][edge['kind']] += edge['weight']
+        entry['last_ts'] = max(entry['last_ts'], edge['last_ts'])
+    return merged
+
+
+def _strongest_nodes(edges: Iterable[dict], k: int, keep: Optional[str] = None) -> List[str]:
+    strength: Dict[str, float] = defaultdict(float)
+    for edge in edges:
+        strength[edge['source']] += edge['weight']
+        strength[edge['target']] += edge['weight']
+    ranked = sorted(strength, key=lambda node: (-strength[node], node))
+    if keep is not None:
+        ranked = [keep] + [node for node in ranked if node != keep]
+    return ranked[:k]
+
+
+def label_clusters(nodes: Sequence[str], edges: Iterable[dict]) -> Dict[str, int]:
+    """Weighted label propagation on the undirected subgraph; clusters numbered by size"""
+    neighbours: Dict[str, Dict[str, float]] = {node: defaultdict(float) for node in nodes}
+    for edge in edges:
+        neighbours[edge['source']][edge['target']] += edge['weight']
+        neighbours[edge['target']][edge['source']] += edge['weight']
+    labels = {node: node for node in nodes}
+    order = sorted(nodes)
+    for _ in range(PROPAGATION_ROUNDS):
+        changed = False
+        for node in order:
+            votes: Dict[str, float] = defaultdict(float)
+            for neighbour, weight in neighbours[node].items():
+                votes[labels[neighbour]] += weight
+            if not votes:
+                continue
+            best = max(sorted(votes), key=lambda label: votes[label])
+            if best != labels[node] and votes[best] > votes.get(labels[node], 0):
+                labels[node] = best
+                changed = True
+        if not changed:
+            break
+    sizes: Dict[str, int] = defaultdict(int)
+    for label in labels.values():
+        sizes[label] += 1
+    numbering = {label: i for i, label in enumerate(sorted(sizes, key=lambda label: (-sizes[label], label)))}
+    return {node: numbering[label] for node, label in labels.items()}
+
+
+def build_graph(db_storage, username: Optional[str] = None, project: Optional[str] = None,
+                kinds: Sequence[str] = INTERACTION_KINDS, k: int = 25) -> dict:
+    """Top-k subgraph around `username` (its strongest neighbours) or across the whole community"""
+    k = max(1, min(k, MAX_NODES))
+    if username:
+        ego = _merge_edges(db_storage.get_interaction_edges(username=username, project=project, kinds=kinds, limit=k))
+        members = _strongest_nodes(ego.values(), k + 1, keep=username) if ego else []
+    else:
+        top = _merge_edges(db_storage.get_interaction_edges(project=project, kinds=kinds, limit=k * 5))
+        members = _strongest_nodes(top.values(), k)
+
+    edges = list(_merge_edges(
+        db_storage.get_interaction_edges(project=project, kinds=kinds, limit=k * k, among=members)
+    ).values()) if members else []
+    clusters = label_clusters(members, edges)
+
+    stats = {node: {'in_weight': 0.0, 'out_weight': 0.0, 'degree': 0} for node in members}
+    for edge in edges:
+        stats[edge['source']]['out_weight'] += edge['weight']
+        stats[edge['target']]['in_weight'] += edge['weight']
+        stats[edge['source']]['degree'] += 1
+        stats[edge['target']]['degree'] += 1
+
+    nodes = [{
+        'id': node,
+        'in_weight': round(stats[node]['in_weight'], 4),
+        'out_weight': round(stats[node]['out_weight'], 4),
+        'degree': stats[node]['degree'],
+        'cluster': clusters[node],
+    } for node in members]
+    nodes.sort(key=lambda node: node['in_weight'] + node['out_weight'], reverse=True)
+    return {
+        'center': username,
+        'nodes': nodes,
+        'edges': [{
+            'source': edge['source'],
+            'target': edge['target'],
+            'weight': round(edge['weight'], 4),
+            'interactions': edge['interactions'],
+            'kinds': {kind: round(weight, 4) for kind, weight in edge['kinds'].items()},
+            'last_ts': edge['last_ts'],
+        } for edge in sorted(edges, key=lambda edge: edge['weight'], reverse=True)],
+        'clusters': len(set(clusters.values())),
+    }
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Server-Sent Events fan-out of stored tweets.
+
+The pipeline runs in its own process, so the broadcaster tails the tweets
+change sequence (see SQLiteStorage.get_changes) from one background thread per
+API process and fans every change out to connected clients:
+
+- event "tweet"      one per inserted/updated tweet, id = its change_seq
+- event "aggregates" after each batch of changes: totals plus deltas
+- event "reset"      the client fell too far behind; resync via /api/changes
+
+Each client has a bounded buffer; a client that overflows it is sent "reset"
+and disconnected instead of slowing everyone else down. Reconnecting clients
+send Last-Event-ID and get the missed changes replayed from the database.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Iterator, Optional
+
+from metrics import REGISTRY
+from storage.sqlite_storage import SQLiteStorage
+
+logger = logging.getLogger(__name__)
+
+STREAM_CLIENTS = REGISTRY.counter(
+    "nation_radar_stream_clients_total", "SSE client connections", ("outcome",))
+STREAM_EVENTS = REGISTRY.counter(
+    "nation_radar_stream_events_total", "SSE events queued for clients", ("event",))
+
+AGGREGATE_FIELDS = ("total_tweets", "avg_score", "high_quality", "low_quality", "unique_users", "unscored_tweets")
+
+
+def format_sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    def __init__(self, buffer_size: int) -> None:
+        self.queue: "queue.Queue[str]" = queue.Queue(maxsize=buffer_size)
+        self.lagged = False
+
+    def put(self, message: str) -> None:
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.lagged = True
+
+
+class ChangeBroadcaster:
+    """Single in-process poller of the change sequence, fanned out to SSE subscribers"""
+
+    def __init__(self, db_path: str = "tweets.db", poll_interval: float = 1.0,
+                 buffer_size: int = 256, batch_size: int = 500) -> None:
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._storage: Optional[SQLiteStorage] = None
+        self._head = 0
+        self._aggregates: Optional[dict] = None
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._storage = SQLiteStorage(db_path=self.db_path)
+            self._head = self._storage.get_change_seq()
+            self._aggregates = self._storage.get_aggregates()
+            self._thread = threading.Thread(target=self._run, name="change-broadcaster", daemon=True)
+            self._thread.start()
+
+    def subscribe(self) -> Subscription:
+        self._ensure_started()
+        subscription = Subscription(self.buffer_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        STREAM_CLIENTS.inc(outcome="connected")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+        STREAM_CLIENTS.inc(outcome="lagged" if subscription.lagged else "disconnected")
+
+    @property
+    def head(self) -> int:
+        with self._lock:
+            return self._head
+
+    def _publish(self, message: str, event: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(message)
+        STREAM_EVENTS.inc(len(subscribers), event=event)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Change broadcaster poll failed: {e}")
+            time.sleep(self.poll_interval)
+
+    def poll(self) -> int:
+        """Publish changes committed since the last poll; returns how many were sent"""
+        tweets, cursor, has_more = self._storage.get_changes(self.head, limit=self.batch_size)
+        published = 0
+        while tweets:
+            for tweet in tweets:
+                self._publish(format_sse("tweet", tweet, tweet['change_seq']), "tweet")
+            published += len(tweets)
+            with self._lock:
+                self._head = cursor
+            if not has_more:
+                break
+            tweets, cursor, has_more = self._storage.get_changes(cursor, limit=self.batch_size)
+        if published:
+            self._publish(format_sse("aggregates", self._aggregate_delta()), "aggregates")
+        else:
+            with self._lock:
+                self._head = max(self._head, cursor)
+        return published
+
+    def _aggregate_delta(self) -> dict:
+        current = self._storage.get_aggregates()
+        previous = self._aggregates or {}
+        self._aggregates = current
+        return {
+            'aggregates': current,
+            'delta': {
+                field: round(current[field] - previous.get(field, 0), 4)
+                for field in AGGREGATE_FIELDS
+            },
+            'cursor': str(self.head),
+        }
+
+    def stream(self, last_event_id: Optional[int] = None, heartbeat: float = 15.0) -> Iterator[str]:
+        """SSE messages for one client: replay after last_event_id, then live changes"""
+        subscription = self.subscribe()
+        try:
+            # Subscribe before replaying so nothing committed in between is lost;
+            # live events already covered by the replay are skipped by id
+            replayed_to = None
+            if last_event_id is not None:
+                replayed_to = self.head
+                since = last_event_id if last_event_id <= replayed_to else 0
+                storage = SQLiteStorage(db_path=self.db_path)
+                try:
+                    while since < replayed_to:
+                        tweets, cursor, has_more = storage.get_changes(since, limit=self.batch_size)
+                        for tweet in tweets:
+                            if tweet['change_seq'] <= replayed_to:
+                                yield format_sse("tweet", tweet, tweet['change_seq'])
+                        if not has_more:
+                            break
+                        since = cursor
+                finally:
+                    storage.close()
+
+            yield "retry: 3000\n\n"
+            while True:
+                if subscription.lagged:
+                    yield format_sse("reset", {'reason': 'client too slow', 'cursor': str(self.head)})
+                    return
+                try:
+                    message = subscription.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if replayed_to is not None and message.startswith("id: "):
+                    event_id = int(message[4:message.index("\n")])
+                    if event_id <= replayed_to:
+                        continue
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+
+BROADCASTER = ChangeBroadcaster()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Lightweight in-process instrumentation for the pipeline and API.
+
+Counters and histograms are kept in a process-wide registry and can be:
+- rendered in Prometheus text exposition format (served at /metrics)
+- snapshotted to a dict and written as a per-run JSON summary
+
+No external dependency; every metric is thread-safe.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+RUNS_DIR = "runs"
+LATEST_RUN_SUMMARY = os.path.join(RUNS_DIR, "latest.json")
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames: Iterable[str], values: Iterable[str], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = [(n, v) for n, v in zip(labelnames, values)]
+    if extra:
+        pairs.extend(extra.items())
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for n, v in pairs
+    )
+    return "{" + body + "}"
+
+
+class Counter:
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount == 0:
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value:g}" for key, value in items]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            items = sorted(self._values.items())
+        return {",".join(key) or "_total": value for key, value in items}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0] * len(self.buckets) + [0.0, 0]
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, {'le': f'{bound:g}'})} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, {'le': '+Inf'})} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {state[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        result = {}
+        for key, state in items:
+            count = state[-1]
+            result[",".join(key) or "_total"] = {
+                "count": count,
+                "sum": round(state[-2], 6),
+                "avg": round(state[-2] / count, 6) if count else 0,
+                "buckets": {f"{b:g}": c for b, c in zip(self.buckets, state)},
+            }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def reset(self) -> None:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+# --- Fetcher ---
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "nation_radar_http_request_seconds", "Outbound HTTP request latency", ("host", "status"))
+PAGES_FETCHED = REGISTRY.counter(
+    "nation_radar_pages_fetched_total", "Search result pages fetched", ("category",))
+TWEETS_FILTERED = REGISTRY.counter(
+    "nation_radar_tweets_filtered_total", "Tweets dropped by fetcher filters", ("reason",))
+
+# --- Dedup ---
+DEDUP_HITS = REGISTRY.counter(
+    "nation_radar_dedup_hits_total", "Tweets rejected as duplicates, per dedup layer", ("layer",))
+
+# --- Scorer ---
+SCORING_SECONDS = REGISTRY.histogram(
+    "nation_radar_scoring_seconds", "End-to-end Nation Agent scoring latency")
+SCORING_ERRORS = REGISTRY.counter(
+    "nation_radar_scoring_errors_total", "Nation Agent scoring failures", ("reason",))
+
+# --- Storage ---
+DB_COMMIT_SECONDS = REGISTRY.histogram(
+    "nation_radar_db_commit_seconds", "SQLite commit latency", ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+TWEETS_STORED = REGISTRY.counter(
+    "nation_radar_tweets_stored_total", "Tweets newly stored", ("project",))
+ENGAGEMENT_REFRESHES = REGISTRY.counter(
+    "nation_radar_engagement_refreshes_total", "Stored tweets seen again (or due but missed) by the engagement refresher", ("outcome",))
+
+# --- API ---
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    "nation_radar_api_request_seconds", "Flask request handling latency", ("endpoint", "status"))
+RESPONSE_CACHE = REGISTRY.counter(
+    "nation_radar_response_cache_total", "Coalesced endpoint lookups: hit, miss (computed) or coalesced (waited on another request)",
+    ("endpoint", "outcome"))
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc or "unknown"
+
+
+def write_run_summary(run_id, stats: dict, started_at: datetime, finished_at: datetime,
+                      runs_dir: str = RUNS_DIR) -> str:
+    """Write the per-run JSON summary (stats + metric snapshot) and update latest.json"""
+    summary = {
+        "run_id": run_id,
+        "started_at": started_at.isoformat(),
+        "finished_at": finished_at.isoformat(),
+        "duration_seconds": round((finished_at - started_at).total_seconds(), 3),
+        "stats": stats,
+        "metrics": REGISTRY.snapshot(),
+    }
+    os.makedirs(runs_dir, exist_ok=True)
+    path = os.path.join(runs_dir, f"run_{run_id}.json")
+    payload = json.dumps(summary, indent=2, default=str)
+    for target in (path, os.path.join(runs_dir, "latest.json")):
+        tmp = f"{target}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp, target)
+    return path
+
+
+def load_latest_run_summary(path: str = LATEST_RUN_SUMMARY) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def render_run_summary(summary: Optional[dict]) -> str:
+    """Render the last pipeline run's stats as Prometheus gauges"""
+    if not summary:
+        return ""
+    lines = [
+        "# HELP nation_radar_last_run_duration_seconds Duration of the last pipeline run",
+        "# TYPE nation_radar_last_run_duration_seconds gauge",
+        f"nation_radar_last_run_duration_seconds {summary.get('duration_seconds', 0)}",
+    ]
+    try:
+        finished = datetime.fromisoformat(summary["finished_at"]).timestamp()
+        lines += [
+            "# HELP nation_radar_last_run_finished_timestamp_seconds Unix time the last pipeline run finished",
+            "# TYPE nation_radar_last_run_finished_timestamp_seconds gauge",
+            f"nation_radar_last_run_finished_timestamp_seconds {finished:.0f}",
+        ]
+    except (KeyError, ValueError):
+        pass
+    stats = summary.get("stats") or {}
+    if stats:
+        lines += [
+            "# HELP nation_radar_last_run_stat Pipeline stats from the last run",
+            "# TYPE nation_radar_last_run_stat gauge",
+        ]
+        for key, value in sorted(stats.items()):
+            if isinstance(value, (int, float)):
+                lines.append(f'nation_radar_last_run_stat{{stat="{key}"}} {value:g}')
+    return "\n".join(lines) + "\n"
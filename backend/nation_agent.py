@@ -4,30 +4,69 @@ Shared utilities for scoring via Crestal Nation Agent.
 
 Exports:
 - format_tweet_for_agent(tweet: dict) -> str
-- get_agent_score(formatted_text: str) -> float
+- LocalPreScorer: cheap local triage deciding which tweets are worth a remote call
+- get_agent_score(formatted_text: str) -> float  (raises ScoringError on failure)
+- AGENT_BREAKER, ScoringError, CircuitOpenError
 """
 
+import math
 import re
+import time
+import zlib
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Optional, Tuple
 
-from config import NATION_AGENT_API_KEY
+from circuit_breaker import CircuitBreaker, backoff_delay
+from config import (
+    NATION_AGENT_API_KEY,
+    NATION_AGENT_BASE_URL,
+    PRESCORE_LOW_VALUE_SCORE,
+    PRESCORE_MIN_CONFIDENCE,
+    PRESCORE_SAMPLE_RATE,
+    SCORING_BACKOFF_BASE,
+    SCORING_BACKOFF_CAP,
+    SCORING_FAILURE_THRESHOLD,
+    SCORING_MAX_RETRIES,
+    SCORING_RESET_TIMEOUT,
+)
+from metrics import HTTP_REQUEST_SECONDS, REGISTRY, SCORING_ERRORS, SCORING_SECONDS, host_of
 
+PRESCORE_TRIAGE = REGISTRY.counter(
+    "nation_radar_prescore_triage_total",
+    "Pre-scorer decisions compared with the agent's score (outcome=low|high)",
+    ("decision", "outcome"))
 
-def extract_score(agent_response: str) -> float:
+
+class ScoringError(Exception):
+    """The Nation Agent could not produce a score for this tweet."""
+
+
+class CircuitOpenError(ScoringError):
+    """Scoring was skipped because the Nation Agent circuit breaker is open."""
+
+
+# Shared by every scoring call in the process so an outage trips it once
+AGENT_BREAKER = CircuitBreaker(
+    "nation_agent",
+    failure_threshold=SCORING_FAILURE_THRESHOLD,
+    reset_timeout=SCORING_RESET_TIMEOUT,
+)
+
+
+def extract_score(agent_response: str) -> Optional[float]:
     """Extract the first floating point or integer number from the agent's response.
 
-    Returns 0.0 if parsing fails.
+    Returns None if there is no number to parse.
     """
     if not isinstance(agent_response, str):
-        return 0.0
+        return None
     match = re.search(r"(-?\d+\.\d+|-?\d+)", agent_response)
     if match:
         try:
             return float(match.group(0))
         except ValueError:
-            return 0.0
-    return 0.0
+            return None
+    return None
 
 
 def normalize_agent_score(score: float) -> float:
@@ -63,48 +102,207 @@ def format_tweet_for_agent(tweet: Dict[str, Any]) -> str:
     return f"{text}\n\nEngagement: {engagement_str}"
 
 
-def get_agent_score(formatted_text: str, timeout_create: int = 15, timeout_message: int = 30) -> float:
-    """Send formatted text to Nation Agent API and extract a numeric score.
+_URL_RE = re.compile(r"https?://\S+")
+
 
-    Returns 0.0 if any error occurs.
+class LocalPreScorer:
+    """Fast local estimate (0.0-1.0) of whether a tweet deserves a remote agent call.
+
+    Signals: engagement, view count, text length, keyword density and the author's
+    stored score history. Tweets below min_confidence are skipped, except for a
+    deterministic sample that is scored remotely to measure triage agreement.
     """
-    base_url = "https://open.service.crestal.network/v1"
+
+    # Author averages are shrunk towards the global mean with this many pseudo-tweets
+    AUTHOR_PRIOR_WEIGHT = 3
+
+    def __init__(self, keywords: Iterable[str], author_stats: Optional[Dict[str, Tuple[int, float]]] = None,
+                 min_confidence: float = PRESCORE_MIN_CONFIDENCE, sample_rate: float = PRESCORE_SAMPLE_RATE,
+                 low_value_score: float = PRESCORE_LOW_VALUE_SCORE) -> None:
+        self.keywords = [k.lower().strip('"').lstrip('$') for k in keywords if k]
+        self.author_stats = author_stats or {}
+        self.min_confidence = min_confidence
+        self.sample_rate = sample_rate
+        self.low_value_score = low_value_score
+        total = sum(n for n, _ in self.author_stats.values())
+        self.global_avg = (
+            sum(n * avg for n, avg in self.author_stats.values()) / total if total else 0.0
+        )
+
+    def _author_signal(self, username: str) -> float:
+        count, avg = self.author_stats.get(username, (0, 0.0))
+        if not count or self.global_avg <= 0:
+            return 0.5
+        k = self.AUTHOR_PRIOR_WEIGHT
+        shrunk = (count * avg + k * self.global_avg) / (count + k)
+        return shrunk / (shrunk + self.global_avg)
+
+    def score(self, tweet: Dict[str, Any]) -> float:
+        engagement = tweet.get("engagement") or {}
+        interactions = (
+            int(engagement.get("likes", 0) or 0)
+            + 2 * int(engagement.get("retweets", 0) or 0)
+            + 3 * int(engagement.get("replies", 0) or 0)
+            + 2 * int(engagement.get("quote_tweets", 0) or 0)
+            + int(engagement.get("bookmarks", 0) or 0)
+        )
+        engagement_signal = min(1.0, math.log1p(interactions) / math.log1p(50))
+        views_signal = min(1.0, math.log1p(int(engagement.get("views", 0) or 0)) / math.log1p(5000))
+
+        text = _URL_RE.sub("", tweet.get("text", "") or "").lower()
+        length_signal = min(1.0, len(text.strip()) / 140)
+
+        words = max(1, len(text.split()))
+        hits = sum(text.count(k) for k in self.keywords)
+        density = hits / words
+        if density == 0:
+            keyword_signal = 0.2
+        elif density > 0.25:
+            keyword_signal = 0.4  # keyword stuffing
+        else:
+            keyword_signal = 1.0
+
+        author_signal = self._author_signal(tweet.get("username", ""))
+
+        return (
+            0.35 * engagement_signal
+            + 0.10 * views_signal
+            + 0.20 * length_signal
+            + 0.10 * keyword_signal
+            + 0.25 * author_signal
+        )
+
+    def should_skip(self, confidence: float) -> bool:
+        return confidence < self.min_confidence
+
+    def in_sample(self, tweet_id: str) -> bool:
+        """Deterministic per-tweet sampling so reruns make the same decision"""
+        bucket = zlib.crc32(str(tweet_id).encode("utf-8")) % 10000
+        return bucket < self.sample_rate * 10000
+
+    def record_outcome(self, confidence: float, remote_score: float) -> None:
+        decision = "skip" if self.should_skip(confidence) else "score"
+        outcome = "low" if remote_score < self.low_value_score else "high"
+        PRESCORE_TRIAGE.inc(decision=decision, outcome=outcome)
+
+
+def prescore_agreement() -> Dict[str, Any]:
+    """Summarize how often pre-scorer triage matched the agent on remotely scored tweets"""
+    counts = {
+        (d, o): PRESCORE_TRIAGE.value(decision=d, outcome=o)
+        for d in ("skip", "score") for o in ("low", "high")
+    }
+    compared = sum(counts.values())
+    agreed = counts[("skip", "low")] + counts[("score", "high")]
+    sampled_skips = counts[("skip", "low")] + counts[("skip", "high")]
+    return {
+        "compared": int(compared),
+        "agreement_rate": round(agreed / compared, 3) if compared else None,
+        "sampled_skips": int(sampled_skips),
+        "skip_precision": round(counts[("skip", "low")] / sampled_skips, 3) if sampled_skips else None,
+    }
+
+
+def _timed_post(url: str, **kwargs) -> requests.Response:
+    start = time.perf_counter()
+    status = "error"
+    try:
+        resp = requests.post(url, **kwargs)
+        status = resp.status_code
+        return resp
+    finally:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, host=host_of(url), status=status)
+
+
+def _request_score(formatted_text: str, timeout_create: int, timeout_message: int) -> float:
+    """Single scoring attempt; raises on any transport or protocol failure"""
+    base_url = NATION_AGENT_BASE_URL.rstrip("/")
     headers = {
         "Authorization": f"Bearer {NATION_AGENT_API_KEY}",
         "Content-Type": "application/json",
     }
 
-    try:
-        # Create chat thread
-        resp = requests.post(f"{base_url}/chats", headers=headers, timeout=timeout_create)
-        resp.raise_for_status()
-        chat_id = resp.json().get("id")
-        if not chat_id:
-            return 0.0
-
-        # Send message
-        data = {"message": formatted_text}
-        msg_resp = requests.post(
-            f"{base_url}/chats/{chat_id}/messages",
-            headers=headers,
-            json=data,
-            timeout=timeout_message,
-        )
-        msg_resp.raise_for_status()
-        messages = msg_resp.json()
-
-        # messages can be a list of {message: str} or a dict {message: str}
-        if isinstance(messages, list) and messages:
-            agent_response = messages[-1].get("message", "")
-        elif isinstance(messages, dict) and "message" in messages:
-            agent_response = messages.get("message", "")
-        else:
-            agent_response = ""
+    # Create chat thread
+    resp = _timed_post(f"{base_url}/chats", headers=headers, timeout=timeout_create)
+    resp.raise_for_status()
+    chat_id = resp.json().get("id")
+    if not chat_id:
+        raise ScoringError("Nation Agent did not return a chat id")
 
-        raw = extract_score(agent_response)
-        return normalize_agent_score(raw)
+    # Send message
+    data = {"message": formatted_text}
+    msg_resp = _timed_post(
+        f"{base_url}/chats/{chat_id}/messages",
+        headers=headers,
+        json=data,
+        timeout=timeout_message,
+    )
+    msg_resp.raise_for_status()
+    messages = msg_resp.json()
 
-    except Exception:
-        return 0.0
+    # messages can be a list of {message: str} or a dict {message: str}
+    if isinstance(messages, list) and messages:
+        agent_response = messages[-1].get("message", "")
+    elif isinstance(messages, dict) and "message" in messages:
+        agent_response = messages.get("message", "")
+    else:
+        agent_response = ""
+
+    if not agent_response or not agent_response.strip():
+        raise ScoringError("Nation Agent returned an empty reply")
+    raw = extract_score(agent_response)
+    if raw is None:
+        raise ScoringError(f"Nation Agent reply has no score: {agent_response[:80]!r}")
+    return normalize_agent_score(raw)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Client errors (bad key, bad request) won't succeed on retry; 429 and 5xx might"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return True
 
 
+def _error_reason(error: Exception) -> str:
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, requests.HTTPError):
+        return "http_error"
+    if isinstance(error, requests.RequestException):
+        return "connection"
+    if isinstance(error, ScoringError):
+        return "protocol"
+    return "other"
+
+
+def get_agent_score(formatted_text: str, timeout_create: int = 15, timeout_message: int = 30,
+                    max_retries: int = SCORING_MAX_RETRIES, breaker: CircuitBreaker = AGENT_BREAKER) -> float:
+    """Send formatted text to Nation Agent API and extract a numeric score.
+
+    Retries transient failures with jittered backoff. Raises CircuitOpenError without
+    calling the API while the breaker is open, and ScoringError once retries are
+    exhausted; a failure never masquerades as a 0.0 score.
+    """
+    start = time.perf_counter()
+    last_error: Exception = None
+    try:
+        for attempt in range(max_retries + 1):
+            if not breaker.allow_request():
+                SCORING_ERRORS.inc(reason="circuit_open")
+                raise CircuitOpenError("Nation Agent circuit breaker is open") from last_error
+            try:
+                score = _request_score(formatted_text, timeout_create, timeout_message)
+            except (requests.RequestException, ValueError, ScoringError) as e:
+                last_error = e
+                breaker.record_failure()
+                SCORING_ERRORS.inc(reason=_error_reason(e))
+                if not _is_retryable(e) or attempt >= max_retries:
+                    break
+                time.sleep(backoff_delay(attempt, SCORING_BACKOFF_BASE, SCORING_BACKOFF_CAP))
+                continue
+            breaker.record_success()
+            return score
+        raise ScoringError(f"Nation Agent scoring failed: {last_error}") from last_error
+    finally:
+        SCORING_SECONDS.observe(time.perf_counter() - start)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Token bucket rate limiter shared by everything that calls one remote API.
+
+Tokens refill continuously at `rate` per second up to `burst`; each request
+takes one, blocking until it is available. A 429 pauses the whole bucket
+(every thread using it), not just the caller that saw it.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from metrics import REGISTRY
+
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram(
+    "nation_radar_rate_limit_wait_seconds", "Time spent waiting on a rate limiter", ("limiter",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+
+
+class TokenBucket:
+    def __init__(self, name: str, rate: float, burst: int = 1) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token (possibly going into debt); returns how long the caller must wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns the seconds waited"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        RATE_LIMIT_WAIT_SECONDS.observe(wait, limiter=self.name)
+        return wait
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available now (never blocks, never goes into debt)"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if now < self._paused_until or self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for `seconds` (the API answered 429)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Engagement refresh for tweets already stored.
+
+Engagement is captured at first fetch; this re-polls it on a decay schedule
+(frequent while a tweet is young, rare once it is old, never past the last
+schedule step). Each run selects the tweets that are due from the database and
+searches for them: first the keywords they were stored under, then their
+authors (from:user, up to refresh.max_author_searches per project) for the ones
+still missing; due tweets neither search returns are reported as missed.
+Search results are matched against stored ids, due updates are written in
+batched transactions with an engagement snapshot each, and only tweets whose
+engagement crosses a log2 bucket boundary are marked 'stale' for re-scoring.
+
+Usage: python refresh_engagement.py
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from analytics_snapshot import refresh_snapshot
+from config import PROJECTS, REFRESH_BATCH_SIZE, REFRESH_MAX_AUTHOR_SEARCHES, REFRESH_MAX_PAGES, REFRESH_SCHEDULE
+from dedup import parse_twitter_date
+from fetchers.new_twitter_fetcher import NewTwitterFetcher
+from metrics import ENGAGEMENT_REFRESHES
+from storage.sqlite_storage import ENGAGEMENT_FIELDS, SQLiteStorage, engagement_bucket
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_interval(age_seconds: float, schedule=REFRESH_SCHEDULE) -> Optional[float]:
+    """Seconds between polls for a tweet of this age, or None once it is too old to refresh"""
+    for max_age, interval in schedule:
+        if age_seconds < max_age:
+            return interval
+    return None
+
+
+class EngagementRefresher:
+    """Collects fresh engagement for stored tweets and writes due updates in batches"""
+
+    def __init__(self, db_storage: SQLiteStorage, schedule=REFRESH_SCHEDULE, batch_size: int = REFRESH_BATCH_SIZE) -> None:
+        self.db_storage = db_storage
+        self.schedule = schedule
+        self.batch_size = batch_size
+        self.stats = {'refreshed': 0, 'rescore_queued': 0, 'due': 0, 'missed': 0}
+        self._pending: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def is_due(self, created_at: str, refreshed_at: Optional[int], now: float) -> bool:
+        created = parse_twitter_date(created_at or "")
+        if created.tzinfo is None:
+            # Unparseable date: treat as old so it is refreshed rarely rather than constantly
+            age = self.schedule[-1][0] - 1 if self.schedule else 0
+        else:
+            age = now - created.timestamp()
+        interval = refresh_interval(age, self.schedule)
+        if interval is None:
+            return False
+        return refreshed_at is None or now - refreshed_at >= interval
+
+    def due_tweets(self, project: str, now: Optional[float] = None) -> Dict[str, Tuple[Optional[str], str]]:
+        """id -> (keyword, username) of the project's stored tweets due for a poll"""
+        if not self.schedule:
+            return {}
+        now = time.time() if now is None else now
+        due = {}
+        for tweet_id, keyword, username, created_ts, refreshed_at in self.db_storage.get_refresh_candidates(
+                project, int(now - self.schedule[-1][0])):
+            interval = refresh_interval(now - created_ts, self.schedule)
+            if interval is not None and (refreshed_at is None or now - refreshed_at >= interval):
+                due[tweet_id] = (keyword, username)
+        return due
+
+    def observe(self, tweets: Iterable[dict]) -> int:
+        """Queue engagement updates for fetched tweets that are already stored and due.
+
+        Tweets that are not stored yet are ignored (the pipeline stores them). Returns
+        the number of updates queued.
+        """
+        fetched = {t['id']: t.get('engagement') or {} for t in tweets if t.get('id')}
+        if not fetched:
+            return 0
+        now = time.time()
+        queued = 0
+        state = self.db_storage.get_refresh_state(fetched.keys())
+        with self._lock:
+            for tweet_id, (created_at, refreshed_at, bucket) in state.items():
+                if tweet_id in self._pending or not self.is_due(created_at, refreshed_at, now):
+                    ENGAGEMENT_REFRESHES.inc(outcome="not_due")
+                    continue
+                engagement = {f: int(fetched[tweet_id].get(f, 0) or 0) for f in ENGAGEMENT_FIELDS}
+                # Rows stored before buckets existed get a bucket without forcing a re-score
+                rescore = bucket is not None and engagement_bucket(engagement) != bucket
+                self._pending[tweet_id] = (engagement, rescore)
+                queued += 1
+            flush = len(self._pending) >= self.batch_size
+        if flush:
+            self.flush()
+        return queued
+
+    def flush(self) -> int:
+        """Write all queued updates in one transaction"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        updates = [(tweet_id, engagement, rescore) for tweet_id, (engagement, rescore) in pending.items()]
+        self.db_storage.apply_engagement_updates(updates)
+        rescored = sum(1 for _, _, rescore in updates if rescore)
+        ENGAGEMENT_REFRESHES.inc(len(updates) - rescored, outcome="updated")
+        ENGAGEMENT_REFRESHES.inc(rescored, outcome="rescore_queued")
+        with self._lock:
+            self.stats['refreshed'] += len(updates)
+            self.stats['rescore_queued'] += rescored
+        return len(updates)
+
+
+def refresh_project(project: dict, refresher: EngagementRefresher,
+                    max_author_searches: int = REFRESH_MAX_AUTHOR_SEARCHES) -> int:
+    """Poll the project's due tweets; returns how many of them no search returned"""
+    name = project['name']
+    fetcher = NewTwitterFetcher(
+        days_lookback=project['days_lookback'],
+        max_pages=REFRESH_MAX_PAGES,
+        tickers=project['tickers'],
+    )
+    due = refresher.due_tweets(name)
+    total_due = len(due)
+
+    def poll(query: str) -> None:
+        try:
+            tweets = fetcher.fetch_engagement(query)
+        except Exception as e:
+            logger.error(f"[{name}] Engagement refresh failed for '{query}': {e}")
+            return
+        queued = refresher.observe(tweets)
+        found = [tweet.id for tweet in tweets if tweet.id in due]
+        for tweet_id in found:
+            del due[tweet_id]
+        print(f"[{name}] {query}: {len(tweets)} fetched, {len(found)} due found, {queued} refreshed")
+
+    # Keywords holding the most due tweets first; keywords with none are not searched
+    by_keyword = Counter(keyword or '' for keyword, _ in due.values())
+    for keyword in sorted(project['keywords'], key=lambda k: -by_keyword[k]):
+        if not due:
+            break
+        if by_keyword[keyword]:
+            poll(keyword)
+
+    # Then the authors of the due tweets still missing, most missing first
+    by_author = Counter(username for _, username in due.values() if username)
+    for username, _ in by_author.most_common(max_author_searches):
+        if not due:
+            break
+        poll(f"from:{username}")
+    refresher.flush()
+
+    missed = len(due)
+    ENGAGEMENT_REFRESHES.inc(missed, outcome="missed")
+    refresher.stats['due'] += total_due
+    refresher.stats['missed'] += missed
+    print(f"[{name}] {total_due} tweets due, {total_due - missed} polled, {missed} not returned by any search")
+    return missed
+
+
+def main(projects: List[dict] = PROJECTS) -> dict:
+    # Imported here: run_pipeline configures file logging at import time
+    from run_pipeline import drain_rescore_queue, new_stats
+
+    db_storage = SQLiteStorage(db_path="tweets.db")
+    refresher = EngagementRefresher(db_storage)
+    for project in projects:
+        refresh_project(project, refresher)
+
+    # Re-score tweets whose engagement bucket changed
+    stats = new_stats()
+    drain_rescore_queue(db_storage, stats)
+    print(f"{refresher.stats['due']} tweets due, {refresher.stats['missed']} missed by every search; "
+          f"refreshed {refresher.stats['refreshed']} tweets, "
+          f"{refresher.stats['rescore_queued']} queued for re-scoring, {stats['tweets_rescored']} re-scored")
+    db_storage.close()
+    refresh_snapshot(db_path="tweets.db")
+    return refresher.stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Re-run parsing, filtering and dedup over cached raw search responses.
+
+Every page the fetcher receives is kept in the on-disk response cache
+(response_cache: in config.yaml). This replays those pages through the
+current _parse_tweet_result, lookback and quality filters and text dedup,
+without any API calls, and reports what each stage keeps and how the result
+differs from what is stored: tweets that would now be added, and stored
+tweets the current filters would reject. The lookback filter is applied
+relative to when each page was fetched, so old cache entries behave as they
+did at fetch time.
+
+With --store, tweets that are not stored yet are inserted the way backfill.py
+does it (pre-scored locally, the rest left for the re-scoring queue).
+
+Usage: python reprocess.py [--project NAME] [--keyword K ...] [--since-days N] [--store]
+       python reprocess.py --stats | --evict
+"""
+
+import argparse
+import json
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from config import PRESCORE_ENABLED, PROJECTS
+from dedup import earliest_unique_tweets
+from fetchers.new_twitter_fetcher import NewTwitterFetcher
+from nation_agent import LocalPreScorer
+from storage.response_cache import ResponseCache
+from storage.sqlite_storage import PRESCORED, SQLiteStorage
+from tweet_record import compact
+
+logger = logging.getLogger(__name__)
+
+
+def new_reprocess_stats() -> dict:
+    return {'pages': 0, 'bytes': 0, 'missing': 0, 'parsed': 0, 'in_lookback': 0, 'unique_ids': 0,
+            'quality': 0, 'kept': 0, 'new': 0, 'now_rejected': 0, 'stored': 0, 'prescored': 0}
+
+
+def reprocess_keyword(fetcher: NewTwitterFetcher, cache: ResponseCache, db_storage: SQLiteStorage,
+                      project: str, keyword: str, since: Optional[float], store: bool,
+                      prescorer: Optional[LocalPreScorer], stats: dict) -> None:
+    counts = new_reprocess_stats()
+    queries = [keyword] + fetcher._generate_focused_variations(keyword)
+    entries = [entry for query in queries for entry in cache.iter_responses(query=query, since=since)]
+    # Newest pages first, so the id dedup below keeps the freshest engagement
+    entries.sort(key=lambda entry: entry['fetched_at'], reverse=True)
+
+    tweets = []
+    parsed_ids = set()
+    for entry in entries:
+        body = cache.load(entry['digest'])
+        if body is None:
+            counts['missing'] += 1
+            continue
+        counts['pages'] += 1
+        counts['bytes'] += len(body)
+        page = fetcher._extract_tweets_from_response(json.loads(body))
+        counts['parsed'] += len(page)
+        parsed_ids.update(tweet.id for tweet in page)
+        fetcher._filter_tweets_by_date(page, now=datetime.fromtimestamp(entry['fetched_at']))
+        tweets.extend(page)
+    counts['in_lookback'] = len(tweets)
+
+    # Same stages as NewTwitterFetcher.fetch and the pipeline's batch dedup
+    seen_ids = set()
+
+    def first_seen(tweet) -> bool:
+        if tweet.id in seen_ids:
+            return False
+        seen_ids.add(tweet.id)
+        return True
+
+    compact(tweets, first_seen)
+    counts['unique_ids'] = len(tweets)
+    fetcher._filter_quality_content(tweets, keyword)
+    counts['quality'] = len(tweets)
+    tweets = earliest_unique_tweets(tweets)
+    counts['kept'] = len(tweets)
+
+    stored_ids = set(db_storage.get_refresh_state(parsed_ids, project=project))
+    kept_ids = {tweet.id for tweet in tweets}
+    new_tweets = [tweet for tweet in tweets if tweet.id not in stored_ids]
+    counts['new'] = len(new_tweets)
+    counts['now_rejected'] = len(stored_ids - kept_ids)
+
+    if store and new_tweets:
+        for tweet in new_tweets:
+            tweet['project'] = project
+            tweet['keyword'] = keyword
+            if prescorer is not None and prescorer.should_skip(prescorer.score(tweet)):
+                tweet['score_status'] = PRESCORED
+                counts['prescored'] += 1
+        counts['stored'] = db_storage.append_rows(new_tweets)
+
+    for key, value in counts.items():
+        stats[key] += value
+    print(f"[{project}] {keyword}: {counts['pages']} pages, {counts['parsed']} parsed -> "
+          f"{counts['in_lookback']} in lookback -> {counts['unique_ids']} unique ids -> "
+          f"{counts['quality']} quality -> {counts['kept']} after text dedup; "
+          f"{counts['new']} not stored yet, {counts['now_rejected']} stored tweets now rejected"
+          + (f", {counts['stored']} stored" if store else ""))
+
+
+def print_cache_stats(cache: ResponseCache) -> None:
+    stats = cache.stats()
+    print(f"Response cache at {cache.directory}: {stats['entries']} pages in {stats['objects']} objects, "
+          f"{stats['bytes'] / 1e6:.1f} MB compressed ({stats['raw_bytes'] / 1e6:.1f} MB raw)")
+    if stats['entries']:
+        oldest = time.strftime('%Y-%m-%d %H:%M', time.localtime(stats['oldest']))
+        newest = time.strftime('%Y-%m-%d %H:%M', time.localtime(stats['newest']))
+        print(f"  fetched {oldest} .. {newest}")
+    for query, pages in sorted(cache.queries().items()):
+        print(f"  {query}: {pages} pages")
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Reprocess cached raw search responses")
+    parser.add_argument('--project', help="only this project (default: all)")
+    parser.add_argument('--keyword', action='append', help="only these keywords (repeatable)")
+    parser.add_argument('--since-days', type=float, help="only pages fetched in the last N days")
+    parser.add_argument('--store', action='store_true', help="insert tweets that are not stored yet")
+    parser.add_argument('--stats', action='store_true', help="show what the cache holds and exit")
+    parser.add_argument('--evict', action='store_true', help="apply the TTL and size limits now and exit")
+    args = parser.parse_args(argv)
+
+    cache = ResponseCache()
+    stats = new_reprocess_stats()
+    try:
+        if args.stats:
+            print_cache_stats(cache)
+            return stats
+        if args.evict:
+            removed, freed = cache.evict()
+            print(f"Evicted {removed} pages, freed {freed / 1e6:.1f} MB")
+            return stats
+
+        projects = [p for p in PROJECTS if not args.project or p['name'] == args.project]
+        if not projects:
+            parser.error(f"unknown project: {args.project}")
+        since = time.time() - args.since_days * 86400 if args.since_days else None
+
+        db_storage = SQLiteStorage(db_path="tweets.db")
+        start = time.perf_counter()
+        try:
+            for project in projects:
+                fetcher = NewTwitterFetcher(days_lookback=project['days_lookback'], tickers=project['tickers'])
+                prescorer = None
+                if args.store and PRESCORE_ENABLED:
+                    prescorer = LocalPreScorer(project['keywords'], db_storage.get_author_stats())
+                for keyword in args.keyword or project['keywords']:
+                    reprocess_keyword(fetcher, cache, db_storage, project['name'], keyword,
+                                      since, args.store, prescorer, stats)
+        finally:
+            db_storage.close()
+        elapsed = time.perf_counter() - start
+    finally:
+        cache.close()
+
+    print(f"\nReprocessed {stats['pages']} pages ({stats['bytes'] / 1e6:.1f} MB) in {elapsed:.2f}s "
+          f"({stats['pages'] / elapsed if elapsed else 0:.0f} pages/s): {stats['parsed']} parsed, "
+          f"{stats['kept']} kept, {stats['new']} not stored yet, {stats['now_rejected']} stored tweets now rejected"
+          + (f", {stats['stored']} stored ({stats['prescored']} prescored)" if args.store else "")
+          + (f"; {stats['missing']} evicted pages skipped" if stats['missing'] else ""))
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
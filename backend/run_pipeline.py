@@ -8,16 +8,30 @@ ENHANCED VERSION: Removed broken detail API calls, optimized rate limiting
 import sys
 import os
 import re
-import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from fetchers.new_twitter_fetcher import NewTwitterFetcher
 # CSV storage removed - using SQLite only
-from storage.sqlite_storage import SQLiteStorage
+from storage.sqlite_storage import SQLiteStorage, PRESCORED
+from storage.checkpoint_store import CheckpointStore
 import requests
-from config import KEYWORDS, DAYS_LOOKBACK
-from nation_agent import format_tweet_for_agent, get_agent_score
+from circuit_breaker import OPEN
+from config import PROJECTS, PIPELINE_MAX_WORKERS, MAX_TWEETS_PER_KEYWORD, RESCORE_BATCH_SIZE, PRESCORE_ENABLED
+from nation_agent import (
+    AGENT_BREAKER,
+    CircuitOpenError,
+    LocalPreScorer,
+    ScoringError,
+    format_tweet_for_agent,
+    get_agent_score,
+    prescore_agreement,
+)
 from dedup import earliest_unique_tweets, compute_text_hash, load_seen_hashes, save_seen_hashes
+from metrics import DEDUP_HITS, write_run_summary
+from refresh_engagement import EngagementRefresher
+from analytics_snapshot import refresh_snapshot
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -51,137 +65,331 @@ def engagement_has_signal(engagement: dict) -> bool:
     except Exception:
         return False
 
-def main():
-    start_time = datetime.now()
-    print("Starting Nation Radar Pipeline...")
-
-    # Use the new Twitter fetcher
-    fetcher = NewTwitterFetcher(days_lookback=DAYS_LOOKBACK)
-    
-    # Use SQLite as primary storage (more efficient and reliable)
-    db_storage = SQLiteStorage(db_path="tweets.db")
-    seen_ids = set()
-    seen_hashes = load_seen_hashes()
-    all_results = []
-    
-    # Statistics tracking
-    stats = {
+def new_stats() -> dict:
+    return {
         'keywords_processed': 0,
+        'keywords_total': 0,
         'tweets_found': 0,
         'tweets_processed': 0,
         'tweets_stored': 0,
+        'tweets_unscored': 0,
+        'tweets_rescored': 0,
+        'prescore_skipped': 0,
+        'prescore_sampled': 0,
         'api_errors': 0,
-        'duplicates_skipped': 0
+        'duplicates_skipped': 0,
+        'scores_shared': 0
     }
+
+
+def scoped_hash(project_name, content_hash):
+    """Entry in the seen-hashes set and file: content dedup is per project"""
+    return f"{project_name}:{content_hash}"
+
+
+def process_tweet(tweet, project_name, db_storage, seen_ids, seen_hashes, seen_lock, stats, prescorer=None):
+    """Score and store one tweet. Returns (username, score, tweet_id) if stored, else None.
+
+    Dedup is per project: a tweet matching several projects is stored for each of them,
+    reusing the agent score of a copy already scored for another project.
+    Tweets the pre-scorer rates below its confidence threshold are stored as
+    'prescored' without a remote call. If the Nation Agent is unavailable the tweet is
+    stored unscored (score None) and picked up later by drain_rescore_queue.
+    """
+    tweet_id = tweet.get('id')
+    with seen_lock:
+        if not tweet_id or (project_name, tweet_id) in seen_ids:
+            DEDUP_HITS.inc(layer="run_tweet_id")
+            stats['duplicates_skipped'] += 1
+            return None
+        seen_ids.add((project_name, tweet_id))
+    stats['tweets_processed'] += 1
+    tweet['project'] = project_name
+    
+    # Use engagement from search API only (removed broken detail API calls)
+    existing_engagement = tweet.get('engagement')
+    
+    if existing_engagement and engagement_has_signal(existing_engagement):
+        # Use engagement data from search API
+        tweet['engagement'] = existing_engagement
+        logger.debug(f"Using search API engagement for tweet {tweet_id}")
+    else:
+        # Default engagement if none available
+        tweet['engagement'] = {"likes": 0, "retweets": 0, "replies": 0, "views": 0, "bookmarks": 0, "quote_tweets": 0}
+        logger.debug(f"No engagement data for tweet {tweet_id}, using defaults")
     
-    total_keywords = len(KEYWORDS)
-    for i, keyword in enumerate(KEYWORDS, 1):
-        print(f"Processing keyword {i}/{total_keywords}: {keyword}")
+    # Skip if we've already scored near-identical content in past runs
+    # (the database check covers runs that crashed before saving seen hashes)
+    content_hash = compute_text_hash(tweet.get('text', ''))
+    seen_hash = scoped_hash(project_name, content_hash)
+    with seen_lock:
+        if seen_hash in seen_hashes:
+            DEDUP_HITS.inc(layer="seen_hashes")
+            stats['duplicates_skipped'] += 1
+            return None
+    if db_storage.has_content(content_hash, project_name):
+        DEDUP_HITS.inc(layer="db_precheck")
+        with seen_lock:
+            seen_hashes.add(seen_hash)
+        stats['duplicates_skipped'] += 1
+        return None
+    
+    # Already scored for another project: the agent would see the same text and engagement
+    shared_score = db_storage.get_shared_score(tweet_id)
+    confidence = tweet.get('prescore')
+    skip_remote = (shared_score is None and prescorer is not None and confidence is not None
+                   and prescorer.should_skip(confidence))
+    if skip_remote and prescorer.in_sample(tweet_id):
+        # Score a sample of skipped tweets anyway to measure triage agreement
+        skip_remote = False
+        stats['prescore_sampled'] += 1
+    
+    if shared_score is not None:
+        score = shared_score
+        stats['scores_shared'] += 1
+    elif skip_remote:
+        # No agent score: stored without one so it never counts in score stats
+        score = None
+        tweet['score_status'] = PRESCORED
+        stats['prescore_skipped'] += 1
+    else:
+        formatted = format_tweet_for_agent(tweet)
+        logger.debug(f"\n--- Message sent to agent ---\n{formatted}\n----------------------------\n")
         
         try:
-            tweets = fetcher.fetch(keyword)
-            stats['keywords_processed'] += 1
-            
-            if not tweets:
-                print(f"No tweets found for: {keyword}")
+            score = get_agent_score(formatted)
+            if prescorer is not None and confidence is not None:
+                prescorer.record_outcome(confidence, score)
+        except CircuitOpenError:
+            # Agent is down: fail fast and defer scoring instead of waiting on timeouts
+            score = None
+        except ScoringError as e:
+            logger.error(f"Error getting agent score for tweet {tweet_id}: {e}")
+            stats['api_errors'] += 1
+            score = None
+    tweet['score'] = score
+    
+    # Store to database (enforces cross-run dedup)
+    stored = db_storage.append_row(tweet)
+    if stored:
+        if skip_remote:
+            logger.info(f"[{project_name}] Stored tweet {tweet['id']} by @{tweet['username']} prescored (agent call skipped)")
+        elif score is None:
+            logger.info(f"[{project_name}] Stored tweet {tweet['id']} by @{tweet['username']} unscored (queued for re-scoring)")
+            stats['tweets_unscored'] += 1
+        else:
+            logger.info(f"[{project_name}] Stored tweet {tweet['id']} by @{tweet['username']} with score {score}")
+        stats['tweets_stored'] += 1
+    else:
+        logger.info(f"[{project_name}] Skipped duplicate tweet {tweet['id']} by @{tweet['username']} (already processed)")
+        stats['duplicates_skipped'] += 1
+    
+    # Mark this content as seen so future reposts won't be scored again
+    with seen_lock:
+        seen_hashes.add(seen_hash)
+    
+    return (tweet['username'], score, tweet['id']) if stored else None
+
+
+def drain_rescore_queue(db_storage, stats):
+    """Score tweets that were stored while the Nation Agent was unavailable.
+
+    Stops as soon as the circuit breaker opens again; the rest stays queued.
+    Score sketches invalidated by re-scored stale tweets are rebuilt once at the end.
+    """
+    try:
+        while AGENT_BREAKER.state != OPEN:
+            batch = db_storage.get_unscored_tweets(limit=RESCORE_BATCH_SIZE)
+            if not batch:
+                return
+            for tweet in batch:
+                try:
+                    score = get_agent_score(format_tweet_for_agent(tweet))
+                except ScoringError as e:
+                    logger.warning(f"Re-scoring paused, {db_storage.count_unscored()} tweets still queued: {e}")
+                    return
+                db_storage.update_score(tweet['id'], score)
+                stats['tweets_rescored'] += 1
+                logger.info(f"Re-scored tweet {tweet['id']} by @{tweet['username']}: {score}")
+    finally:
+        db_storage.rebuild_dirty_sketches()
+
+
+def run_project(project, db_storage, checkpoints, run_id, seen_ids, seen_hashes, seen_lock, author_stats=None, refresher=None):
+    """Fetch, score and store tweets for a single project.
+
+    seen_ids/seen_hashes are shared across project workers and guarded by seen_lock;
+    their entries are scoped by project ((project, id) and scoped_hash).
+    author_stats (username -> (count, avg_score)) feeds the local pre-scorer.
+    refresher (EngagementRefresher) picks up fresh engagement for fetched tweets that are already stored.
+    Progress is checkpointed per keyword so an interrupted run resumes where it stopped.
+    Returns (stats, results) where results is a list of (username, score, tweet_id).
+    """
+    name = project['name']
+    keywords = project['keywords']
+    fetcher = NewTwitterFetcher(
+        days_lookback=project['days_lookback'],
+        max_pages=project['max_pages'],
+        tickers=project['tickers'],
+    )
+    prescorer = LocalPreScorer(keywords, author_stats) if PRESCORE_ENABLED else None
+    stats = new_stats()
+    stats['keywords_total'] = len(keywords)
+    results = []
+
+    total_keywords = len(keywords)
+    for i, keyword in enumerate(keywords, 1):
+        print(f"[{name}] Processing keyword {i}/{total_keywords}: {keyword}")
+        
+        try:
+            status, count = checkpoints.keyword_state(run_id, name, keyword)
+            if status == 'done':
+                print(f"[{name}] Already completed in this run, skipping: {keyword}")
+                stats['keywords_processed'] += 1
                 continue
             
-            stats['tweets_found'] += len(tweets)
+            if status == 'fetched':
+                # Fetch finished before the interruption; only scoring remains
+                tweets = checkpoints.load_pending(run_id, name, keyword)
+                print(f"[{name}] Resuming {len(tweets)} pending tweets for: {keyword}")
+            else:
+                # Ticker searches are post-filtered to exact $TICKER matches by the fetcher
+                tweets = fetcher.fetch(keyword, checkpoint=checkpoints.for_keyword(run_id, name, keyword))
+                stats['tweets_found'] += len(tweets)
+                if refresher is not None:
+                    refresher.observe(tweets)
+                
+                # Deduplicate by normalized text within this batch, keep earliest
+                fetched_count = len(tweets)
+                tweets = earliest_unique_tweets(tweets)
+                DEDUP_HITS.inc(fetched_count - len(tweets), layer="batch_text")
+                
+                # Most promising tweets first, so the per-keyword cap drops the weakest
+                if prescorer is not None:
+                    for tweet in tweets:
+                        tweet['prescore'] = prescorer.score(tweet)
+                    tweets.sort(key=lambda t: t['prescore'], reverse=True)
+                checkpoints.save_pending(run_id, name, keyword, tweets)
+            stats['keywords_processed'] += 1
             
-            # Deduplicate by normalized text within this batch, keep earliest
-            tweets = earliest_unique_tweets(tweets)
+            if not tweets:
+                print(f"[{name}] No tweets found for: {keyword}")
             
-            count = 0
             for tweet in tweets:
-                # Post-filter: For $NATION, only process tweets containing $NATION (not #NATION or plain 'nation')
-                if keyword == "$NATION":
-                    if not contains_ticker(tweet['text'], "NATION"):
-                        continue  # Skip tweets that don't have $NATION exactly
-                        
-                if count >= 100:  # Process 100 tweets per keyword (optimized)
-                    print(f"Reached limit of 100 tweets for: {keyword}")
+                if count >= MAX_TWEETS_PER_KEYWORD:
+                    print(f"[{name}] Reached limit of {MAX_TWEETS_PER_KEYWORD} tweets for: {keyword}")
                     break
-                    
-                tweet_id = tweet.get('id')
-                if not tweet_id or tweet_id in seen_ids:
-                    stats['duplicates_skipped'] += 1
-                    continue
-                    
-                seen_ids.add(tweet_id)
-                stats['tweets_processed'] += 1
-                
-                # Use engagement from search API only (removed broken detail API calls)
-                existing_engagement = tweet.get('engagement') if isinstance(tweet, dict) else None
-                
-                if existing_engagement and engagement_has_signal(existing_engagement):
-                    # Use engagement data from search API
-                    tweet['engagement'] = existing_engagement
-                    logger.debug(f"Using search API engagement for tweet {tweet_id}")
-                else:
-                    # Default engagement if none available
-                    tweet['engagement'] = {"likes": 0, "retweets": 0, "replies": 0, "views": 0, "bookmarks": 0, "quote_tweets": 0}
-                    logger.debug(f"No engagement data for tweet {tweet_id}, using defaults")
                 
-                # Skip if we've already scored near-identical content in past runs
-                content_hash = compute_text_hash(tweet.get('text', ''))
-                if content_hash in seen_hashes:
-                    stats['duplicates_skipped'] += 1
-                    continue
-                    
-                formatted = format_tweet_for_agent(tweet)
-                logger.debug(f"\n--- Message sent to agent ---\n{formatted}\n----------------------------\n")
-                
-                try:
-                    score = get_agent_score(formatted)
-                    tweet['score'] = score
-                except Exception as e:
-                    logger.error(f"Error getting agent score for tweet {tweet_id}: {e}")
-                    stats['api_errors'] += 1
-                    tweet['score'] = 0
-                
-                # Store to database (enforces cross-run dedup)
-                if db_storage.append_row(tweet):
-                    all_results.append((tweet['username'], score, tweet['id']))
-                    logger.info(f"Stored tweet {tweet['id']} by @{tweet['username']} with score {score}")
-                    stats['tweets_stored'] += 1
+                tweet['keyword'] = keyword
+                result = process_tweet(tweet, name, db_storage, seen_ids, seen_hashes, seen_lock, stats, prescorer)
+                if result:
+                    results.append(result)
                     count += 1
-                else:
-                    logger.info(f"Skipped duplicate tweet {tweet['id']} by @{tweet['username']} (already processed)")
-                    stats['duplicates_skipped'] += 1
-                
-                # Mark this content as seen so future reposts won't be scored again
-                seen_hashes.add(content_hash)
-                
-                # Rate limiting: Only between keywords, not between tweets
-                # Removed 2-second delay here - it was causing excessive slowdown
+                checkpoints.complete_tweet(run_id, name, keyword, tweet.get('id'), stored=bool(result))
+            
+            checkpoints.complete_keyword(run_id, name, keyword)
+            with seen_lock:
+                save_seen_hashes(seen_hashes)
                 
         except Exception as e:
-            logger.error(f"Error processing keyword '{keyword}': {e}")
+            logger.error(f"[{name}] Error processing keyword '{keyword}': {e}")
             stats['api_errors'] += 1
             continue
-        
-        # Add delay between keywords only
-        if i < total_keywords:  # Don't delay after the last keyword
-            time.sleep(2)
+
+    return stats, results
+
+
+def main(resume: bool = True):
+    start_time = datetime.now()
+    print("Starting Nation Radar Pipeline...")
+    
+    # Use SQLite as primary storage (more efficient and reliable)
+    db_storage = SQLiteStorage(db_path="tweets.db")
+    checkpoints = CheckpointStore(db_path="tweets.db")
+    run_id, resumed = checkpoints.start_run(resume=resume)
+    if resumed:
+        print(f"Resuming interrupted pipeline run #{run_id}")
+    seen_ids = set()
+    # Unscoped hashes from before per-project dedup are dropped; content_hashes still covers them
+    seen_hashes = {h for h in load_seen_hashes() if ':' in h}
+    seen_lock = threading.Lock()
+    all_results = []
+    
+    # Statistics tracking
+    stats = new_stats()
+    
+    # Tweets left unscored by an earlier outage are scored first
+    drain_rescore_queue(db_storage, stats)
+    author_stats = db_storage.get_author_stats() if PRESCORE_ENABLED else None
+    refresher = EngagementRefresher(db_storage)
+    
+    # Projects run in parallel; each worker walks its own keywords sequentially
+    workers = max(1, min(PIPELINE_MAX_WORKERS, len(PROJECTS)))
+    print(f"Processing {len(PROJECTS)} project(s) with {workers} worker(s)")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_project, project, db_storage, checkpoints, run_id, seen_ids, seen_hashes, seen_lock, author_stats, refresher): project['name']
+            for project in PROJECTS
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                project_stats, project_results = future.result()
+            except Exception as e:
+                logger.error(f"Error processing project '{name}': {e}")
+                stats['api_errors'] += 1
+                continue
+            for key, value in project_stats.items():
+                stats[key] += value
+            all_results.extend(project_results)
+            print(f"[{name}] Stored {project_stats['tweets_stored']} tweets")
+    
+    # Write refreshed engagement; bucket changes join the re-scoring queue
+    refresher.flush()
+    stats['engagement_refreshed'] = refresher.stats['refreshed']
+    stats['engagement_rescore_queued'] = refresher.stats['rescore_queued']
+    
+    # Score anything deferred during this run if the agent has recovered
+    drain_rescore_queue(db_storage, stats)
     
     # Persist seen hashes across runs
     save_seen_hashes(seen_hashes)
+    checkpoints.finish_run(run_id)
     
     # Calculate execution time
-    execution_time = datetime.now() - start_time
+    finished_at = datetime.now()
+    execution_time = finished_at - start_time
+    if PRESCORE_ENABLED:
+        stats['prescore_agreement'] = prescore_agreement()
+    summary_path = write_run_summary(run_id, stats, start_time, finished_at)
+    
+    # Dashboard aggregates for the API to memory-map on its next (re)start
+    refresh_snapshot(db_path="tweets.db")
     
     print(f"\nPipeline completed in {execution_time}")
-    print(f"Keywords processed: {stats['keywords_processed']}/{len(KEYWORDS)}")
+    print(f"Keywords processed: {stats['keywords_processed']}/{stats['keywords_total']}")
     print(f"Tweets found: {stats['tweets_found']}")
-    print(f"Tweets stored: {stats['tweets_stored']}")
+    print(f"Tweets stored: {stats['tweets_stored']} "
+          f"({stats['scores_shared']} reused the score of a copy stored for another project)")
     print(f"Duplicates skipped: {stats['duplicates_skipped']}")
+    print(f"Unscored (queued): {stats['tweets_unscored']}, re-scored: {stats['tweets_rescored']}")
+    print(f"Engagement refreshed: {stats['engagement_refreshed']} "
+          f"({stats['engagement_rescore_queued']} crossed a bucket and were queued for re-scoring)")
+    if PRESCORE_ENABLED:
+        agreement = stats['prescore_agreement']
+        print(f"Pre-scorer skipped {stats['prescore_skipped']} remote calls "
+              f"(sampled {stats['prescore_sampled']}; agreement {agreement['agreement_rate']}, "
+              f"skip precision {agreement['skip_precision']} over {agreement['compared']} compared)")
+    print(f"Run summary: {summary_path}")
     
-    if all_results:
+    scored_results = [r for r in all_results if r[1] is not None]
+    if scored_results:
         print("\nTop 5 by score:")
-        for username, score, tweet_id in sorted(all_results, key=lambda x: -x[1])[:5]:
+        for username, score, tweet_id in sorted(scored_results, key=lambda x: -x[1])[:5]:
             print(f"  @{username}: {score}")
     
     print("Pipeline execution completed successfully!")
 
 if __name__ == "__main__":
-    main()
+    # --no-resume abandons any interrupted run and starts from scratch
+    main(resume="--no-resume" not in sys.argv)
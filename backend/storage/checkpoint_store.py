@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Durable pipeline checkpoints stored alongside the tweets in SQLite.
+
+A pipeline run records, per (project, keyword):
+- pagination cursors and the raw tweets of every page already fetched
+- the deduplicated tweets still waiting to be scored/stored
+- whether the keyword has been fully processed
+
+If a run dies partway through, the next run picks up the unfinished run id
+and continues from exactly those checkpoints instead of re-fetching.
+
+Historical backfills (backfill.py) keep one cursor per (project, keyword,
+category) independent of runs, so a deep walk can be stopped and resumed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import DB_COMMIT_SECONDS
+from tweet_record import TweetRecord
+
+
+def _dump(tweet: TweetRecord) -> Dict[str, Any]:
+    return tweet.to_dict() if isinstance(tweet, TweetRecord) else tweet
+
+
+class CheckpointStore:
+    def __init__(self, db_path: str = "tweets.db") -> None:
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self._lock = threading.RLock()
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pipeline_runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                status TEXT NOT NULL DEFAULT 'running',
+                started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                finished_at DATETIME
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS run_keywords (
+                run_id INTEGER,
+                project TEXT,
+                keyword TEXT,
+                status TEXT NOT NULL,
+                stored INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (run_id, project, keyword)
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS run_cursors (
+                run_id INTEGER,
+                project TEXT,
+                keyword TEXT,
+                query TEXT,
+                category TEXT,
+                cursor TEXT,
+                pages INTEGER NOT NULL DEFAULT 0,
+                exhausted INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (run_id, project, keyword, query, category)
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS run_pages (
+                run_id INTEGER,
+                project TEXT,
+                keyword TEXT,
+                query TEXT,
+                category TEXT,
+                page INTEGER,
+                tweets TEXT,
+                PRIMARY KEY (run_id, project, keyword, query, category, page)
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS run_pending (
+                run_id INTEGER,
+                project TEXT,
+                keyword TEXT,
+                tweet_id TEXT,
+                position INTEGER,
+                tweet TEXT,
+                PRIMARY KEY (run_id, project, keyword, tweet_id)
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS backfill_cursors (
+                project TEXT,
+                keyword TEXT,
+                category TEXT,
+                cursor TEXT,
+                pages INTEGER NOT NULL DEFAULT 0,
+                stored INTEGER NOT NULL DEFAULT 0,
+                oldest_ts INTEGER,
+                done INTEGER NOT NULL DEFAULT 0,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (project, keyword, category)
+            );
+            """
+        )
+        self.conn.commit()
+
+    def _commit(self, operation: str) -> None:
+        with DB_COMMIT_SECONDS.time(operation=operation):
+            self.conn.commit()
+
+    # --- Runs ---
+
+    def start_run(self, resume: bool = True) -> Tuple[int, bool]:
+        """Return (run_id, resumed). Resumes the latest unfinished run when asked to."""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute("SELECT run_id FROM pipeline_runs WHERE status = 'running' ORDER BY run_id DESC LIMIT 1")
+            row = cur.fetchone()
+            if row and resume:
+                return row[0], True
+            if row:
+                # Abandon stale runs so they are never resumed later
+                cur.execute("UPDATE pipeline_runs SET status = 'abandoned' WHERE status = 'running'")
+                self._purge_finished(cur)
+            cur.execute("INSERT INTO pipeline_runs (status) VALUES ('running')")
+            self._commit("checkpoint_start_run")
+            return cur.lastrowid, False
+
+    def finish_run(self, run_id: int) -> None:
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "UPDATE pipeline_runs SET status = 'completed', finished_at = CURRENT_TIMESTAMP WHERE run_id = ?",
+                (run_id,),
+            )
+            self._purge_finished(cur)
+            self._commit("checkpoint_finish_run")
+
+    @staticmethod
+    def _purge_finished(cur: sqlite3.Cursor) -> None:
+        """Drop checkpoint payloads belonging to runs that will never resume"""
+        for table in ("run_keywords", "run_cursors", "run_pages", "run_pending"):
+            cur.execute(
+                f"DELETE FROM {table} WHERE run_id IN "
+                "(SELECT run_id FROM pipeline_runs WHERE status != 'running')"
+            )
+
+    # --- Keywords ---
+
+    def keyword_state(self, run_id: int, project: str, keyword: str) -> Tuple[Optional[str], int]:
+        """Return (status, stored_count); status is None, 'fetched' or 'done'"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "SELECT status, stored FROM run_keywords WHERE run_id = ? AND project = ? AND keyword = ?",
+                (run_id, project, keyword),
+            )
+            row = cur.fetchone()
+        return (row[0], row[1]) if row else (None, 0)
+
+    def save_pending(self, run_id: int, project: str, keyword: str, tweets: List[TweetRecord]) -> None:
+        """Record the deduplicated batch awaiting scoring and drop the raw pages"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.executemany(
+                "INSERT OR REPLACE INTO run_pending (run_id, project, keyword, tweet_id, position, tweet) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, project, keyword, tweet.get("id"), position, json.dumps(_dump(tweet), ensure_ascii=False))
+                    for position, tweet in enumerate(tweets)
+                    if tweet.get("id")
+                ],
+            )
+            cur.execute(
+                "INSERT OR REPLACE INTO run_keywords (run_id, project, keyword, status, stored) VALUES (?, ?, ?, 'fetched', 0)",
+                (run_id, project, keyword),
+            )
+            self._delete_fetch_state(cur, run_id, project, keyword)
+            self._commit("checkpoint_save_pending")
+
+    def load_pending(self, run_id: int, project: str, keyword: str) -> List[TweetRecord]:
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "SELECT tweet FROM run_pending WHERE run_id = ? AND project = ? AND keyword = ? ORDER BY position",
+                (run_id, project, keyword),
+            )
+            rows = cur.fetchall()
+        return [TweetRecord.from_dict(json.loads(row[0])) for row in rows]
+
+    def complete_tweet(self, run_id: int, project: str, keyword: str, tweet_id: str, stored: bool) -> None:
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "DELETE FROM run_pending WHERE run_id = ? AND project = ? AND keyword = ? AND tweet_id = ?",
+                (run_id, project, keyword, tweet_id),
+            )
+            if stored:
+                cur.execute(
+                    "UPDATE run_keywords SET stored = stored + 1 WHERE run_id = ? AND project = ? AND keyword = ?",
+                    (run_id, project, keyword),
+                )
+            self._commit("checkpoint_complete_tweet")
+
+    def complete_keyword(self, run_id: int, project: str, keyword: str) -> None:
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "INSERT INTO run_keywords (run_id, project, keyword, status) VALUES (?, ?, ?, 'done') "
+                "ON CONFLICT (run_id, project, keyword) DO UPDATE SET status = 'done'",
+                (run_id, project, keyword),
+            )
+            cur.execute(
+                "DELETE FROM run_pending WHERE run_id = ? AND project = ? AND keyword = ?",
+                (run_id, project, keyword),
+            )
+            self._delete_fetch_state(cur, run_id, project, keyword)
+            self._commit("checkpoint_complete_keyword")
+
+    @staticmethod
+    def _delete_fetch_state(cur: sqlite3.Cursor, run_id: int, project: str, keyword: str) -> None:
+        for table in ("run_cursors", "run_pages"):
+            cur.execute(
+                f"DELETE FROM {table} WHERE run_id = ? AND project = ? AND keyword = ?",
+                (run_id, project, keyword),
+            )
+
+    # --- Pagination ---
+
+    def load_fetch_state(self, run_id: int, project: str, keyword: str, query: str, category: str) -> Tuple[Optional[str], int, bool, List[TweetRecord]]:
+        """Return (cursor, pages_fetched, exhausted, tweets_so_far) for one paginated search"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "SELECT cursor, pages, exhausted FROM run_cursors "
+                "WHERE run_id = ? AND project = ? AND keyword = ? AND query = ? AND category = ?",
+                (run_id, project, keyword, query, category),
+            )
+            row = cur.fetchone()
+            if not row:
+                return None, 0, False, []
+            cur.execute(
+                "SELECT tweets FROM run_pages "
+                "WHERE run_id = ? AND project = ? AND keyword = ? AND query = ? AND category = ? ORDER BY page",
+                (run_id, project, keyword, query, category),
+            )
+            pages = cur.fetchall()
+        tweets = [TweetRecord.from_dict(tweet) for page in pages for tweet in json.loads(page[0])]
+        return row[0], row[1], bool(row[2]), tweets
+
+    def save_page(self, run_id: int, project: str, keyword: str, query: str, category: str,
+                  page: int, tweets: List[TweetRecord], cursor: Optional[str], exhausted: bool) -> None:
+        """Persist one fetched page and the cursor that follows it in a single transaction"""
+        with self._lock:
+            cur = self.conn.cursor()
+            if tweets:
+                cur.execute(
+                    "INSERT OR REPLACE INTO run_pages (run_id, project, keyword, query, category, page, tweets) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, project, keyword, query, category, page, json.dumps([_dump(tweet) for tweet in tweets], ensure_ascii=False)),
+                )
+            cur.execute(
+                "INSERT OR REPLACE INTO run_cursors (run_id, project, keyword, query, category, cursor, pages, exhausted) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, project, keyword, query, category, cursor, page + 1, int(exhausted)),
+            )
+            self._commit("checkpoint_save_page")
+
+    # --- Backfill ---
+    # Backfill cursors live outside pipeline runs: a backfill resumes from its last
+    # page whenever it is restarted, and keeps no tweets (pages are stored as fetched).
+
+    def load_backfill(self, project: str, keyword: str, category: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "SELECT cursor, pages, stored, oldest_ts, done FROM backfill_cursors "
+                "WHERE project = ? AND keyword = ? AND category = ?",
+                (project, keyword, category),
+            )
+            row = cur.fetchone()
+        if not row:
+            return None
+        return {'cursor': row[0], 'pages': row[1], 'stored': row[2], 'oldest_ts': row[3], 'done': bool(row[4])}
+
+    def save_backfill(self, project: str, keyword: str, category: str, cursor: Optional[str],
+                      pages: int, stored: int, oldest_ts: Optional[int], done: bool) -> None:
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "INSERT OR REPLACE INTO backfill_cursors (project, keyword, category, cursor, pages, stored, oldest_ts, done, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+                (project, keyword, category, cursor, pages, stored, oldest_ts, int(done)),
+            )
+            self._commit("checkpoint_save_backfill")
+
+    def reset_backfill(self, project: str, keyword: Optional[str] = None) -> None:
+        with self._lock:
+            cur = self.conn.cursor()
+            if keyword is None:
+                cur.execute("DELETE FROM backfill_cursors WHERE project = ?", (project,))
+            else:
+                cur.execute("DELETE FROM backfill_cursors WHERE project = ? AND keyword = ?", (project, keyword))
+            self._commit("checkpoint_reset_backfill")
+
+    def for_keyword(self, run_id: int, project: str, keyword: str) -> "KeywordCheckpoint":
+        return KeywordCheckpoint(self, run_id, project, keyword)
+
+    def close(self) -> None:
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class KeywordCheckpoint:
+    """Checkpoint handle bound to one (run, project, keyword), passed to the fetcher"""
+
+    def __init__(self, store: CheckpointStore, run_id: int, project: str, keyword: str) -> None:
+        self.store = store
+        self.run_id = run_id
+        self.project = project
+        self.keyword = keyword
+
+    def load(self, query: str, category: str) -> Tuple[Optional[str], int, bool, List[TweetRecord]]:
+        return self.store.load_fetch_state(self.run_id, self.project, self.keyword, query, category)
+
+    def save_page(self, query: str, category: str, page: int, tweets: List[TweetRecord],
+                  cursor: Optional[str], exhausted: bool) -> None:
+        self.store.save_page(self.run_id, self.project, self.keyword, query, category, page, tweets, cursor, exhausted)
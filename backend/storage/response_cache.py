@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of raw search API responses, for replay and reprocessing.
+
+Every successful search page is stored exactly as the API returned it,
+zlib-compressed and content-addressed (objects/<aa>/<sha256>.z), with an
+SQLite index of (query, category, cursor, fetched_at) -> digest. Identical
+responses share one object. reprocess.py re-runs parsing, filtering and dedup
+over these pages without calling the API again.
+
+Entries older than the TTL are evicted first, then the oldest entries until
+the compressed objects fit in max_bytes; objects no entry refers to any more
+are deleted with them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from config import RESPONSE_CACHE_DIR, RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_WRITES = REGISTRY.counter(
+    "nation_radar_response_cache_writes_total", "Raw search responses written to the on-disk cache",
+    ("result",))
+RESPONSE_CACHE_EVICTIONS = REGISTRY.counter(
+    "nation_radar_response_cache_evictions_total", "Cached raw responses evicted", ("reason",))
+
+# TTL eviction runs at most this often while writing
+EVICT_INTERVAL_SECONDS = 300
+COMPRESSION_LEVEL = 6
+
+
+class ResponseCache:
+    def __init__(self, directory: str = RESPONSE_CACHE_DIR, ttl_seconds: float = RESPONSE_CACHE_TTL,
+                 max_bytes: int = RESPONSE_CACHE_MAX_BYTES) -> None:
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self._lock = threading.RLock()
+        self._ensure_schema()
+        self._total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        self._last_evict = 0.0
+
+    def _ensure_schema(self) -> None:
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query TEXT NOT NULL,
+                category TEXT NOT NULL,
+                cursor TEXT NOT NULL DEFAULT '',
+                fetched_at REAL NOT NULL,
+                digest TEXT NOT NULL
+            );
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_responses_query ON responses(query, category, fetched_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_responses_digest ON responses(digest)")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS objects (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                raw_size INTEGER NOT NULL
+            );
+            """
+        )
+        self.conn.commit()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], f"{digest}.z")
+
+    def put(self, query: str, category: str, cursor: Optional[str], body: bytes,
+            fetched_at: Optional[float] = None) -> str:
+        """Store one raw response body; returns its digest"""
+        digest = hashlib.sha256(body).hexdigest()
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            cur = self.conn.cursor()
+            known = cur.execute("SELECT 1 FROM objects WHERE digest = ?", (digest,)).fetchone()
+            if known:
+                RESPONSE_CACHE_WRITES.inc(result="shared")
+            else:
+                compressed = zlib.compress(body, COMPRESSION_LEVEL)
+                path = self._object_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + ".tmp", "wb") as f:
+                    f.write(compressed)
+                os.replace(path + ".tmp", path)
+                cur.execute("INSERT INTO objects (digest, size, raw_size) VALUES (?, ?, ?)",
+                            (digest, len(compressed), len(body)))
+                self._total_bytes += len(compressed)
+                RESPONSE_CACHE_WRITES.inc(result="stored")
+            cur.execute(
+                "INSERT INTO responses (query, category, cursor, fetched_at, digest) VALUES (?, ?, ?, ?, ?)",
+                (query, category, cursor or "", fetched_at, digest),
+            )
+            self.conn.commit()
+            if self._total_bytes > self.max_bytes or time.time() - self._last_evict > EVICT_INTERVAL_SECONDS:
+                self.evict()
+        return digest
+
+    def load(self, digest: str) -> Optional[bytes]:
+        """Decompressed response body, or None if the object is gone"""
+        try:
+            with open(self._object_path(digest), "rb") as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+    def iter_responses(self, query: Optional[str] = None, category: Optional[str] = None,
+                       since: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Index entries in fetch order (oldest first), optionally narrowed down"""
+        clauses, params = [], []
+        if query is not None:
+            clauses.append("query = ?")
+            params.append(query)
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        if since is not None:
+            clauses.append("fetched_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, query, category, cursor, fetched_at, digest FROM responses {where} ORDER BY id", params
+            ).fetchall()
+        for row in rows:
+            yield {"id": row[0], "query": row[1], "category": row[2], "cursor": row[3] or None,
+                   "fetched_at": row[4], "digest": row[5]}
+
+    def queries(self) -> Dict[str, int]:
+        """Cached page count per query"""
+        with self._lock:
+            return dict(self.conn.execute("SELECT query, COUNT(*) FROM responses GROUP BY query").fetchall())
+
+    def evict(self, now: Optional[float] = None) -> Tuple[int, int]:
+        """Drop expired entries, then the oldest until under max_bytes; returns (entries, bytes freed)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._last_evict = now
+            cur = self.conn.cursor()
+            expired = cur.execute("DELETE FROM responses WHERE fetched_at < ?", (now - self.ttl_seconds,)).rowcount
+            RESPONSE_CACHE_EVICTIONS.inc(expired, reason="ttl")
+            removed, freed = expired, self._delete_orphans(cur)
+
+            # Still too big: drop the oldest entries a batch at a time
+            while self._total_bytes > self.max_bytes:
+                ids = [row[0] for row in cur.execute("SELECT id FROM responses ORDER BY id LIMIT 20").fetchall()]
+                if not ids:
+                    break
+                cur.execute(f"DELETE FROM responses WHERE id IN ({','.join('?' * len(ids))})", ids)
+                RESPONSE_CACHE_EVICTIONS.inc(len(ids), reason="size")
+                removed += len(ids)
+                freed += self._delete_orphans(cur)
+            self.conn.commit()
+        if removed:
+            logger.info(f"Response cache: evicted {removed} entries, freed {freed} bytes")
+        return removed, freed
+
+    def _delete_orphans(self, cur: sqlite3.Cursor) -> int:
+        orphans = cur.execute(
+            "SELECT digest, size FROM objects WHERE digest NOT IN (SELECT digest FROM responses)"
+        ).fetchall()
+        freed = 0
+        for digest, size in orphans:
+            try:
+                os.remove(self._object_path(digest))
+            except FileNotFoundError:
+                pass
+            freed += size
+        cur.executemany("DELETE FROM objects WHERE digest = ?", [(digest,) for digest, _ in orphans])
+        self._total_bytes -= freed
+        return freed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, oldest, newest = self.conn.execute(
+                "SELECT COUNT(*), MIN(fetched_at), MAX(fetched_at) FROM responses").fetchone()
+            objects, size, raw_size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(raw_size), 0) FROM objects").fetchone()
+        return {"entries": entries, "objects": objects, "bytes": size, "raw_bytes": raw_size,
+                "oldest": oldest, "newest": newest}
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_response_cache() -> Optional[ResponseCache]:
+    """The process-wide cache from config.yaml, opened on first use; None when disabled"""
+    global _shared_cache
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache()
+        return _shared_cache
@@ -2,9 +2,40 @@
 """
 SQLite-based storage with content-hash deduplication for scale.
 
-- Ensures each tweet id is stored once (PRIMARY KEY)
-- Ensures each normalized content hash is stored once (content_hashes)
-  so copy/paste reposts are rejected across runs
+- Ensures each tweet id is stored once per project (PRIMARY KEY (id, project));
+  a tweet matching several projects gets a row in each, so per-project counts
+  and aggregates are complete, while score updates, engagement refreshes and
+  the engagement history are shared by id
+- Ensures each normalized content hash is stored once per project
+  (content_hashes) so copy/paste reposts are rejected across runs
+- Tags each tweet with the project it was collected for (indexed)
+- Tracks score_status: 'scored', 'unscored' when the Nation Agent was
+  unavailable (score is NULL), 'prescored' when the local pre-scorer skipped
+  the remote call (score is NULL too), or 'stale' when refreshed engagement
+  moved to a new bucket (unscored and stale rows form the re-scoring queue).
+  Only non-NULL scores, which always come from the agent, reach aggregates,
+  user_stats and sketches
+- Keeps a compact engagement time series (engagement_snapshots) fed at insert
+  and by the engagement refresher
+- Mirrors text/username into an FTS5 index (tweets_fts, kept in sync by
+  triggers) for ranked full-text search with keyset pagination
+- Stamps every insert and content/score/engagement update with a monotonically
+  increasing change_seq (triggers + sync_state) so clients can poll for deltas
+- Keeps hour-of-day activity buckets (tweet volume, score sum, engagement) per
+  project and search keyword, per UTC day (activity_hourly) and folded onto
+  day-of-week x hour (activity_weekly), maintained by triggers for the heatmap
+- Interns authors in a users table (integer user_id on tweets) holding their
+  latest profile (followers, verification, account age) and keeps per-user,
+  per-project running aggregates in user_stats via triggers, so leaderboards
+  and profiles read one row per user instead of grouping all tweets
+- Indexes who replies to, quotes and @mentions whom (interaction_edges) with
+  exponentially time-decayed weights updated at insert; rank_key orders edges
+  by their current decayed weight without rewriting rows as time passes
+- Maintains KLL quantile sketches of views, likes and score per (project, day)
+  and per (project, user) at insert (quantile_sketches); updates that change a
+  value already sketched mark the bucket dirty and it is rebuilt from its rows
+- Runs the schema checks and migrations once per database file per process;
+  later connections to the same file (one per API request) skip them
 
 append_row(tweet: dict) -> bool
   - Returns True if the tweet is newly stored; False if skipped as duplicate
@@ -12,12 +43,133 @@ append_row(tweet: dict) -> bool
 
 from __future__ import annotations
 
+import base64
 import json
+import math
 import os
+import re
 import sqlite3
-from typing import Optional
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 from dedup import compute_text_hash
+from metrics import DB_COMMIT_SECONDS, DEDUP_HITS, TWEETS_STORED
+from quantile_sketch import KLLSketch
+
+# Rows stored before multi-project support were all collected for Crestal
+LEGACY_PROJECT = "crestal"
+
+SCORED = "scored"
+UNSCORED = "unscored"
+PRESCORED = "prescored"
+STALE = "stale"
+RESCORE_STATUSES = (UNSCORED, STALE)
+
+ENGAGEMENT_FIELDS = ("likes", "retweets", "replies", "views", "bookmarks", "quote_tweets")
+
+HEATMAP_DAYS = ("Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat")
+
+INTERACTION_KINDS = ("reply", "quote", "mention")
+# Edge weights halve every two weeks without new interactions
+EDGE_HALF_LIFE = 14 * 86400
+
+# Database files (path, device, inode) whose schema this process has already ensured
+_SCHEMA_READY = set()
+_SCHEMA_LOCK = threading.Lock()
+
+SKETCH_METRICS = ("views", "likes", "score")
+SKETCH_DAY = "day"
+SKETCH_USER = "user"
+
+# (project, scope, key, metric) -> values to add, collected over one transaction
+SketchUpdates = Dict[Tuple[str, str, str, str], List[float]]
+
+
+def engagement_bucket(engagement: dict) -> int:
+    """Log2 bucket of weighted interactions; a change of bucket warrants re-scoring"""
+    engagement = engagement or {}
+    interactions = (
+        int(engagement.get("likes", 0) or 0)
+        + 2 * int(engagement.get("retweets", 0) or 0)
+        + 3 * int(engagement.get("replies", 0) or 0)
+        + 2 * int(engagement.get("quote_tweets", 0) or 0)
+    )
+    return int(math.log2(1 + interactions))
+
+
+def created_timestamp(created_at: Optional[str]) -> Optional[int]:
+    """Epoch seconds for a Twitter ("Thu Aug 21 20:08:17 +0000 2025") or ISO date, else None"""
+    if not created_at:
+        return None
+    try:
+        return int(datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y").timestamp())
+    except ValueError:
+        pass
+    try:
+        return int(datetime.fromisoformat(created_at.replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return None
+
+
+_FTS_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into a safe FTS5 query: every word or "quoted phrase" must match"""
+    terms = []
+    for phrase, word in _FTS_TERM.findall(text or ""):
+        term = (phrase or word).strip()
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"')
+    return " ".join(terms)
+
+
+def _encode_cursor(rank: float, rowid: int) -> str:
+    return base64.urlsafe_b64encode(f"{rank!r}:{rowid}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        rank, rowid = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(rank), int(rowid)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def sketch_day(created_ts: Optional[int]) -> str:
+    """UTC day bucket (YYYY-MM-DD) of a tweet; undated tweets count on the day they are stored"""
+    return time.strftime("%Y-%m-%d", time.gmtime(time.time() if created_ts is None else created_ts))
+
+
+def _sketch_values(engagement: dict, score: Optional[float]) -> Dict[str, Optional[float]]:
+    engagement = engagement or {}
+    return {
+        "views": int(engagement.get("views", 0) or 0),
+        "likes": int(engagement.get("likes", 0) or 0),
+        "score": score,
+    }
+
+
+def _leaderboard_avg(alias: str = "") -> str:
+    """Leaderboard ordering key (average score as displayed), the expression its indexes are built on"""
+    prefix = f"{alias}." if alias else ""
+    return f"round({prefix}score_sum / {prefix}scored_count, 2)"
+
+
+def decayed_weight(weight: float, last_ts: int, now: float) -> float:
+    """An edge's weight stored as of last_ts, decayed to `now`"""
+    return weight * 2 ** (-(now - last_ts) / EDGE_HALF_LIFE)
+
+
+def edge_rank_key(weight: float, last_ts: int) -> float:
+    """log2 of the decayed weight plus now/half-life: the same order at any `now`"""
+    return math.log2(weight) + last_ts / EDGE_HALF_LIFE
+
+
+def _snapshot_row(tweet_id: str, polled_at: int, engagement: dict) -> tuple:
+    return (tweet_id, polled_at) + tuple(int((engagement or {}).get(f, 0) or 0) for f in ENGAGEMENT_FIELDS)
 
 
 class SQLiteStorage:
@@ -26,88 +178,694 @@ class SQLiteStorage:
         os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.execute("PRAGMA journal_mode=WAL;")
-        self._ensure_schema()
+        # The connection is shared by the per-project pipeline workers
+        self._lock = threading.RLock()
+        self._ensure_schema_once()
+
+    def _ensure_schema_once(self) -> None:
+        # Keyed by inode too, so a deleted and recreated file is checked again
+        st = os.stat(self.db_path)
+        key = (os.path.abspath(self.db_path), st.st_dev, st.st_ino)
+        if key in _SCHEMA_READY:
+            return
+        with _SCHEMA_LOCK:
+            if key not in _SCHEMA_READY:
+                self._ensure_schema()
+                _SCHEMA_READY.add(key)
 
     def _ensure_schema(self) -> None:
         cur = self.conn.cursor()
         cur.execute(
             """
             CREATE TABLE IF NOT EXISTS tweets (
-                id TEXT PRIMARY KEY,
+                id TEXT NOT NULL,
                 username TEXT,
                 text TEXT,
                 score REAL,
                 url TEXT,
                 created_at TEXT,
                 engagement TEXT,
-                inserted_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                inserted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                project TEXT NOT NULL DEFAULT '{legacy}',
+                score_status TEXT DEFAULT '{scored}',
+                PRIMARY KEY (id, project)
             );
-            """
+            """.format(legacy=LEGACY_PROJECT, scored=SCORED)
         )
+        self._ensure_column("tweets", "project", f"TEXT DEFAULT '{LEGACY_PROJECT}'")
+        self._ensure_column("tweets", "score_status", f"TEXT DEFAULT '{SCORED}'")
+        self._ensure_column("tweets", "engagement_refreshed_at", "INTEGER")
+        self._ensure_column("tweets", "engagement_bucket", "INTEGER")
+        self._ensure_column("tweets", "keyword", "TEXT")
+        self._ensure_column("tweets", "user_id", "INTEGER")
+        self._ensure_project_key(cur)
+        if self._ensure_column("tweets", "created_ts", "INTEGER"):
+            self._backfill_created_ts(cur)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tweets_created_ts ON tweets (created_ts)")
+        if self._ensure_column("tweets", "change_seq", "INTEGER"):
+            # Existing rows count as changed in insertion order
+            cur.execute("UPDATE tweets SET change_seq = rowid")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tweets_change_seq ON tweets (change_seq)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tweets_project ON tweets (project)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tweets_project_username ON tweets (project, username)")
+        cur.execute("DROP INDEX IF EXISTS idx_tweets_rescore")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tweets_score_status ON tweets (score_status, inserted_at)")
         cur.execute(
             """
             CREATE TABLE IF NOT EXISTS content_hashes (
-                content_hash TEXT PRIMARY KEY,
+                project TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
                 canonical_tweet_id TEXT,
-                first_seen_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                first_seen_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (project, content_hash)
             );
             """
         )
+        self._ensure_content_hash_scope(cur)
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS engagement_snapshots (
+                tweet_id TEXT,
+                polled_at INTEGER,
+                likes INTEGER,
+                retweets INTEGER,
+                replies INTEGER,
+                views INTEGER,
+                bookmarks INTEGER,
+                quote_tweets INTEGER,
+                PRIMARY KEY (tweet_id, polled_at)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._ensure_fts(cur)
+        self._ensure_change_tracking(cur)
+        self._ensure_sketches(cur)
+        self._ensure_activity_buckets(cur)
+        self._ensure_users(cur)
+        self._clear_prescored_scores(cur)
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS interaction_edges (
+                project TEXT,
+                source TEXT,
+                target TEXT,
+                kind TEXT,
+                weight REAL NOT NULL,
+                interactions INTEGER NOT NULL,
+                last_ts INTEGER NOT NULL,
+                rank_key REAL NOT NULL,
+                PRIMARY KEY (project, source, target, kind)
+            ) WITHOUT ROWID;
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_edges_rank ON interaction_edges (rank_key)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_edges_source ON interaction_edges (source, rank_key)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_edges_target ON interaction_edges (target, rank_key)")
         self.conn.commit()
 
+    def _ensure_project_key(self, cur: sqlite3.Cursor) -> None:
+        """Rebuild a tweets table keyed by id alone (one project per tweet) into one keyed by (id, project)"""
+        cur.execute("PRAGMA table_info(tweets)")
+        columns = cur.fetchall()
+        if any(name == "project" and pk for _, name, _, _, _, pk in columns):
+            return
+        definitions = []
+        for _, name, col_type, _, default, _ in columns:
+            ddl = f"{name} {col_type}" + (" NOT NULL" if name in ("id", "project") else "")
+            definitions.append(ddl + (f" DEFAULT {default}" if default is not None else ""))
+        names = ", ".join(column[1] for column in columns)
+        values = ", ".join(f"COALESCE(project, '{LEGACY_PROJECT}')" if column[1] == "project" else column[1]
+                           for column in columns)
+        # Same rowids, so the external-content FTS index stays valid; dropping the old table
+        # drops its triggers and indexes, which the rest of _ensure_schema recreates
+        cur.execute(f"CREATE TABLE tweets_keyed ({', '.join(definitions)}, PRIMARY KEY (id, project))")
+        cur.execute(f"INSERT INTO tweets_keyed (rowid, {names}) SELECT rowid, {values} FROM tweets")
+        cur.execute("DROP TABLE tweets")
+        cur.execute("ALTER TABLE tweets_keyed RENAME TO tweets")
+
+    def _ensure_content_hash_scope(self, cur: sqlite3.Cursor) -> None:
+        """Give content_hashes from before per-project dedup the project of their canonical tweet"""
+        cur.execute("PRAGMA table_info(content_hashes)")
+        if "project" in {row[1] for row in cur.fetchall()}:
+            return
+        cur.execute(
+            """
+            CREATE TABLE content_hashes_scoped (
+                project TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                canonical_tweet_id TEXT,
+                first_seen_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (project, content_hash)
+            );
+            """
+        )
+        cur.execute(
+            "INSERT OR IGNORE INTO content_hashes_scoped "
+            f"SELECT COALESCE((SELECT project FROM tweets WHERE id = h.canonical_tweet_id LIMIT 1), '{LEGACY_PROJECT}'), "
+            "h.content_hash, h.canonical_tweet_id, h.first_seen_at FROM content_hashes AS h"
+        )
+        cur.execute("DROP TABLE content_hashes")
+        cur.execute("ALTER TABLE content_hashes_scoped RENAME TO content_hashes")
+
+    def _clear_prescored_scores(self, cur: sqlite3.Cursor) -> None:
+        """Drop the placeholder 0.0 that prescored tweets used to be stored with
+
+        The update triggers take them out of activity buckets and user_stats; their
+        score sketches are rebuilt.
+        """
+        cur.execute(
+            f"SELECT project, username, created_ts FROM tweets WHERE score_status = '{PRESCORED}' AND score IS NOT NULL"
+        )
+        rows = cur.fetchall()
+        if not rows:
+            return
+        cur.execute(f"UPDATE tweets SET score = NULL WHERE score_status = '{PRESCORED}' AND score IS NOT NULL")
+        self._mark_sketches_dirty(cur, rows)
+        self._rebuild_dirty_sketches(cur)
+
+    def _ensure_change_tracking(self, cur: sqlite3.Cursor) -> None:
+        """Bump sync_state.change_seq/changed_at on every tweet insert, relevant update or delete
+
+        Inserted and updated rows are stamped with the new change_seq.
+        """
+        cur.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        cur.execute(
+            "INSERT OR IGNORE INTO sync_state (key, value) "
+            "SELECT 'change_seq', COALESCE(MAX(change_seq), 0) FROM tweets"
+        )
+        cur.execute(
+            "INSERT OR IGNORE INTO sync_state (key, value) VALUES ('changed_at', CAST(strftime('%s', 'now') AS INTEGER))"
+        )
+        bump = """
+                UPDATE sync_state SET value = value + 1 WHERE key = 'change_seq';
+                UPDATE sync_state SET value = CAST(strftime('%s', 'now') AS INTEGER) WHERE key = 'changed_at';
+        """
+        stamp = bump + """
+                UPDATE tweets SET change_seq = (SELECT value FROM sync_state WHERE key = 'change_seq')
+                WHERE rowid = new.rowid;
+        """
+        # Recreated on every start (inside the open transaction) so older databases pick up trigger changes
+        cur.execute("DROP TRIGGER IF EXISTS tweets_change_insert")
+        cur.execute("DROP TRIGGER IF EXISTS tweets_change_update")
+        cur.execute("DROP TRIGGER IF EXISTS tweets_change_delete")
+        cur.execute(f"CREATE TRIGGER tweets_change_insert AFTER INSERT ON tweets BEGIN {stamp} END;")
+        cur.execute(
+            "CREATE TRIGGER tweets_change_update "
+            f"AFTER UPDATE OF text, username, score, score_status, engagement ON tweets BEGIN {stamp} END;"
+        )
+        # Deleted rows leave nothing to stamp, but cached responses built from them must still go stale
+        cur.execute(f"CREATE TRIGGER tweets_change_delete AFTER DELETE ON tweets BEGIN {bump} END;")
+
+    def _ensure_fts(self, cur: sqlite3.Cursor) -> None:
+        """External-content FTS5 index over tweets, maintained by triggers"""
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tweets_fts'")
+        exists = cur.fetchone() is not None
+        cur.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5(
+                text, username,
+                content='tweets', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS tweets_fts_insert AFTER INSERT ON tweets BEGIN
+                INSERT INTO tweets_fts (rowid, text, username) VALUES (new.rowid, new.text, new.username);
+            END;
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS tweets_fts_delete AFTER DELETE ON tweets BEGIN
+                INSERT INTO tweets_fts (tweets_fts, rowid, text, username) VALUES ('delete', old.rowid, old.text, old.username);
+            END;
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS tweets_fts_update AFTER UPDATE OF text, username ON tweets BEGIN
+                INSERT INTO tweets_fts (tweets_fts, rowid, text, username) VALUES ('delete', old.rowid, old.text, old.username);
+                INSERT INTO tweets_fts (rowid, text, username) VALUES (new.rowid, new.text, new.username);
+            END;
+            """
+        )
+        if not exists:
+            # Index tweets stored before search existed
+            cur.execute("INSERT INTO tweets_fts (tweets_fts) VALUES ('rebuild')")
+
+    def _ensure_activity_buckets(self, cur: sqlite3.Cursor) -> None:
+        """Hourly and day-of-week x hour activity sums kept current by triggers on tweets"""
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'activity_hourly'")
+        exists = cur.fetchone() is not None
+        sums = "tweets INTEGER NOT NULL, scored INTEGER NOT NULL, score_sum REAL NOT NULL, engagement INTEGER NOT NULL"
+        cur.execute(
+            f"CREATE TABLE IF NOT EXISTS activity_hourly (project TEXT, keyword TEXT, day TEXT, hour INTEGER, {sums}, "
+            "PRIMARY KEY (project, keyword, day, hour)) WITHOUT ROWID"
+        )
+        cur.execute(
+            f"CREATE TABLE IF NOT EXISTS activity_weekly (project TEXT, keyword TEXT, dow INTEGER, hour INTEGER, {sums}, "
+            "PRIMARY KEY (project, keyword, dow, hour)) WITHOUT ROWID"
+        )
+
+        def ts(row: str) -> str:
+            return f"COALESCE({row}.created_ts, CAST(strftime('%s', {row}.inserted_at) AS INTEGER))"
+
+        def interactions(row: str) -> str:
+            return (
+                f"(CASE WHEN json_valid({row}.engagement) THEN "
+                + " + ".join(f"COALESCE(json_extract({row}.engagement, '$.{f}'), 0)" for f in ("likes", "retweets", "replies"))
+                + " ELSE 0 END)"
+            )
+
+        def upsert(row: str, tweets: str, scored: str, score_sum: str, engagement: str) -> str:
+            keys = f"COALESCE({row}.project, ''), COALESCE({row}.keyword, '')"
+            hour = f"CAST(strftime('%H', {ts(row)}, 'unixepoch') AS INTEGER)"
+            values = f"{tweets}, {scored}, {score_sum}, {engagement}"
+            add = (
+                "DO UPDATE SET tweets = tweets + excluded.tweets, scored = scored + excluded.scored, "
+                "score_sum = score_sum + excluded.score_sum, engagement = engagement + excluded.engagement"
+            )
+            return (
+                f"INSERT INTO activity_hourly VALUES ({keys}, date({ts(row)}, 'unixepoch'), {hour}, {values}) "
+                f"ON CONFLICT (project, keyword, day, hour) {add}; "
+                f"INSERT INTO activity_weekly VALUES ({keys}, CAST(strftime('%w', {ts(row)}, 'unixepoch') AS INTEGER), "
+                f"{hour}, {values}) ON CONFLICT (project, keyword, dow, hour) {add};"
+            )
+
+        cur.execute("DROP TRIGGER IF EXISTS tweets_activity_insert")
+        cur.execute("DROP TRIGGER IF EXISTS tweets_activity_update")
+        cur.execute("DROP TRIGGER IF EXISTS tweets_activity_delete")
+        cur.execute(
+            "CREATE TRIGGER tweets_activity_insert AFTER INSERT ON tweets BEGIN "
+            + upsert("new", "1", "(new.score IS NOT NULL)", "COALESCE(new.score, 0)", interactions("new"))
+            + " END;"
+        )
+        cur.execute(
+            "CREATE TRIGGER tweets_activity_update AFTER UPDATE OF score, engagement ON tweets BEGIN "
+            + upsert(
+                "new", "0", "(new.score IS NOT NULL) - (old.score IS NOT NULL)",
+                "COALESCE(new.score, 0) - COALESCE(old.score, 0)", f"{interactions('new')} - {interactions('old')}",
+            )
+            + " END;"
+        )
+        cur.execute(
+            "CREATE TRIGGER tweets_activity_delete AFTER DELETE ON tweets BEGIN "
+            + upsert("old", "-1", "-(old.score IS NOT NULL)", "-COALESCE(old.score, 0)", f"-{interactions('old')}")
+            + " END;"
+        )
+        if not exists:
+            # Bucket tweets stored before the heatmap existed
+            cur.execute(
+                "INSERT INTO activity_hourly SELECT project, keyword, day, hour, COUNT(*), SUM(scored), SUM(score_sum), "
+                "SUM(engagement) FROM (SELECT COALESCE(new.project, '') AS project, COALESCE(new.keyword, '') AS keyword, "
+                f"date({ts('new')}, 'unixepoch') AS day, CAST(strftime('%H', {ts('new')}, 'unixepoch') AS INTEGER) AS hour, "
+                f"(new.score IS NOT NULL) AS scored, COALESCE(new.score, 0) AS score_sum, {interactions('new')} AS engagement "
+                "FROM tweets AS new) GROUP BY project, keyword, day, hour"
+            )
+            cur.execute(
+                "INSERT INTO activity_weekly SELECT project, keyword, CAST(strftime('%w', day) AS INTEGER) AS dow, hour, "
+                "SUM(tweets), SUM(scored), SUM(score_sum), SUM(engagement) FROM activity_hourly "
+                "GROUP BY project, keyword, dow, hour"
+            )
+
+    def _ensure_users(self, cur: sqlite3.Cursor) -> None:
+        """Author dimension (users) and per-user/project aggregates (user_stats) maintained by triggers"""
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'")
+        exists = cur.fetchone() is not None
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL UNIQUE,
+                twitter_id TEXT,
+                display_name TEXT,
+                followers INTEGER,
+                following INTEGER,
+                statuses INTEGER,
+                verified INTEGER,
+                blue_verified INTEGER,
+                account_created_ts INTEGER,
+                profile_updated_at INTEGER,
+                scored_count INTEGER NOT NULL DEFAULT 0,
+                score_sum REAL NOT NULL DEFAULT 0
+            );
+            """
+        )
+        totals_added = self._ensure_column("users", "scored_count", "INTEGER NOT NULL DEFAULT 0")
+        totals_added = self._ensure_column("users", "score_sum", "REAL NOT NULL DEFAULT 0") or totals_added
+        # Aggregates cover tweets with an agent score (scored, stale), like the leaderboard
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user_stats (
+                user_id INTEGER,
+                project TEXT,
+                tweet_count INTEGER NOT NULL,
+                scored_count INTEGER NOT NULL,
+                score_sum REAL NOT NULL,
+                score_max REAL,
+                engagement INTEGER NOT NULL,
+                first_seen INTEGER,
+                last_seen INTEGER,
+                PRIMARY KEY (user_id, project)
+            ) WITHOUT ROWID;
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tweets_user_score ON tweets (user_id, score)")
+        # Leaderboard order (average rounded to 2 decimals, as displayed): per project from
+        # user_stats, across projects from the users totals kept in step with user_stats below
+        cur.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_user_stats_rank ON user_stats (project, {_leaderboard_avg()} DESC) "
+            "WHERE scored_count > 0"
+        )
+        cur.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_users_rank ON users ({_leaderboard_avg()} DESC, username) "
+            "WHERE scored_count > 0"
+        )
+
+        def weighted(row: str) -> str:
+            return (
+                f"(CASE WHEN json_valid({row}.engagement) THEN COALESCE(json_extract({row}.engagement, '$.likes'), 0) "
+                f"+ 2 * COALESCE(json_extract({row}.engagement, '$.retweets'), 0) "
+                f"+ 3 * COALESCE(json_extract({row}.engagement, '$.replies'), 0) ELSE 0 END)"
+            )
+
+        def ts(row: str) -> str:
+            return f"COALESCE({row}.created_ts, CAST(strftime('%s', {row}.inserted_at) AS INTEGER))"
+
+        max_score = (
+            "(SELECT MAX(score) FROM tweets WHERE user_id = {row}.user_id AND project = {row}.project)"
+        )
+        cur.execute("DROP TRIGGER IF EXISTS tweets_user_stats_insert")
+        cur.execute("DROP TRIGGER IF EXISTS tweets_user_stats_update")
+        cur.execute("DROP TRIGGER IF EXISTS tweets_user_stats_delete")
+        cur.execute(
+            f"""
+            CREATE TRIGGER tweets_user_stats_insert AFTER INSERT ON tweets WHEN new.user_id IS NOT NULL BEGIN
+                INSERT INTO user_stats VALUES (
+                    new.user_id, new.project, 1, new.score IS NOT NULL, COALESCE(new.score, 0), new.score,
+                    (new.score IS NOT NULL) * {weighted('new')}, {ts('new')}, {ts('new')}
+                )
+                ON CONFLICT (user_id, project) DO UPDATE SET
+                    tweet_count = tweet_count + 1,
+                    scored_count = scored_count + excluded.scored_count,
+                    score_sum = score_sum + excluded.score_sum,
+                    score_max = CASE WHEN excluded.score_max IS NULL THEN score_max
+                                     ELSE MAX(COALESCE(score_max, excluded.score_max), excluded.score_max) END,
+                    engagement = engagement + excluded.engagement,
+                    first_seen = MIN(first_seen, excluded.first_seen),
+                    last_seen = MAX(last_seen, excluded.last_seen);
+            END;
+            """
+        )
+        cur.execute(
+            f"""
+            CREATE TRIGGER tweets_user_stats_update AFTER UPDATE OF score, engagement ON tweets
+            WHEN new.user_id IS NOT NULL BEGIN
+                UPDATE user_stats SET
+                    scored_count = scored_count + (new.score IS NOT NULL) - (old.score IS NOT NULL),
+                    score_sum = score_sum + COALESCE(new.score, 0) - COALESCE(old.score, 0),
+                    score_max = {max_score.format(row='new')},
+                    engagement = engagement + (new.score IS NOT NULL) * {weighted('new')}
+                                            - (old.score IS NOT NULL) * {weighted('old')}
+                WHERE user_id = new.user_id AND project = new.project;
+            END;
+            """
+        )
+        cur.execute(
+            f"""
+            CREATE TRIGGER tweets_user_stats_delete AFTER DELETE ON tweets WHEN old.user_id IS NOT NULL BEGIN
+                UPDATE user_stats SET
+                    tweet_count = tweet_count - 1,
+                    scored_count = scored_count - (old.score IS NOT NULL),
+                    score_sum = score_sum - COALESCE(old.score, 0),
+                    score_max = {max_score.format(row='old')},
+                    engagement = engagement - (old.score IS NOT NULL) * {weighted('old')}
+                WHERE user_id = old.user_id AND project = old.project;
+                DELETE FROM user_stats WHERE user_id = old.user_id AND project = old.project AND tweet_count <= 0;
+            END;
+            """
+        )
+        cur.execute("DROP TRIGGER IF EXISTS user_stats_totals_insert")
+        cur.execute("DROP TRIGGER IF EXISTS user_stats_totals_update")
+        cur.execute("DROP TRIGGER IF EXISTS user_stats_totals_delete")
+        cur.execute(
+            """
+            CREATE TRIGGER user_stats_totals_insert AFTER INSERT ON user_stats BEGIN
+                UPDATE users SET scored_count = scored_count + new.scored_count, score_sum = score_sum + new.score_sum
+                WHERE user_id = new.user_id;
+            END;
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER user_stats_totals_update AFTER UPDATE OF scored_count, score_sum ON user_stats
+            WHEN new.scored_count != old.scored_count OR new.score_sum != old.score_sum BEGIN
+                UPDATE users SET scored_count = scored_count + new.scored_count - old.scored_count,
+                                 score_sum = score_sum + new.score_sum - old.score_sum
+                WHERE user_id = new.user_id;
+            END;
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER user_stats_totals_delete AFTER DELETE ON user_stats BEGIN
+                UPDATE users SET scored_count = scored_count - old.scored_count, score_sum = score_sum - old.score_sum
+                WHERE user_id = old.user_id;
+            END;
+            """
+        )
+        if not exists:
+            # Intern authors of tweets stored before the users table existed
+            cur.execute("INSERT OR IGNORE INTO users (username) SELECT DISTINCT username FROM tweets WHERE username IS NOT NULL")
+            cur.execute("UPDATE tweets SET user_id = (SELECT user_id FROM users WHERE users.username = tweets.username)")
+            cur.execute("DELETE FROM user_stats")
+            cur.execute(
+                f"""
+                INSERT INTO user_stats
+                SELECT new.user_id, new.project, COUNT(*), COUNT(new.score), COALESCE(SUM(new.score), 0), MAX(new.score),
+                       SUM((new.score IS NOT NULL) * {weighted('new')}), MIN({ts('new')}), MAX({ts('new')})
+                FROM tweets AS new WHERE new.user_id IS NOT NULL GROUP BY new.user_id, new.project
+                """
+            )
+        if totals_added or not exists:
+            cur.execute(
+                "UPDATE users SET "
+                "scored_count = (SELECT COALESCE(SUM(scored_count), 0) FROM user_stats s WHERE s.user_id = users.user_id), "
+                "score_sum = (SELECT COALESCE(SUM(score_sum), 0) FROM user_stats s WHERE s.user_id = users.user_id)"
+            )
+
+    def _intern_user(self, cur: sqlite3.Cursor, username: str, profile: Optional[dict]) -> Optional[int]:
+        """user_id for username, creating the row; refreshes profile fields when given"""
+        if not username:
+            return None
+        cur.execute("INSERT OR IGNORE INTO users (username) VALUES (?)", (username,))
+        if profile:
+            cur.execute(
+                "UPDATE users SET twitter_id = COALESCE(?, twitter_id), display_name = COALESCE(?, display_name), "
+                "followers = ?, following = ?, statuses = ?, verified = ?, blue_verified = ?, "
+                "account_created_ts = COALESCE(?, account_created_ts), profile_updated_at = ? WHERE username = ?",
+                (
+                    profile.get("twitter_id"), profile.get("display_name"),
+                    profile.get("followers"), profile.get("following"), profile.get("statuses"),
+                    int(bool(profile.get("verified"))), int(bool(profile.get("blue_verified"))),
+                    created_timestamp(profile.get("account_created_at")), int(time.time()), username,
+                ),
+            )
+        cur.execute("SELECT user_id FROM users WHERE username = ?", (username,))
+        return cur.fetchone()[0]
+
+    def _ensure_sketches(self, cur: sqlite3.Cursor) -> None:
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'quantile_sketches'")
+        exists = cur.fetchone() is not None
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quantile_sketches (
+                project TEXT,
+                scope TEXT,
+                key TEXT,
+                metric TEXT,
+                sketch TEXT,
+                PRIMARY KEY (project, scope, key, metric)
+            ) WITHOUT ROWID;
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sketch_dirty (
+                project TEXT,
+                scope TEXT,
+                key TEXT,
+                PRIMARY KEY (project, scope, key)
+            ) WITHOUT ROWID;
+            """
+        )
+        if not exists:
+            # Sketch tweets stored before sketches existed
+            self._rebuild_all_sketches(cur)
+
+    @staticmethod
+    def _backfill_created_ts(cur: sqlite3.Cursor) -> None:
+        cur.execute("SELECT rowid, created_at FROM tweets WHERE created_at IS NOT NULL")
+        cur.executemany(
+            "UPDATE tweets SET created_ts = ? WHERE rowid = ?",
+            [(created_timestamp(created_at), rowid) for rowid, created_at in cur.fetchall()],
+        )
+
+    def _ensure_column(self, table: str, column: str, ddl: str) -> bool:
+        """Add a column to an existing table if an older schema lacks it; True if added"""
+        cur = self.conn.cursor()
+        cur.execute(f"PRAGMA table_info({table})")
+        if column not in {row[1] for row in cur.fetchall()}:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+            return True
+        return False
+
     @staticmethod
     def _tweet_url(username: str, tweet_id: str) -> str:
         return f"https://x.com/{username}/status/{tweet_id}"
 
     def append_row(self, tweet: dict) -> bool:
+        with self._lock:
+            cur = self.conn.cursor()
+            sketch_updates: SketchUpdates = {}
+            stored = self._insert_tweet(cur, tweet, int(time.time()), sketch_updates)
+            if stored is None:
+                return False
+            if stored:
+                self._write_sketch_updates(cur, sketch_updates)
+                with DB_COMMIT_SECONDS.time(operation="append_row"):
+                    self.conn.commit()
+                TWEETS_STORED.inc(project=tweet.get("project") or LEGACY_PROJECT)
+                return True
+            # Tweet id already exists; treat as duplicate (keeping the refreshed author profile)
+            self.conn.commit()
+            return False
+
+    def append_rows(self, tweets: Iterable[dict]) -> int:
+        """Bulk append_row in one transaction (backfill pages); returns how many were new"""
+        stored = 0
+        with self._lock:
+            cur = self.conn.cursor()
+            now = int(time.time())
+            # Each touched sketch is read and written once for the whole batch
+            sketch_updates: SketchUpdates = {}
+            for tweet in tweets:
+                if self._insert_tweet(cur, tweet, now, sketch_updates):
+                    stored += 1
+                    TWEETS_STORED.inc(project=tweet.get("project") or LEGACY_PROJECT)
+            self._write_sketch_updates(cur, sketch_updates)
+            with DB_COMMIT_SECONDS.time(operation="append_rows"):
+                self.conn.commit()
+        return stored
+
+    def _insert_tweet(self, cur: sqlite3.Cursor, tweet: dict, now: int,
+                      sketch_updates: SketchUpdates) -> Optional[bool]:
+        """Insert one tweet without committing: True if stored, False if the id is already
+        stored for this project, None if rejected before touching the database (no id, or
+        content already seen in this project). Its sketch values are added to sketch_updates
+        for the caller to write with _write_sketch_updates."""
         tweet_id: Optional[str] = tweet.get("id")
         username: str = tweet.get("username", "")
         text: str = tweet.get("text", "")
-        score: float = float(tweet.get("score", 0.0) or 0.0)
+        raw_score = tweet.get("score")
+        # A missing score means the agent was unreachable, never a real 0.0
+        score: Optional[float] = None if raw_score is None else float(raw_score)
+        score_status: str = tweet.get("score_status") or (UNSCORED if score is None else SCORED)
         created_at: str = tweet.get("created_at", "")
-        engagement_json: str = json.dumps(tweet.get("engagement", {}), ensure_ascii=False)
+        created_ts: Optional[int] = created_timestamp(created_at)
+        engagement: dict = tweet.get("engagement", {}) or {}
+        engagement_json: str = json.dumps(engagement, ensure_ascii=False)
         url: str = self._tweet_url(username, tweet_id) if tweet_id and username else ""
+        project: str = tweet.get("project") or LEGACY_PROJECT
+        keyword: Optional[str] = tweet.get("keyword")
 
         if not tweet_id:
-            return False
+            return None
 
         content_hash = compute_text_hash(text)
 
-        cur = self.conn.cursor()
-        # Reject if content hash already seen
-        cur.execute("SELECT 1 FROM content_hashes WHERE content_hash = ?", (content_hash,))
+        # Reject if content hash already seen in this project
+        cur.execute("SELECT 1 FROM content_hashes WHERE project = ? AND content_hash = ?", (project, content_hash))
         if cur.fetchone():
-            return False
+            DEDUP_HITS.inc(layer="db_content_hash")
+            return None
 
         # Insert tweet row if not exists
         try:
+            user_id = self._intern_user(cur, username, tweet.get("author"))
             cur.execute(
-                "INSERT INTO tweets (id, username, text, score, url, created_at, engagement) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (tweet_id, username, text, score, url, created_at, engagement_json),
+                "INSERT INTO tweets (id, username, text, score, url, created_at, engagement, project, score_status, "
+                "engagement_refreshed_at, engagement_bucket, created_ts, keyword, user_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (tweet_id, username, text, score, url, created_at, engagement_json, project, score_status,
+                 now, engagement_bucket(engagement), created_ts, keyword, user_id),
             )
         except sqlite3.IntegrityError:
-            # Tweet id already exists; treat as duplicate
+            DEDUP_HITS.inc(layer="db_tweet_id")
             return False
 
         # Mark content hash as seen with this canonical tweet id
         cur.execute(
-            "INSERT OR IGNORE INTO content_hashes (content_hash, canonical_tweet_id) VALUES (?, ?)",
-            (content_hash, tweet_id),
+            "INSERT OR IGNORE INTO content_hashes (project, content_hash, canonical_tweet_id) VALUES (?, ?, ?)",
+            (project, content_hash, tweet_id),
         )
-        self.conn.commit()
+        cur.execute(
+            "INSERT OR IGNORE INTO engagement_snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            _snapshot_row(tweet_id, now, engagement),
+        )
+        values = _sketch_values(engagement, score)
+        day = sketch_day(created_ts)
+        self._queue_sketch_values(sketch_updates, project, SKETCH_DAY, day, values)
+        self._queue_sketch_values(sketch_updates, project, SKETCH_USER, username, values)
+        self._add_interactions(cur, project, username, tweet.get("interactions") or [],
+                               created_ts or now)
         return True
 
-    def get_all_tweets(self) -> list:
-        """Get all tweets from the database"""
-        cur = self.conn.cursor()
-        cur.execute("""
-            SELECT id, username, text, score, url, created_at, engagement
-            FROM tweets 
-            ORDER BY score DESC
-        """)
+    def has_content(self, content_hash: str, project: str) -> bool:
+        """True if a tweet with this normalized content hash is already stored for the project"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute("SELECT 1 FROM content_hashes WHERE project = ? AND content_hash = ?", (project, content_hash))
+            return cur.fetchone() is not None
+
+    def get_shared_score(self, tweet_id: str) -> Optional[float]:
+        """The agent score of this tweet if it is already stored and scored for any project"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(f"SELECT score FROM tweets WHERE id = ? AND score_status = '{SCORED}' LIMIT 1", (tweet_id,))
+            row = cur.fetchone()
+        return None if row is None else row[0]
+
+    def get_all_tweets(self, project: Optional[str] = None, include_unscored: bool = False) -> list:
+        """Get all tweets from the database, optionally for a single project.
+
+        Tweets without an agent score (unscored, prescored) are excluded by default so
+        they never count as 0.0 in stats.
+        """
+        query = """
+            SELECT id, username, text, score, url, created_at, engagement, project
+            FROM tweets
+        """
+        conditions = []
+        params = []
+        if project:
+            conditions.append("project = ?")
+            params.append(project)
+        if not include_unscored:
+            conditions.append("score IS NOT NULL")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY score DESC"
+
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(query, params)
+            rows = cur.fetchall()
         
         tweets = []
-        for row in cur.fetchall():
+        for row in rows:
             tweet = {
                 'id': row[0],
                 'username': row[1],
@@ -115,12 +873,757 @@ class SQLiteStorage:
                 'score': row[3],
                 'url': row[4],
                 'created_at': row[5],
-                'engagement': json.loads(row[6]) if row[6] else {}
+                'engagement': json.loads(row[6]) if row[6] else {},
+                'project': row[7]
             }
             tweets.append(tweet)
         
         return tweets
 
+    def get_tweet_columns(self, project: Optional[str] = None, username: Optional[str] = None,
+                          include_unscored: bool = False) -> Dict[str, "np.ndarray"]:
+        """Tweets as columnar NumPy arrays, ordered and filtered like get_all_tweets.
+
+        Engagement counts are extracted by SQLite (json_extract) into int64 arrays;
+        score and created_ts are float64 with NaN for missing values.
+        """
+        import numpy as np
+
+        conditions = []
+        params = []
+        if project:
+            conditions.append("project = ?")
+            params.append(project)
+        if username:
+            conditions.append("username = ?")
+            params.append(username)
+        if not include_unscored:
+            conditions.append("score IS NOT NULL")
+        query = (
+            "SELECT id, username, text, url, created_at, project, score, created_ts, "
+            + ", ".join(f"COALESCE(json_extract(engagement, '$.{f}'), 0)" for f in ENGAGEMENT_FIELDS)
+            + " FROM tweets"
+        )
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY score DESC"
+
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(query, params)
+            rows = cur.fetchall()
+
+        names = ("id", "username", "text", "url", "created_at", "project", "score", "created_ts") + ENGAGEMENT_FIELDS
+        if not rows:
+            columns = [[] for _ in names]
+        else:
+            columns = list(zip(*rows))
+        result = {}
+        for name, values in zip(names, columns):
+            if name in ("score", "created_ts"):
+                result[name] = np.array(values, dtype=np.float64)  # None -> NaN
+            elif name in ENGAGEMENT_FIELDS:
+                result[name] = np.array(values, dtype=np.int64)
+            else:
+                result[name] = np.array(values, dtype=object)
+        return result
+
+    def search_tweets(self, query: str, username: Optional[str] = None, project: Optional[str] = None,
+                      min_score: Optional[float] = None, max_score: Optional[float] = None,
+                      since: Optional[int] = None, until: Optional[int] = None,
+                      limit: int = 50, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """Ranked full-text search (best bm25 first) with keyset pagination.
+
+        since/until are epoch seconds on the tweet's created time. Returns (tweets,
+        next_cursor); next_cursor is None on the last page. Raises ValueError for an
+        empty query or a malformed cursor.
+        """
+        match = fts_query(query)
+        if not match:
+            raise ValueError("empty search query")
+        conditions = [f"t.score_status != '{UNSCORED}'"]
+        params: list = [match]
+        if username:
+            conditions.append("t.username = ? COLLATE NOCASE")
+            params.append(username.lstrip("@"))
+        if project:
+            conditions.append("t.project = ?")
+            params.append(project)
+        if min_score is not None:
+            conditions.append("t.score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append("t.score <= ?")
+            params.append(max_score)
+        if since is not None:
+            conditions.append("t.created_ts >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("t.created_ts < ?")
+            params.append(until)
+        if cursor:
+            rank, rowid = _decode_cursor(cursor)
+            conditions.append("(hits.rank > ? OR (hits.rank = ? AND t.rowid > ?))")
+            params.extend([rank, rank, rowid])
+        params.append(limit + 1)
+
+        sql = f"""
+            WITH hits AS (
+                SELECT rowid AS rid, bm25(tweets_fts) AS rank FROM tweets_fts WHERE tweets_fts MATCH ?
+            )
+            SELECT t.id, t.username, t.text, t.score, t.url, t.created_at, t.engagement, t.project,
+                   t.score_status, hits.rank, t.rowid
+            FROM hits JOIN tweets t ON t.rowid = hits.rid
+            WHERE {" AND ".join(conditions)}
+            ORDER BY hits.rank, t.rowid
+            LIMIT ?
+        """
+        with self._lock:
+            cur = self.conn.cursor()
+            try:
+                cur.execute(sql, params)
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"invalid search query: {e}")
+            rows = cur.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1][9], rows[-1][10])
+        tweets = [{
+            'id': row[0],
+            'username': row[1],
+            'text': row[2],
+            'score': row[3],
+            'url': row[4],
+            'created_at': row[5],
+            'engagement': json.loads(row[6]) if row[6] else {},
+            'project': row[7],
+            'score_status': row[8],
+            'rank': round(-row[9], 4),
+        } for row in rows]
+        return tweets, next_cursor
+
+    def get_change_seq(self) -> int:
+        """Current head of the change sequence"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute("SELECT value FROM sync_state WHERE key = 'change_seq'")
+            row = cur.fetchone()
+        return row[0] if row else 0
+
+    def get_changes(self, since: int, limit: int = 500, project: Optional[str] = None) -> Tuple[list, int, bool]:
+        """Tweets inserted or updated after change_seq `since`, oldest change first.
+
+        Returns (tweets, cursor, has_more); cursor is the change_seq to poll from next.
+        Unscored tweets are included so clients can track their score_status.
+        """
+        query = """
+            SELECT id, username, text, score, url, created_at, engagement, project, score_status, change_seq
+            FROM tweets
+            WHERE change_seq > ? AND change_seq <= ?
+        """
+        if project:
+            query += " AND project = ?"
+        query += " ORDER BY change_seq LIMIT ?"
+        with self._lock:
+            # Read the head first: changes committed by other writers meanwhile
+            # fall past it and are returned by the next poll
+            head = self.get_change_seq()
+            params = [since, head] + ([project] if project else []) + [limit + 1]
+            cur = self.conn.cursor()
+            cur.execute(query, params)
+            rows = cur.fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        # Without more rows the client is caught up to the head, even if the
+        # newest changes belonged to another project
+        cursor = rows[-1][9] if has_more else head
+        tweets = [{
+            'id': row[0],
+            'username': row[1],
+            'text': row[2],
+            'score': row[3],
+            'url': row[4],
+            'created_at': row[5],
+            'engagement': json.loads(row[6]) if row[6] else {},
+            'project': row[7],
+            'score_status': row[8],
+            'change_seq': row[9],
+        } for row in rows]
+        return tweets, cursor, has_more
+
+    def get_aggregates(self, project: Optional[str] = None, recent_since: Optional[int] = None) -> dict:
+        """Headline totals over tweets with an agent score (same thresholds as /api/crestal-data stats)
+
+        With recent_since (epoch seconds), also counts those created since then ('recent_tweets').
+        """
+        recent = "SUM(CASE WHEN created_ts >= ? THEN 1 ELSE 0 END)" if recent_since is not None else "NULL"
+        query = f"""
+            SELECT COUNT(*), AVG(score), MAX(score),
+                   SUM(CASE WHEN score >= 0.03 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN score < 0.01 THEN 1 ELSE 0 END),
+                   COUNT(DISTINCT username),
+                   (SELECT COUNT(*) FROM tweets WHERE score_status = '{UNSCORED}'{" AND project = ?" if project else ""}),
+                   {recent}
+            FROM tweets
+            WHERE score IS NOT NULL
+        """
+        params: list = [project] if project else []
+        if recent_since is not None:
+            params.append(recent_since)
+        if project:
+            query += " AND project = ?"
+            params.append(project)
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(query, params)
+            total, avg_score, top_score, high, low, users, unscored, recent_count = cur.fetchone()
+        aggregates = {
+            'total_tweets': total,
+            'avg_score': round(avg_score or 0, 4),
+            'top_score': top_score or 0,
+            'high_quality': high or 0,
+            'low_quality': low or 0,
+            'unique_users': users,
+            'unscored_tweets': unscored,
+        }
+        if recent_since is not None:
+            aggregates['recent_tweets'] = recent_count or 0
+        return aggregates
+
+    def get_unscored_tweets(self, limit: int = 200) -> list:
+        """Oldest-first batch from the deferred re-scoring queue (unscored and stale tweets),
+        one entry per id however many projects it is stored for"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                f"""
+                SELECT id, username, text, created_at, engagement, project, MIN(inserted_at) AS queued_at
+                FROM tweets
+                WHERE score_status IN ('{UNSCORED}', '{STALE}')
+                GROUP BY id
+                ORDER BY queued_at
+                LIMIT ?
+                """,
+                (limit,),
+            )
+            rows = cur.fetchall()
+        return [{
+            'id': row[0],
+            'username': row[1],
+            'text': row[2],
+            'created_at': row[3],
+            'engagement': json.loads(row[4]) if row[4] else {},
+            'project': row[5]
+        } for row in rows]
+
+    def count_unscored(self) -> int:
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(f"SELECT COUNT(DISTINCT id) FROM tweets WHERE score_status IN ('{UNSCORED}', '{STALE}')")
+            return cur.fetchone()[0]
+
+    def update_score(self, tweet_id: str, score: float) -> None:
+        """Record a real score for a previously unscored or stale tweet, in every project it is stored for"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute("SELECT project, username, created_ts, score FROM tweets WHERE id = ?", (tweet_id,))
+            rows = cur.fetchall()
+            cur.execute(
+                f"UPDATE tweets SET score = ?, score_status = '{SCORED}' WHERE id = ?",
+                (float(score), tweet_id),
+            )
+            sketch_updates: SketchUpdates = {}
+            for project, username, created_ts, previous in rows:
+                if previous is None:
+                    # First real score: nothing to retract, sketch it directly
+                    values = {"score": float(score)}
+                    self._queue_sketch_values(sketch_updates, project, SKETCH_DAY, sketch_day(created_ts), values)
+                    self._queue_sketch_values(sketch_updates, project, SKETCH_USER, username, values)
+                elif previous != float(score):
+                    self._mark_sketches_dirty(cur, [(project, username, created_ts)])
+            self._write_sketch_updates(cur, sketch_updates)
+            with DB_COMMIT_SECONDS.time(operation="update_score"):
+                self.conn.commit()
+
+    def get_refresh_state(self, tweet_ids: Iterable[str],
+                          project: Optional[str] = None) -> Dict[str, Tuple[str, Optional[int], Optional[int]]]:
+        """tweet_id -> (created_at, engagement_refreshed_at, engagement_bucket) for stored ids,
+        optionally only those stored for one project"""
+        ids = list(tweet_ids)
+        state = {}
+        with self._lock:
+            cur = self.conn.cursor()
+            # Chunk to stay under SQLite's bound-parameter limit
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                cur.execute(
+                    "SELECT id, created_at, engagement_refreshed_at, engagement_bucket FROM tweets "
+                    f"WHERE id IN ({','.join('?' * len(chunk))})" + (" AND project = ?" if project else ""),
+                    chunk + ([project] if project else []),
+                )
+                for row in cur.fetchall():
+                    state[row[0]] = (row[1], row[2], row[3])
+        return state
+
+    def get_refresh_candidates(self, project: str, created_since: int) -> List[Tuple[str, Optional[str], str, int, Optional[int]]]:
+        """(id, keyword, username, created_ts, engagement_refreshed_at) of a project's tweets created since then"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "SELECT id, keyword, username, created_ts, engagement_refreshed_at FROM tweets "
+                "WHERE created_ts >= ? AND project = ?",
+                (created_since, project),
+            )
+            return cur.fetchall()
+
+    def apply_engagement_updates(self, updates: List[Tuple[str, dict, bool]]) -> int:
+        """Write refreshed engagement in one transaction.
+
+        updates: (tweet_id, engagement, rescore). Each update also appends a snapshot;
+        rescore=True moves scored/prescored tweets to 'stale' so they are re-scored.
+        """
+        if not updates:
+            return 0
+        now = int(time.time())
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.executemany(
+                "UPDATE tweets SET engagement = ?, engagement_refreshed_at = ?, engagement_bucket = ? WHERE id = ?",
+                [
+                    (json.dumps(engagement, ensure_ascii=False), now, engagement_bucket(engagement), tweet_id)
+                    for tweet_id, engagement, _ in updates
+                ],
+            )
+            cur.executemany(
+                f"UPDATE tweets SET score_status = '{STALE}' WHERE id = ? AND score_status IN ('{SCORED}', '{PRESCORED}')",
+                [(tweet_id,) for tweet_id, _, rescore in updates if rescore],
+            )
+            cur.executemany(
+                "INSERT OR REPLACE INTO engagement_snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [_snapshot_row(tweet_id, now, engagement) for tweet_id, engagement, _ in updates],
+            )
+            # Refreshed counts replace values already sketched: rebuild the touched buckets
+            touched = []
+            ids = [tweet_id for tweet_id, _, _ in updates]
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                cur.execute(
+                    f"SELECT project, username, created_ts FROM tweets WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                touched.extend(cur.fetchall())
+            self._mark_sketches_dirty(cur, touched)
+            self._rebuild_dirty_sketches(cur)
+            with DB_COMMIT_SECONDS.time(operation="engagement_refresh"):
+                self.conn.commit()
+        return len(updates)
+
+    def get_engagement_history(self, tweet_id: str) -> list:
+        """Engagement snapshots for one tweet, oldest first"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "SELECT polled_at, " + ", ".join(ENGAGEMENT_FIELDS) +
+                " FROM engagement_snapshots WHERE tweet_id = ? ORDER BY polled_at",
+                (tweet_id,),
+            )
+            rows = cur.fetchall()
+        return [dict(zip(("polled_at",) + ENGAGEMENT_FIELDS, row)) for row in rows]
+
+    @staticmethod
+    def _queue_sketch_values(sketch_updates: SketchUpdates, project: str, scope: str, key: str,
+                             values: Dict[str, Optional[float]]) -> None:
+        for metric, value in values.items():
+            if value is not None:
+                sketch_updates.setdefault((project, scope, key, metric), []).append(value)
+
+    @staticmethod
+    def _write_sketch_updates(cur: sqlite3.Cursor, sketch_updates: SketchUpdates) -> None:
+        """Read, update and write back each queued sketch once"""
+        rows = []
+        for (project, scope, key, metric), values in sketch_updates.items():
+            cur.execute(
+                "SELECT sketch FROM quantile_sketches WHERE project = ? AND scope = ? AND key = ? AND metric = ?",
+                (project, scope, key, metric),
+            )
+            row = cur.fetchone()
+            sketch = KLLSketch.from_json(row[0] if row else None).extend(values)
+            rows.append((project, scope, key, metric, sketch.to_json()))
+        cur.executemany("INSERT OR REPLACE INTO quantile_sketches VALUES (?, ?, ?, ?, ?)", rows)
+        sketch_updates.clear()
+
+    @staticmethod
+    def _mark_sketches_dirty(cur: sqlite3.Cursor, rows: Iterable[Tuple[str, str, Optional[int]]]) -> None:
+        """rows: (project, username, created_ts) of tweets whose sketched values changed"""
+        keys = set()
+        for project, username, created_ts in rows:
+            keys.add((project, SKETCH_DAY, sketch_day(created_ts)))
+            keys.add((project, SKETCH_USER, username))
+        cur.executemany("INSERT OR IGNORE INTO sketch_dirty VALUES (?, ?, ?)", sorted(keys))
+
+    _SKETCH_COLUMNS = (
+        "SELECT CAST(COALESCE(json_extract(engagement, '$.views'), 0) AS INTEGER), "
+        "CAST(COALESCE(json_extract(engagement, '$.likes'), 0) AS INTEGER), score FROM tweets "
+    )
+
+    @staticmethod
+    def _write_sketches(cur: sqlite3.Cursor, project: str, scope: str, key: str, rows: Iterable[tuple]) -> None:
+        sketches = {metric: KLLSketch() for metric in SKETCH_METRICS}
+        for views, likes, score in rows:
+            sketches["views"].update(views)
+            sketches["likes"].update(likes)
+            if score is not None:
+                sketches["score"].update(score)
+        cur.executemany(
+            "INSERT OR REPLACE INTO quantile_sketches VALUES (?, ?, ?, ?, ?)",
+            [(project, scope, key, metric, sketch.to_json()) for metric, sketch in sketches.items()],
+        )
+
+    def _rebuild_dirty_sketches(self, cur: sqlite3.Cursor) -> int:
+        cur.execute("SELECT project, scope, key FROM sketch_dirty")
+        dirty = cur.fetchall()
+        for project, scope, key in dirty:
+            if scope == SKETCH_USER:
+                cur.execute(self._SKETCH_COLUMNS + "WHERE project = ? AND username = ?", (project, key))
+                rows = cur.fetchall()
+            else:
+                start = int(datetime.strptime(key, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+                cur.execute(
+                    self._SKETCH_COLUMNS + "WHERE project = ? AND created_ts >= ? AND created_ts < ?",
+                    (project, start, start + 86400),
+                )
+                rows = cur.fetchall()
+                cur.execute(
+                    self._SKETCH_COLUMNS + "WHERE project = ? AND created_ts IS NULL AND date(inserted_at) = ?",
+                    (project, key),
+                )
+                rows.extend(cur.fetchall())
+            self._write_sketches(cur, project, scope, key, rows)
+        cur.execute("DELETE FROM sketch_dirty")
+        return len(dirty)
+
+    def _rebuild_all_sketches(self, cur: sqlite3.Cursor) -> None:
+        cur.execute("DELETE FROM quantile_sketches")
+        cur.execute("DELETE FROM sketch_dirty")
+        cur.execute(
+            self._SKETCH_COLUMNS.replace("FROM tweets", ", project, username, "
+                                         "COALESCE(created_ts, CAST(strftime('%s', inserted_at) AS INTEGER)) FROM tweets")
+        )
+        by_key: Dict[Tuple[str, str, str], list] = {}
+        for views, likes, score, project, username, ts in cur.fetchall():
+            by_key.setdefault((project, SKETCH_DAY, sketch_day(ts)), []).append((views, likes, score))
+            by_key.setdefault((project, SKETCH_USER, username), []).append((views, likes, score))
+        for (project, scope, key), rows in by_key.items():
+            self._write_sketches(cur, project, scope, key, rows)
+
+    def rebuild_dirty_sketches(self) -> int:
+        """Recompute sketches invalidated by score/engagement updates; returns buckets rebuilt"""
+        with self._lock:
+            cur = self.conn.cursor()
+            rebuilt = self._rebuild_dirty_sketches(cur)
+            if rebuilt:
+                self.conn.commit()
+            return rebuilt
+
+    def get_quantiles(self, project: Optional[str] = None, username: Optional[str] = None,
+                      since: Optional[int] = None, until: Optional[int] = None,
+                      metrics: Sequence[str] = SKETCH_METRICS,
+                      quantiles: Sequence[float] = (0.5, 0.9, 0.99)) -> Dict[str, dict]:
+        """metric -> {'count', 'p50', 'p90', 'p99', 'min', 'max'} merged from the stored sketches.
+
+        Per-user sketches when username is given, otherwise the per-day sketches whose day
+        overlaps [since, until] (epoch seconds, both optional; whole days are included).
+        Read-only: buckets left dirty by writes are rebuilt by the writers
+        (apply_engagement_updates, rebuild_dirty_sketches after re-scoring).
+        """
+        unknown = [m for m in metrics if m not in SKETCH_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(unknown)} (choose from {', '.join(SKETCH_METRICS)})")
+        if username and (since is not None or until is not None):
+            raise ValueError("since/until cannot be combined with username (user sketches are not time-bucketed)")
+
+        query = "SELECT metric, sketch FROM quantile_sketches WHERE scope = ?"
+        params: list = [SKETCH_USER if username else SKETCH_DAY]
+        if username:
+            query += " AND key = ?"
+            params.append(username)
+        if since is not None:
+            query += " AND key >= ?"
+            params.append(sketch_day(since))
+        if until is not None:
+            query += " AND key <= ?"
+            params.append(sketch_day(until))
+        if project:
+            query += " AND project = ?"
+            params.append(project)
+        query += f" AND metric IN ({','.join('?' * len(metrics))})"
+        params.extend(metrics)
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(query, params)
+            rows = cur.fetchall()
+
+        merged = {metric: KLLSketch() for metric in metrics}
+        for metric, payload in rows:
+            merged[metric].merge(KLLSketch.from_json(payload))
+        return {metric: sketch.summary(quantiles) for metric, sketch in merged.items()}
+
+    @staticmethod
+    def _add_interactions(cur: sqlite3.Cursor, project: str, source: str, interactions: Iterable[dict], ts: int) -> None:
+        for interaction in interactions:
+            kind, target = interaction.get("type"), interaction.get("target")
+            if kind not in INTERACTION_KINDS or not target or not source:
+                continue
+            cur.execute(
+                "SELECT weight, interactions, last_ts FROM interaction_edges "
+                "WHERE project = ? AND source = ? AND target = ? AND kind = ?",
+                (project, source, target, kind),
+            )
+            row = cur.fetchone()
+            if row is None:
+                weight, count, last_ts = 1.0, 1, ts
+            elif ts >= row[2]:
+                weight, count, last_ts = decayed_weight(row[0], row[2], ts) + 1.0, row[1] + 1, ts
+            else:
+                # Older tweet found late: add its already-decayed contribution
+                weight, count, last_ts = row[0] + decayed_weight(1.0, ts, row[2]), row[1] + 1, row[2]
+            cur.execute(
+                "INSERT OR REPLACE INTO interaction_edges VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (project, source, target, kind, weight, count, last_ts, edge_rank_key(weight, last_ts)),
+            )
+
+    def get_interaction_edges(self, username: Optional[str] = None, project: Optional[str] = None,
+                              kinds: Sequence[str] = INTERACTION_KINDS, limit: int = 50,
+                              among: Optional[Iterable[str]] = None) -> List[dict]:
+        """Strongest edges by current decayed weight, highest first.
+
+        username: up to `limit` edges from and up to `limit` edges to that user;
+        among: only edges with both ends in the set. Edges are per (project, source,
+        target, kind); callers merge across projects/kinds.
+        """
+        where = [f"kind IN ({','.join('?' * len(kinds))})"]
+        params: list = list(kinds)
+        if project:
+            where.append("project = ?")
+            params.append(project)
+        if among is not None:
+            members = list(among)
+            placeholders = ','.join('?' * len(members))
+            where.append(f"source IN ({placeholders}) AND target IN ({placeholders})")
+            params.extend(members + members)
+        query = "SELECT project, source, target, kind, weight, interactions, last_ts FROM interaction_edges"
+        if username:
+            # Two index range scans instead of an OR over both columns
+            query = (
+                f"SELECT * FROM ({query} WHERE source = ? AND {' AND '.join(where)} ORDER BY rank_key DESC LIMIT ?) "
+                f"UNION ALL SELECT * FROM ({query} WHERE target = ? AND {' AND '.join(where)} ORDER BY rank_key DESC LIMIT ?)"
+            )
+            params = [username] + params + [limit, username] + params + [limit]
+        else:
+            query += f" WHERE {' AND '.join(where)} ORDER BY rank_key DESC LIMIT ?"
+            params.append(limit)
+        now = time.time()
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(query, params)
+            rows = cur.fetchall()
+        edges = [{
+            'project': row[0],
+            'source': row[1],
+            'target': row[2],
+            'kind': row[3],
+            'weight': decayed_weight(row[4], row[6], now),
+            'interactions': row[5],
+            'last_ts': row[6],
+        } for row in rows]
+        edges.sort(key=lambda edge: edge['weight'], reverse=True)
+        return edges
+
+    def get_heatmap(self, project: Optional[str] = None, keyword: Optional[str] = None, days: int = 14) -> dict:
+        """Activity cube from the bucket tables: day-of-week x hour over all time plus the last `days` days by hour.
+
+        Each cell is {'tweets', 'avg_score', 'engagement'}; avg_score is None where nothing is scored.
+        Reads at most 168 + 24 * days rows per project/keyword slice, whatever the archive size.
+        """
+        where, params = [], []
+        if project:
+            where.append("project = ?")
+            params.append(project)
+        if keyword is not None:
+            where.append("keyword = ?")
+            params.append(keyword)
+        clause = (" WHERE " + " AND ".join(where)) if where else ""
+        sums = "SUM(tweets), SUM(scored), SUM(score_sum), SUM(engagement)"
+
+        def cell(tweets, scored, score_sum, engagement) -> dict:
+            return {
+                'tweets': int(tweets or 0),
+                'avg_score': round(score_sum / scored, 4) if scored else None,
+                'engagement': int(engagement or 0),
+            }
+
+        empty = lambda: [{'tweets': 0, 'avg_score': None, 'engagement': 0} for _ in range(24)]
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(f"SELECT dow, hour, {sums} FROM activity_weekly{clause} GROUP BY dow, hour", params)
+            weekly_rows = cur.fetchall()
+            daily_rows = []
+            if days > 0:
+                since_day = time.strftime("%Y-%m-%d", time.gmtime(time.time() - (days - 1) * 86400))
+                daily_clause = (clause + " AND " if clause else " WHERE ") + "day >= ?"
+                cur.execute(
+                    f"SELECT day, hour, {sums} FROM activity_hourly{daily_clause} GROUP BY day, hour ORDER BY day",
+                    params + [since_day],
+                )
+                daily_rows = cur.fetchall()
+            cur.execute(
+                "SELECT DISTINCT keyword FROM activity_weekly WHERE tweets > 0" + (" AND project = ?" if project else "")
+                + " ORDER BY keyword",
+                [project] if project else [],
+            )
+            keywords = [row[0] for row in cur.fetchall() if row[0]]
+
+        week = [empty() for _ in HEATMAP_DAYS]
+        for dow, hour, *values in weekly_rows:
+            week[dow][hour] = cell(*values)
+        by_day: Dict[str, list] = {}
+        for day, hour, *values in daily_rows:
+            by_day.setdefault(day, empty())[hour] = cell(*values)
+        return {
+            'week': [{'day': name, 'hours': hours} for name, hours in zip(HEATMAP_DAYS, week)],
+            'days': [{'day': day, 'hours': hours} for day, hours in by_day.items()],
+            'keywords': keywords,
+        }
+
+    def get_leaderboard(self, limit: int = 20, project: Optional[str] = None) -> Tuple[list, int]:
+        """(rows, total_contributors): users ranked by average score over their scored tweets.
+
+        Ordered and limited in SQL along idx_user_stats_rank (one project) or idx_users_rank
+        (all projects, from the per-user totals).
+        """
+        if project:
+            query = (
+                f"SELECT u.username, {_leaderboard_avg('s')}, s.score_max, s.scored_count "
+                "FROM user_stats s JOIN users u ON u.user_id = s.user_id "
+                f"WHERE s.project = ? AND s.scored_count > 0 ORDER BY {_leaderboard_avg('s')} DESC, u.username LIMIT ?"
+            )
+            count_query = "SELECT COUNT(*) FROM user_stats WHERE project = ? AND scored_count > 0"
+            params: list = [project]
+        else:
+            query = (
+                f"SELECT u.username, {_leaderboard_avg('u')}, "
+                "(SELECT MAX(s.score_max) FROM user_stats s WHERE s.user_id = u.user_id), u.scored_count "
+                f"FROM users u WHERE u.scored_count > 0 ORDER BY {_leaderboard_avg('u')} DESC, u.username LIMIT ?"
+            )
+            count_query = "SELECT COUNT(*) FROM users WHERE scored_count > 0"
+            params = []
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(query, params + [limit])
+            rows = cur.fetchall()
+            cur.execute(count_query, params)
+            total = cur.fetchone()[0]
+        return [
+            {
+                'username': username,
+                'avg_score': avg,
+                'best_score': round(best or 0.0, 2),
+                'tweet_count': scored,
+            }
+            for username, avg, best, scored in rows
+        ], total
+
+    def get_user(self, username: str, project: Optional[str] = None) -> Optional[dict]:
+        """Profile and aggregates for one user (None if never stored)"""
+        query = (
+            "SELECT u.user_id, u.username, u.twitter_id, u.display_name, u.followers, u.following, u.statuses, "
+            "u.verified, u.blue_verified, u.account_created_ts, u.profile_updated_at, "
+            "SUM(s.tweet_count), SUM(s.scored_count), SUM(s.score_sum), MAX(s.score_max), SUM(s.engagement), "
+            "MIN(s.first_seen), MAX(s.last_seen) "
+            "FROM users u LEFT JOIN user_stats s ON s.user_id = u.user_id"
+        )
+        params: list = []
+        if project:
+            query += " AND s.project = ?"
+            params.append(project)
+        query += " WHERE u.username = ? GROUP BY u.user_id"
+        params.append(username)
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(query, params)
+            row = cur.fetchone()
+        if row is None:
+            return None
+        return {
+            'user_id': row[0],
+            'username': row[1],
+            'profile': {
+                'twitter_id': row[2],
+                'display_name': row[3],
+                'followers': row[4],
+                'following': row[5],
+                'statuses': row[6],
+                'verified': None if row[7] is None else bool(row[7]),
+                'blue_verified': None if row[8] is None else bool(row[8]),
+                'account_created_ts': row[9],
+                'profile_updated_at': row[10],
+            },
+            'tweet_count': row[11] or 0,
+            'scored_count': row[12] or 0,
+            'avg_score': (row[13] / row[12]) if row[12] else 0.0,
+            'best_score': row[14] or 0.0,
+            'engagement': row[15] or 0,
+            'first_seen': row[16],
+            'last_seen': row[17],
+        }
+
+    def get_user_top_tweets(self, user_id: int, limit: int = 20, project: Optional[str] = None) -> list:
+        """A user's highest-scored tweets (scored, prescored or stale), via the (user_id, score) index"""
+        query = (
+            "SELECT id, text, score, created_at, engagement FROM tweets "
+            "WHERE user_id = ? AND score IS NOT NULL"
+        )
+        params: list = [user_id]
+        if project:
+            query += " AND project = ?"
+            params.append(project)
+        else:
+            # Once per tweet, not once per project it matched
+            query += " GROUP BY id"
+        query += " ORDER BY score DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(query, params)
+            rows = cur.fetchall()
+        return [{
+            'id': row[0],
+            'text': row[1] or '',
+            'score': float(row[2]),
+            'created_at': row[3] or '',
+            'engagement': {f: int(engagement.get(f, 0) or 0) for f in ENGAGEMENT_FIELDS},
+        } for row in rows for engagement in [json.loads(row[4]) if row[4] else {}]]
+
+    def get_author_stats(self) -> dict:
+        """username -> (tweet_count, avg_score) over tweets scored by the agent"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                f"SELECT username, COUNT(*), AVG(score) FROM tweets WHERE score_status = '{SCORED}' GROUP BY username"
+            )
+            rows = cur.fetchall()
+        return {row[0]: (row[1], row[2] or 0.0) for row in rows}
+
+    def get_projects(self) -> list:
+        """Return (project, tweet_count) pairs for every project with stored tweets"""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute("SELECT project, COUNT(*) FROM tweets GROUP BY project ORDER BY project")
+            return cur.fetchall()
+
     def close(self) -> None:
         try:
             self.conn.close()
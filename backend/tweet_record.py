@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory tweet record shared by the fetcher, dedup, the scorer and storage.
+
+A fetched tweet used to be a dict with a nested engagement dict, a list of
+interaction dicts and its own author dict, about 1.2 KB of overhead before the
+text itself. TweetRecord keeps the same fields in __slots__, engagement as six
+plain int fields and interactions as (kind, target) tuples, and interns the
+strings that repeat across tweets (usernames, keywords, project names); the
+fetcher shares one author dict per user. That is ~350 bytes per tweet
+(python -m benchmarks.bench_tweet_memory).
+
+It still reads like the old dict (tweet['id'], tweet.get('engagement'), ...),
+so code that only reads tweets does not need to know which one it has.
+Checkpoints serialize it with to_dict() and load it back with from_dict().
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+ENGAGEMENT_FIELDS = ("likes", "retweets", "replies", "views", "bookmarks", "quote_tweets")
+
+# Keys that are always present, in the order the old dicts had them
+_BASE_KEYS = ("id", "text", "username", "created_at", "engagement", "interactions", "author")
+# Keys filled in later by the pipeline; absent until set
+_OPTIONAL_KEYS = ("project", "keyword", "prescore", "score", "score_status")
+_KEYS = frozenset(_BASE_KEYS + _OPTIONAL_KEYS)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TweetRecord(Mapping):
+    __slots__ = (
+        "id", "text", "username", "created_at",
+        "likes", "retweets", "replies", "views", "bookmarks", "quote_tweets",
+        "_interactions", "author",
+        "project", "keyword", "prescore", "score", "score_status",
+    )
+
+    def __init__(self, id: str, text: str = "", username: str = "unknown", created_at: str = "",
+                 engagement: Optional[Dict[str, Any]] = None,
+                 interactions: Iterable = (), author: Optional[Dict[str, Any]] = None,
+                 project: Optional[str] = None, keyword: Optional[str] = None,
+                 prescore: Optional[float] = None, score: Optional[float] = None,
+                 score_status: Optional[str] = None) -> None:
+        self.id = id
+        self.text = text
+        self.username = _intern(username)
+        self.created_at = created_at
+        self.engagement = engagement
+        self.interactions = interactions
+        self.author = author
+        self.project = _intern(project)
+        self.keyword = _intern(keyword)
+        self.prescore = prescore
+        self.score = score
+        self.score_status = _intern(score_status)
+
+    # --- Engagement as a dict view over the int fields ---
+
+    @property
+    def engagement(self) -> Dict[str, int]:
+        return {
+            "likes": self.likes, "retweets": self.retweets, "replies": self.replies,
+            "views": self.views, "bookmarks": self.bookmarks, "quote_tweets": self.quote_tweets,
+        }
+
+    @engagement.setter
+    def engagement(self, values: Optional[Dict[str, Any]]) -> None:
+        values = values or {}
+        for field in ENGAGEMENT_FIELDS:
+            setattr(self, field, int(values.get(field, 0) or 0))
+
+    def has_engagement(self) -> bool:
+        return any(getattr(self, field) > 0 for field in ENGAGEMENT_FIELDS)
+
+    # --- Interactions as [{"type", "target"}] for storage and checkpoints ---
+
+    @property
+    def interactions(self) -> List[Dict[str, str]]:
+        return [{"type": kind, "target": target} for kind, target in self._interactions]
+
+    @interactions.setter
+    def interactions(self, values: Iterable) -> None:
+        pairs = []
+        for value in values or ():
+            kind, target = (value.get("type"), value.get("target")) if isinstance(value, dict) else value
+            pairs.append((sys.intern(kind), _intern(target)))
+        self._interactions: Tuple[Tuple[str, str], ...] = tuple(pairs)
+
+    # --- Read-only mapping protocol, plus item assignment for the pipeline's fields ---
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _KEYS:
+            raise KeyError(key)
+        if key in ("username", "project", "keyword", "score_status"):
+            value = _intern(value)
+        setattr(self, key, value)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from _BASE_KEYS
+        for key in _OPTIONAL_KEYS:
+            if getattr(self, key) is not None:
+                yield key
+
+    def __contains__(self, key: object) -> bool:
+        return key in _BASE_KEYS or (key in _KEYS and getattr(self, key) is not None)
+
+    def __len__(self) -> int:
+        return len(_BASE_KEYS) + sum(getattr(self, key) is not None for key in _OPTIONAL_KEYS)
+
+    def __repr__(self) -> str:
+        return f"TweetRecord(id={self.id!r}, username={self.username!r}, text={self.text[:40]!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TweetRecord":
+        if isinstance(data, cls):
+            return data
+        return cls(**{key: value for key, value in data.items() if key in _KEYS})
+
+
+def compact(items: List, keep: Callable[[Any], bool]) -> int:
+    """Drop items failing `keep` in place (stable, no second list); returns the number removed"""
+    write = 0
+    for item in items:
+        if keep(item):
+            items[write] = item
+            write += 1
+    removed = len(items) - write
+    del items[write:]
+    return removed
+
+
+def select(items: Sequence, indices: Iterable[int]) -> List:
+    """Materialize an index view; the records themselves are shared, not copied"""
+    return [items[i] for i in indices]
@@ -62,6 +62,19 @@ def clear_database():
         cursor.execute("DELETE FROM content_hashes")
         print(f"🗑️ Clearing content hashes table...")
         
+        # Sketches and interaction edges can't subtract deleted tweets (activity buckets follow via triggers)
+        for table in ("quantile_sketches", "sketch_dirty", "interaction_edges"):
+            try:
+                cursor.execute(f"DELETE FROM {table}")
+            except sqlite3.OperationalError:
+                pass  # Older database without the table
+        
+        # Backfill cursors would otherwise skip the history that was just deleted
+        try:
+            cursor.execute("DELETE FROM backfill_cursors")
+        except sqlite3.OperationalError:
+            pass
+        
         conn.commit()
         
         # Clear seen hashes file
@@ -1,6 +1,6 @@
 "use client"
 
-import { useEffect, useState } from "react"
+import { useEffect, useRef, useState } from "react"
 import { DashboardHeader } from "@/components/dashboard-header"
 import { TrendingContent } from "@/components/trending-content"
 import { Leaderboard } from "@/components/leaderboard"
@@ -12,7 +12,27 @@ import { HeroSection } from "@/components/hero-section"
 import { DataRain } from "@/components/data-rain"
 import { EnhancedMetrics } from "@/components/enhanced-metrics"
 
-import { apiService, Tweet, SystemStats } from "../lib/api"
+import { apiService, leaderboardToTweets, toTweet, Tweet, ChangedTweet, DashboardSection, SystemStats } from "../lib/api"
+
+const TWEET_LIMIT = 100
+const LEADERBOARD_LIMIT = 20
+const SECTIONS: DashboardSection[] = ['stats', 'engagement', 'quality', 'leaderboard', 'tweets']
+
+// Apply changed tweets to the top-by-score list: updated tweets are replaced,
+// tweets without a score yet (or any more) drop out
+function mergeTweets(current: Tweet[], changed: ChangedTweet[]): Tweet[] {
+  const byId = new Map(current.map((tweet) => [tweet.id, tweet]))
+  for (const tweet of changed) {
+    if (tweet.score === null) {
+      byId.delete(tweet.id)
+    } else {
+      byId.set(tweet.id, toTweet(tweet))
+    }
+  }
+  return Array.from(byId.values())
+    .sort((a, b) => b.score - a.score)
+    .slice(0, TWEET_LIMIT)
+}
 
 export default function Dashboard() {
   const [isLoaded, setIsLoaded] = useState(true)
@@ -26,42 +46,91 @@ export default function Dashboard() {
     top_score: 0,
     last_updated: ''
   })
+  const [engagementMetrics, setEngagementMetrics] = useState<any>(null)
+  const [qualityMetrics, setQualityMetrics] = useState<any>(null)
   const [error, setError] = useState<string | null>(null)
+  // Delta cursor for /api/changes; null until a full load has succeeded
+  const cursorRef = useRef<string | null>(null)
+  const pollingRef = useRef(false)
 
   useEffect(() => {
-    const fetchData = async () => {
+    // Every section in one request; the bundle's cursor is where its data is current to,
+    // so polling from it picks up anything newer (even when the bundle came from cache)
+    const loadAll = async (init?: RequestInit) => {
+      const bundle = await apiService.getDashboardBundle(SECTIONS, TWEET_LIMIT, LEADERBOARD_LIMIT, init)
+      const { stats: statsSection, engagement, quality, leaderboard: leaderboardSection, tweets: tweetsSection } = bundle.data
+      const loadedTweets: Tweet[] = (tweetsSection?.data || []).map(toTweet)
+
+      setTweets(loadedTweets)
+      setLeaderboard(leaderboardToTweets(leaderboardSection?.data || []))
+      setStats({
+        total_tweets: statsSection?.overview?.total_tweets || 0,
+        recent_tweets_24h: statsSection?.activity?.last_24h_tweets || 0,
+        average_score: statsSection?.overview?.avg_score || 0,
+        top_score: loadedTweets[0]?.score || 0,  // tweets come sorted by score
+        last_updated: statsSection?.overview?.last_updated || new Date().toISOString()
+      })
+      setEngagementMetrics(engagement ?? null)
+      setQualityMetrics(quality ?? null)
+      cursorRef.current = bundle.cursor
+    }
+
+    const pollChanges = async (cursor: string) => {
+      const changes = await apiService.getChanges(cursor)
+      if (changes.reset || changes.has_more) {
+        // Database was rebuilt or too much changed to patch in: start over
+        console.log('🔄 Resyncing dashboard data...')
+        await loadAll({ cache: 'no-cache' })
+        return
+      }
+      cursorRef.current = changes.cursor
+      if (!changes.count) return
+
+      console.log(`🔄 Applying ${changes.count} changed tweets`)
+      setTweets((current) => mergeTweets(current, changes.data))
+      const aggregates = changes.aggregates
+      if (aggregates) {
+        setStats((current) => ({
+          ...current,
+          total_tweets: aggregates.total_tweets,
+          average_score: aggregates.avg_score,
+          top_score: aggregates.top_score,
+          last_updated: new Date().toISOString()
+        }))
+      }
+      // Rankings depend on every author's tweets, so re-read them (revalidated, not from the
+      // browser cache), but only when something changed
+      const leaderboardResponse = await apiService.getLeaderboard(LEADERBOARD_LIMIT, { cache: 'no-cache' })
+      setLeaderboard(leaderboardResponse.data || [])
+    }
+
+    const refresh = async () => {
+      if (pollingRef.current) return
+      pollingRef.current = true
       try {
         setError(null)
-        
-        // Fetch data from API
-        const [tweetsResponse, leaderboardResponse, statsResponse] = await Promise.all([
-          apiService.getTweets(100),  // Increased from 50 to 100
-          apiService.getLeaderboard(20),
-          apiService.getSystemStats()
-        ])
-
-        setTweets(tweetsResponse.data || [])
-        setLeaderboard(leaderboardResponse.data || [])
-        setStats(statsResponse.statistics)
-        
+        if (cursorRef.current === null) {
+          await loadAll()
+        } else {
+          await pollChanges(cursorRef.current)
+        }
       } catch (err) {
         console.error('Failed to fetch data:', err)
         setError('Failed to load data from backend')
+      } finally {
+        pollingRef.current = false
       }
     }
 
-    // Fetch data immediately
-    fetchData()
+    // Full load immediately, then deltas
+    refresh()
 
     // No loading timer - instant load
     setIsLoading(false)
     setIsLoaded(true)
 
-    // Set up auto-refresh every 10 seconds for real-time updates
-    const refreshInterval = setInterval(() => {
-      console.log('🔄 Auto-refreshing data...')
-      fetchData()
-    }, 10000) // 10 seconds
+    // Poll for changes every 10 seconds for real-time updates
+    const refreshInterval = setInterval(refresh, 10000) // 10 seconds
 
     return () => {
       clearInterval(refreshInterval)
@@ -92,7 +161,7 @@ export default function Dashboard() {
         {error && (
           <div className="container mx-auto px-4 py-4">
             <div className="bg-red-500/20 border border-red-500/30 rounded-lg p-4 text-red-400">
-              ⚠️ {error} - Showing demo data
+              ⚠️ {error}
             </div>
           </div>
         )}
@@ -102,7 +171,7 @@ export default function Dashboard() {
           <div
             className={`transition-all duration-1000 delay-200 ${isLoaded ? "opacity-100 translate-y-0" : "opacity-0 translate-y-8"}`}
           >
-            <EnhancedMetrics />
+            <EnhancedMetrics engagementMetrics={engagementMetrics} qualityMetrics={qualityMetrics} />
           </div>
           
           <div
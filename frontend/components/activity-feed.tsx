@@ -5,7 +5,7 @@ import { Badge } from "@/components/ui/badge"
 import { Activity, MessageSquare, TrendingUp, AlertTriangle, CheckCircle } from "lucide-react"
 import { useState, useEffect } from "react"
 
-import { Tweet as ApiTweet } from "../lib/api"
+import { Tweet as ApiTweet, apiService } from "../lib/api"
 
 interface ActivityFeedProps {
   tweets?: ApiTweet[]
@@ -87,15 +87,24 @@ export function ActivityFeed({ tweets: apiTweets = [] }: ActivityFeedProps) {
         setVisibleActivities((prev) => [...prev, activity.id])
       }, index * 150)
     })
+  }, [apiTweets])
 
-    // Simulate new activity every 10 seconds
-    const interval = setInterval(() => {
-      setNewActivity(true)
-      setTimeout(() => setNewActivity(false), 2000)
-    }, 10000)
+  useEffect(() => {
+    // Flash the indicator whenever the backend stores or updates a tweet
+    let timeout: ReturnType<typeof setTimeout> | undefined
+    const unsubscribe = apiService.subscribeToStream({
+      onTweet: () => {
+        setNewActivity(true)
+        clearTimeout(timeout)
+        timeout = setTimeout(() => setNewActivity(false), 2000)
+      },
+    })
 
-    return () => clearInterval(interval)
-  }, [apiTweets])
+    return () => {
+      clearTimeout(timeout)
+      unsubscribe()
+    }
+  }, [])
 
   const getStatusColor = (status: string) => {
     switch (status) {
@@ -3,35 +3,15 @@
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Badge } from "@/components/ui/badge"
 import { Heart, MessageCircle, Repeat2, Eye, TrendingUp, BarChart3, Users, Target } from "lucide-react"
-import { useState, useEffect } from "react"
-import { apiService } from "../lib/api"
 
-export function EnhancedMetrics() {
-  const [engagementMetrics, setEngagementMetrics] = useState<any>(null)
-  const [qualityMetrics, setQualityMetrics] = useState<any>(null)
-  const [isLoading, setIsLoading] = useState(true)
-
-  useEffect(() => {
-    const fetchMetrics = async () => {
-      try {
-        const [engagement, quality] = await Promise.all([
-          apiService.getEngagementMetrics(),
-          apiService.getQualityDistribution()
-        ])
-        
-        setEngagementMetrics(engagement.data)
-        setQualityMetrics(quality.data)
-      } catch (error) {
-        console.error('Failed to fetch enhanced metrics:', error)
-      } finally {
-        setIsLoading(false)
-      }
-    }
-
-    fetchMetrics()
-  }, [])
+interface EnhancedMetricsProps {
+  // 'engagement' and 'quality' sections of the dashboard bundle; null until loaded
+  engagementMetrics: any
+  qualityMetrics: any
+}
 
-  if (isLoading) {
+export function EnhancedMetrics({ engagementMetrics, qualityMetrics }: EnhancedMetricsProps) {
+  if (!engagementMetrics && !qualityMetrics) {
     return (
       <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-4 lg:gap-6">
         {[...Array(8)].map((_, i) => (
@@ -1,13 +1,36 @@
 "use client"
 
-import { useEffect, useRef } from "react"
+import { useEffect, useRef, useState } from "react"
+import { apiService, InteractionGraph } from "../lib/api"
+
+const CLUSTER_COLORS = ["#D0FF16", "#16D0FF", "#FF16D0", "#FFB016", "#16FF8A", "#B016FF"]
 
 export function NetworkVisualization() {
   const canvasRef = useRef<HTMLCanvasElement>(null)
+  const [graph, setGraph] = useState<InteractionGraph | null>(null)
+
+  useEffect(() => {
+    let cancelled = false
+    const fetchGraph = async () => {
+      try {
+        const response = await apiService.getGraph({ k: 30 })
+        if (!cancelled && response.success) setGraph(response.data)
+      } catch (error) {
+        console.error("Failed to fetch interaction graph:", error)
+      }
+    }
+
+    fetchGraph()
+    const interval = setInterval(fetchGraph, 5 * 60 * 1000)
+    return () => {
+      cancelled = true
+      clearInterval(interval)
+    }
+  }, [])
 
   useEffect(() => {
     const canvas = canvasRef.current
-    if (!canvas) return
+    if (!canvas || !graph) return
 
     const ctx = canvas.getContext("2d")
     if (!ctx) return
@@ -15,71 +38,118 @@ export function NetworkVisualization() {
     canvas.width = canvas.offsetWidth
     canvas.height = 300
 
-    const nodes = Array.from({ length: 20 }, () => ({
-      x: Math.random() * canvas.width,
-      y: Math.random() * canvas.height,
-      vx: (Math.random() - 0.5) * 2,
-      vy: (Math.random() - 0.5) * 2,
-      radius: Math.random() * 5 + 3,
-      connections: Math.floor(Math.random() * 3) + 1,
-    }))
-
-    function animate() {
+    const maxStrength = Math.max(1, ...graph.nodes.map((n) => n.in_weight + n.out_weight))
+    const maxWeight = Math.max(1, ...graph.edges.map((e) => e.weight))
+    const nodes = graph.nodes.map((node, i) => {
+      // Start on a circle so the layout settles the same way every time
+      const angle = (i / Math.max(1, graph.nodes.length)) * Math.PI * 2
+      return {
+        ...node,
+        x: canvas.width / 2 + Math.cos(angle) * canvas.width * 0.3,
+        y: canvas.height / 2 + Math.sin(angle) * canvas.height * 0.3,
+        vx: 0,
+        vy: 0,
+        radius: 3 + 9 * Math.sqrt((node.in_weight + node.out_weight) / maxStrength),
+      }
+    })
+    const byId = new Map(nodes.map((node) => [node.id, node]))
+    const links = graph.edges
+      .map((edge) => ({ source: byId.get(edge.source)!, target: byId.get(edge.target)!, weight: edge.weight }))
+      .filter((link) => link.source && link.target)
+
+    let frame = 0
+    let handle = 0
+
+    function step() {
       if (!ctx || !canvas) return
-
-      ctx.clearRect(0, 0, canvas.width, canvas.height)
-
-      // Update node positions
+      // Small force-directed layout: repulsion between nodes, springs along edges, pull to centre
+      const cooling = Math.max(0.02, 1 - frame / 300)
+      for (let i = 0; i < nodes.length; i++) {
+        for (let j = i + 1; j < nodes.length; j++) {
+          const a = nodes[i]
+          const b = nodes[j]
+          const dx = a.x - b.x
+          const dy = a.y - b.y
+          const distSq = Math.max(dx * dx + dy * dy, 25)
+          const force = 800 / distSq
+          a.vx += (dx / Math.sqrt(distSq)) * force
+          a.vy += (dy / Math.sqrt(distSq)) * force
+          b.vx -= (dx / Math.sqrt(distSq)) * force
+          b.vy -= (dy / Math.sqrt(distSq)) * force
+        }
+      }
+      links.forEach(({ source, target, weight }) => {
+        const dx = target.x - source.x
+        const dy = target.y - source.y
+        const strength = 0.002 * (0.5 + weight / maxWeight)
+        source.vx += dx * strength
+        source.vy += dy * strength
+        target.vx -= dx * strength
+        target.vy -= dy * strength
+      })
       nodes.forEach((node) => {
-        node.x += node.vx
-        node.y += node.vy
-
-        if (node.x < 0 || node.x > canvas.width) node.vx *= -1
-        if (node.y < 0 || node.y > canvas.height) node.vy *= -1
+        node.vx += (canvas.width / 2 - node.x) * 0.001
+        node.vy += (canvas.height / 2 - node.y) * 0.001
+        node.x = Math.min(canvas.width - node.radius, Math.max(node.radius, node.x + node.vx * cooling))
+        node.y = Math.min(canvas.height - node.radius, Math.max(node.radius, node.y + node.vy * cooling))
+        node.vx *= 0.6
+        node.vy *= 0.6
       })
 
-      // Draw connections
-      ctx.strokeStyle = "rgba(208, 255, 22, 0.3)"
-      ctx.lineWidth = 1
-      nodes.forEach((node, i) => {
-        nodes.slice(i + 1).forEach((otherNode) => {
-          const distance = Math.sqrt(Math.pow(node.x - otherNode.x, 2) + Math.pow(node.y - otherNode.y, 2))
-          if (distance < 100) {
-            ctx.beginPath()
-            ctx.moveTo(node.x, node.y)
-            ctx.lineTo(otherNode.x, otherNode.y)
-            ctx.stroke()
-          }
-        })
+      ctx.clearRect(0, 0, canvas.width, canvas.height)
+
+      // Draw connections, thicker for stronger (more recent/frequent) interactions
+      links.forEach(({ source, target, weight }) => {
+        ctx.strokeStyle = `rgba(208, 255, 22, ${0.15 + 0.5 * (weight / maxWeight)})`
+        ctx.lineWidth = 0.5 + 2.5 * (weight / maxWeight)
+        ctx.beginPath()
+        ctx.moveTo(source.x, source.y)
+        ctx.lineTo(target.x, target.y)
+        ctx.stroke()
       })
 
-      // Draw nodes
+      // Draw nodes, coloured by cluster
       nodes.forEach((node) => {
+        const color = CLUSTER_COLORS[node.cluster % CLUSTER_COLORS.length]
         ctx.beginPath()
         ctx.arc(node.x, node.y, node.radius, 0, Math.PI * 2)
-        ctx.fillStyle = "#D0FF16"
-        ctx.fill()
+        ctx.fillStyle = color
 
         // Add glow effect
-        ctx.shadowColor = "#D0FF16"
+        ctx.shadowColor = color
         ctx.shadowBlur = 10
         ctx.fill()
         ctx.shadowBlur = 0
+
+        if (node.radius > 7) {
+          ctx.fillStyle = "#9CA3AF"
+          ctx.font = "10px sans-serif"
+          ctx.fillText(`@${node.id}`, node.x + node.radius + 2, node.y + 3)
+        }
       })
 
-      requestAnimationFrame(animate)
+      frame++
+      if (frame < 400) handle = requestAnimationFrame(step)
     }
 
-    animate()
+    step()
 
     const handleResize = () => {
       canvas.width = canvas.offsetWidth
       canvas.height = 300
+      frame = 0
+      cancelAnimationFrame(handle)
+      step()
     }
 
     window.addEventListener("resize", handleResize)
-    return () => window.removeEventListener("resize", handleResize)
-  }, [])
+    return () => {
+      cancelAnimationFrame(handle)
+      window.removeEventListener("resize", handleResize)
+    }
+  }, [graph])
+
+  const totalInteractions = graph ? graph.edges.reduce((sum, edge) => sum + edge.interactions, 0) : 0
 
   return (
     <div className="nation-card p-6">
@@ -90,16 +160,16 @@ export function NetworkVisualization() {
       <canvas ref={canvasRef} className="w-full h-[300px] rounded-lg bg-black/50" />
       <div className="mt-4 grid grid-cols-3 gap-4 text-sm">
         <div className="text-center">
-          <div className="text-nation-green font-bold">1,247</div>
+          <div className="text-nation-green font-bold">{graph ? graph.nodes.length.toLocaleString() : "-"}</div>
           <div className="text-gray-400">Active Nodes</div>
         </div>
         <div className="text-center">
-          <div className="text-nation-green font-bold">89.3%</div>
-          <div className="text-gray-400">Network Health</div>
+          <div className="text-nation-green font-bold">{graph ? graph.clusters : "-"}</div>
+          <div className="text-gray-400">Clusters</div>
         </div>
         <div className="text-center">
-          <div className="text-nation-green font-bold">2.4ms</div>
-          <div className="text-gray-400">Avg Latency</div>
+          <div className="text-nation-green font-bold">{graph ? totalInteractions.toLocaleString() : "-"}</div>
+          <div className="text-gray-400">Interactions</div>
         </div>
       </div>
     </div>
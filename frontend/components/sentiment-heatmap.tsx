@@ -1,131 +1,135 @@
 "use client"
 
 import { useState, useEffect } from "react"
+import { apiService, Heatmap, HeatmapCell } from "../lib/api"
 
-interface RegionData {
-  name: string
-  sentiment: number
-  volume: number
-  trend: "up" | "down" | "stable"
-}
+type Metric = "tweets" | "avg_score" | "engagement"
 
-export function SentimentHeatmap() {
-  const [regions, setRegions] = useState<RegionData[]>([
-    { name: "North America", sentiment: 0.78, volume: 15420, trend: "up" },
-    { name: "Europe", sentiment: 0.65, volume: 12890, trend: "stable" },
-    { name: "Asia Pacific", sentiment: 0.82, volume: 18750, trend: "up" },
-    { name: "Latin America", sentiment: 0.71, volume: 8340, trend: "down" },
-    { name: "Middle East", sentiment: 0.59, volume: 5670, trend: "stable" },
-    { name: "Africa", sentiment: 0.73, volume: 6890, trend: "up" },
-  ])
+const METRICS: Array<{ key: Metric; label: string }> = [
+  { key: "tweets", label: "Volume" },
+  { key: "avg_score", label: "Avg Score" },
+  { key: "engagement", label: "Engagement" },
+]
 
-  const [globalSentiment, setGlobalSentiment] = useState(0.72)
+export function SentimentHeatmap() {
+  const [heatmap, setHeatmap] = useState<Heatmap | null>(null)
+  const [metric, setMetric] = useState<Metric>("tweets")
+  const [keyword, setKeyword] = useState<string>("")
 
   useEffect(() => {
-    const interval = setInterval(() => {
-      setRegions((prev) =>
-        prev.map((region) => ({
-          ...region,
-          sentiment: Math.max(0, Math.min(1, region.sentiment + (Math.random() - 0.5) * 0.1)),
-          volume: Math.max(1000, region.volume + Math.floor((Math.random() - 0.5) * 1000)),
-          trend: Math.random() > 0.7 ? (Math.random() > 0.5 ? "up" : "down") : region.trend,
-        })),
-      )
-
-      setGlobalSentiment((prev) => Math.max(0, Math.min(1, prev + (Math.random() - 0.5) * 0.05)))
-    }, 5000)
-
-    return () => clearInterval(interval)
-  }, [])
-
-  const getSentimentColor = (sentiment: number) => {
-    if (sentiment >= 0.8) return "bg-green-500"
-    if (sentiment >= 0.6) return "bg-yellow-500"
-    return "bg-red-500"
-  }
-
-  const getSentimentIntensity = (sentiment: number) => {
-    return Math.floor(sentiment * 100)
-  }
-
-  const getTrendIcon = (trend: string) => {
-    switch (trend) {
-      case "up":
-        return "↗"
-      case "down":
-        return "↘"
-      default:
-        return "→"
+    let cancelled = false
+    const fetchHeatmap = async () => {
+      try {
+        const response = await apiService.getHeatmap({ keyword: keyword || undefined, days: 7 })
+        if (!cancelled && response.success) setHeatmap(response.data)
+      } catch (error) {
+        console.error("Failed to fetch activity heatmap:", error)
+      }
     }
-  }
 
-  const getTrendColor = (trend: string) => {
-    switch (trend) {
-      case "up":
-        return "text-green-400"
-      case "down":
-        return "text-red-400"
-      default:
-        return "text-gray-400"
+    fetchHeatmap()
+    // Buckets are maintained at ingest; refreshing every few minutes is plenty
+    const interval = setInterval(fetchHeatmap, 5 * 60 * 1000)
+    return () => {
+      cancelled = true
+      clearInterval(interval)
     }
+  }, [keyword])
+
+  const valueOf = (cell: HeatmapCell) => (metric === "avg_score" ? cell.avg_score ?? 0 : cell[metric])
+
+  const cells = heatmap ? heatmap.week.flatMap((row) => row.hours) : []
+  const maxValue = Math.max(0, ...cells.map(valueOf))
+  const totalTweets = cells.reduce((sum, cell) => sum + cell.tweets, 0)
+  const scored = cells.filter((cell) => cell.avg_score !== null)
+  const busiest = heatmap
+    ? heatmap.week
+        .flatMap((row) => row.hours.map((cell, hour) => ({ day: row.day, hour, tweets: cell.tweets })))
+        .reduce((best, cell) => (cell.tweets > best.tweets ? cell : best), { day: "-", hour: 0, tweets: 0 })
+    : null
+
+  const formatValue = (cell: HeatmapCell) => {
+    if (metric === "avg_score") return cell.avg_score === null ? "no scored tweets" : cell.avg_score.toFixed(3)
+    return cell[metric].toLocaleString()
   }
 
   return (
     <div className="nation-card p-6">
       <div className="flex items-center justify-between mb-6">
-        <h3 className="text-xl font-bold text-nation-green">Global Sentiment Analysis</h3>
+        <h3 className="text-xl font-bold text-nation-green">Activity Heatmap</h3>
         <div className="flex items-center gap-2">
-          <span className="text-sm text-gray-400">Global Score:</span>
-          <span className="text-2xl font-bold text-nation-green">{Math.floor(globalSentiment * 100)}%</span>
+          <span className="text-sm text-gray-400">Tweets:</span>
+          <span className="text-2xl font-bold text-nation-green">{totalTweets.toLocaleString()}</span>
         </div>
       </div>
 
-      <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4 mb-6">
-        {regions.map((region) => (
-          <div
-            key={region.name}
-            className="bg-gray-800/50 rounded-lg p-4 border border-gray-700 hover:border-nation-green/30 transition-all"
+      <div className="flex flex-wrap items-center gap-2 mb-4">
+        {METRICS.map(({ key, label }) => (
+          <button
+            key={key}
+            onClick={() => setMetric(key)}
+            className={`px-3 py-1 rounded text-sm border transition-all ${
+              metric === key
+                ? "border-nation-green text-nation-green bg-nation-green/10"
+                : "border-gray-700 text-gray-400 hover:border-nation-green/30"
+            }`}
           >
-            <div className="flex items-center justify-between mb-3">
-              <h4 className="font-semibold text-white">{region.name}</h4>
-              <span className={`text-lg ${getTrendColor(region.trend)}`}>{getTrendIcon(region.trend)}</span>
-            </div>
+            {label}
+          </button>
+        ))}
+        {heatmap && heatmap.keywords.length > 0 && (
+          <select
+            value={keyword}
+            onChange={(event) => setKeyword(event.target.value)}
+            className="ml-auto bg-gray-800 border border-gray-700 rounded px-2 py-1 text-sm text-gray-300"
+          >
+            <option value="">All keywords</option>
+            {heatmap.keywords.map((k) => (
+              <option key={k} value={k}>
+                {k}
+              </option>
+            ))}
+          </select>
+        )}
+      </div>
 
-            <div className="flex items-center gap-3 mb-2">
-              <div className="flex-1 bg-gray-700 rounded-full h-2">
-                <div
-                  className={`h-2 rounded-full transition-all duration-1000 ${getSentimentColor(region.sentiment)}`}
-                  style={{ width: `${getSentimentIntensity(region.sentiment)}%` }}
-                ></div>
+      <div className="overflow-x-auto mb-6">
+        <div className="min-w-[640px]">
+          <div className="grid gap-[2px]" style={{ gridTemplateColumns: "3rem repeat(24, minmax(0, 1fr))" }}>
+            <div></div>
+            {Array.from({ length: 24 }, (_, hour) => (
+              <div key={hour} className="text-[10px] text-gray-500 text-center">
+                {hour % 3 === 0 ? hour : ""}
               </div>
-              <span className="text-sm font-bold text-white">{getSentimentIntensity(region.sentiment)}%</span>
-            </div>
-
-            <div className="flex justify-between text-sm text-gray-400">
-              <span>Volume: {region.volume.toLocaleString()}</span>
-              <span className={getSentimentColor(region.sentiment).replace("bg-", "text-")}>
-                {region.sentiment >= 0.7 ? "Positive" : region.sentiment >= 0.5 ? "Neutral" : "Negative"}
-              </span>
-            </div>
+            ))}
+            {(heatmap?.week ?? []).map((row) => (
+              <div key={row.day} className="contents">
+                <div className="text-xs text-gray-400 pr-2 flex items-center">{row.day}</div>
+                {row.hours.map((cell, hour) => {
+                  const intensity = maxValue > 0 ? valueOf(cell) / maxValue : 0
+                  return (
+                    <div
+                      key={hour}
+                      title={`${row.day} ${hour}:00 UTC: ${formatValue(cell)}`}
+                      className="h-5 rounded-sm bg-nation-green transition-all duration-1000"
+                      style={{ opacity: cell.tweets > 0 ? 0.15 + intensity * 0.85 : 0.05 }}
+                    ></div>
+                  )
+                })}
+              </div>
+            ))}
           </div>
-        ))}
+        </div>
       </div>
 
       <div className="bg-gray-800/30 rounded-lg p-4 border border-gray-700">
-        <h4 className="font-semibold text-nation-green mb-3">Sentiment Distribution</h4>
-        <div className="flex gap-4">
-          <div className="flex items-center gap-2">
-            <div className="w-3 h-3 bg-green-500 rounded"></div>
-            <span className="text-sm text-gray-300">Positive (70%)</span>
-          </div>
-          <div className="flex items-center gap-2">
-            <div className="w-3 h-3 bg-yellow-500 rounded"></div>
-            <span className="text-sm text-gray-300">Neutral (20%)</span>
-          </div>
-          <div className="flex items-center gap-2">
-            <div className="w-3 h-3 bg-red-500 rounded"></div>
-            <span className="text-sm text-gray-300">Negative (10%)</span>
-          </div>
+        <h4 className="font-semibold text-nation-green mb-3">Summary (UTC)</h4>
+        <div className="flex flex-wrap gap-4 text-sm text-gray-300">
+          <span>
+            Busiest hour: {busiest && busiest.tweets > 0 ? `${busiest.day} ${busiest.hour}:00 (${busiest.tweets})` : "-"}
+          </span>
+          <span>Active hours: {cells.filter((cell) => cell.tweets > 0).length}/168</span>
+          <span>Scored hours: {scored.length}</span>
         </div>
       </div>
     </div>
@@ -33,6 +33,70 @@ export interface SystemStats {
   last_updated: string;
 }
 
+export interface ChangedTweet extends Omit<Tweet, 'score'> {
+  score: number | null;  // null until the Nation Agent has scored it
+  project: string;
+  score_status: 'scored' | 'unscored' | 'prescored' | 'stale';
+  change_seq: number;
+}
+
+export interface Aggregates {
+  total_tweets: number;
+  avg_score: number;
+  top_score: number;
+  high_quality: number;
+  low_quality: number;
+  unique_users: number;
+  unscored_tweets: number;
+}
+
+export interface ChangesResponse {
+  success: boolean;
+  data: ChangedTweet[];
+  count: number;
+  cursor: string;
+  has_more: boolean;
+  reset: boolean;
+  aggregates: Aggregates | null;
+}
+
+export interface HeatmapCell {
+  tweets: number;
+  avg_score: number | null;
+  engagement: number;
+}
+
+export interface Heatmap {
+  // week: Sun..Sat, 24 hourly cells each (UTC); days: recent days oldest first
+  week: Array<{ day: string; hours: HeatmapCell[] }>;
+  days: Array<{ day: string; hours: HeatmapCell[] }>;
+  keywords: string[];
+}
+
+export interface GraphNode {
+  id: string;
+  in_weight: number;
+  out_weight: number;
+  degree: number;
+  cluster: number;
+}
+
+export interface GraphEdge {
+  source: string;
+  target: string;
+  weight: number;
+  interactions: number;
+  kinds: Partial<Record<'reply' | 'quote' | 'mention', number>>;
+  last_ts: number;
+}
+
+export interface InteractionGraph {
+  center: string | null;
+  nodes: GraphNode[];
+  edges: GraphEdge[];
+  clusters: number;
+}
+
 export interface ApiResponse<T> {
   success: boolean;
   data: T;
@@ -40,13 +104,60 @@ export interface ApiResponse<T> {
   timestamp: string;
 }
 
+// Backend tweet row -> Tweet, filling in missing fields
+export function toTweet(item: any): Tweet {
+  return {
+    id: item.id || 'unknown',
+    text: item.text || '',
+    username: item.username || 'unknown',
+    score: typeof item.score === 'number' ? item.score : 0,
+    created_at: item.created_at || new Date().toISOString(),
+    engagement: {
+      likes: item.engagement?.likes || 0,
+      retweets: item.engagement?.retweets || 0,
+      replies: item.engagement?.replies || 0,
+      views: item.engagement?.views || 0,
+      bookmarks: item.engagement?.bookmarks || 0,
+      quote_tweets: item.engagement?.quote_tweets || 0
+    }
+  };
+}
+
+// /api/leaderboard rows -> Tweet cards for the leaderboard
+export function leaderboardToTweets(rows: any[]): Tweet[] {
+  return rows.map((user: any, index: number) => ({
+    id: `leaderboard_${user.username}_${index}`,
+    text: `🏆 Rank #${user.rank || index + 1}: ${user.tweet_count} high-quality tweets with avg score ${user.avg_score.toFixed(2)}`,
+    username: user.username,
+    score: user.avg_score || user.best_score || 0,
+    created_at: new Date().toISOString(),
+    engagement: {
+      likes: user.total_engagement || 0, // Use real engagement data
+      retweets: Math.round((user.total_engagement || 0) * 0.1), // Estimate from total
+      replies: Math.round((user.total_engagement || 0) * 0.05), // Estimate from total
+      views: Math.round((user.total_engagement || 0) * 2), // Estimate from total
+      bookmarks: Math.round((user.total_engagement || 0) * 0.02), // Estimate from total
+      quote_tweets: Math.round((user.total_engagement || 0) * 0.01) // Estimate from total
+    }
+  }));
+}
+
+export type DashboardSection = 'stats' | 'engagement' | 'quality' | 'leaderboard' | 'tweets';
+
+export interface DashboardBundle {
+  success: boolean;
+  sections: DashboardSection[];
+  cursor: string;  // getChanges() cursor the sections are current to
+  data: Partial<Record<DashboardSection, any>>;
+}
+
 class ApiService {
-  private async fetchApi<T>(endpoint: string): Promise<T> {
+  private async fetchApi<T>(endpoint: string, init?: RequestInit): Promise<T> {
     try {
       const url = `${API_BASE}${endpoint}`;
       console.log('🌐 Fetching from:', url);
       
-      const response = await fetch(url);
+      const response = await fetch(url, init);
       
       if (!response.ok) {
         throw new Error(`API Error: ${response.status}`);
@@ -67,21 +178,7 @@ class ApiService {
       
       // Transform backend response to match frontend expectations
       if (response.success && response.data) {
-        const transformedData: Tweet[] = response.data.map((item: any) => ({
-          id: item.id || 'unknown',
-          text: item.text || '',
-          username: item.username || 'unknown',
-          score: typeof item.score === 'number' ? item.score : 0,
-          created_at: item.created_at || new Date().toISOString(),
-          engagement: {
-            likes: item.engagement?.likes || 0,
-            retweets: item.engagement?.retweets || 0,
-            replies: item.engagement?.replies || 0,
-            views: item.engagement?.views || 0,
-            bookmarks: item.engagement?.bookmarks || 0,
-            quote_tweets: item.engagement?.quote_tweets || 0
-          }
-        }));
+        const transformedData: Tweet[] = response.data.map(toTweet);
 
         return {
           success: true,
@@ -124,9 +221,9 @@ class ApiService {
     };
   }
 
-  async getLeaderboard(limit: number = 20): Promise<ApiResponse<Tweet[]>> {
+  async getLeaderboard(limit: number = 20, init?: RequestInit): Promise<ApiResponse<Tweet[]>> {
     try {
-      const response = await this.fetchApi<any>(`/api/leaderboard?limit=${limit}`);
+      const response = await this.fetchApi<any>(`/api/leaderboard?limit=${limit}`, init);
       
       console.log('🔍 Leaderboard API Response:', response);
       
@@ -135,21 +232,7 @@ class ApiService {
         const leaderboardData = response.data || response.leaderboard || [];
         console.log('📊 Leaderboard Data:', leaderboardData);
         
-        const transformedData: Tweet[] = leaderboardData.map((user: any, index: number) => ({
-          id: `leaderboard_${user.username}_${index}`,
-          text: `🏆 Rank #${user.rank || index + 1}: ${user.tweet_count} high-quality tweets with avg score ${user.avg_score.toFixed(2)}`,
-          username: user.username,
-          score: user.avg_score || user.best_score || 0,
-          created_at: new Date().toISOString(),
-                           engagement: {
-                   likes: user.total_engagement || 0, // Use real engagement data
-                   retweets: Math.round((user.total_engagement || 0) * 0.1), // Estimate from total
-                   replies: Math.round((user.total_engagement || 0) * 0.05), // Estimate from total
-                   views: Math.round((user.total_engagement || 0) * 2), // Estimate from total
-                   bookmarks: Math.round((user.total_engagement || 0) * 0.02), // Estimate from total
-                   quote_tweets: Math.round((user.total_engagement || 0) * 0.01) // Estimate from total
-                 }
-        }));
+        const transformedData: Tweet[] = leaderboardToTweets(leaderboardData);
 
         return {
           success: true,
@@ -220,6 +303,61 @@ class ApiService {
     };
   }
 
+  // One round-trip for several dashboard payloads; each section matches its standalone endpoint's data.
+  // Pass { cache: 'no-cache' } to revalidate instead of taking a browser-cached copy (e.g. when resyncing).
+  async getDashboardBundle(
+    sections: DashboardSection[] = ['stats', 'engagement', 'quality', 'leaderboard', 'tweets'],
+    limit: number = 100,
+    leaderboardLimit: number = 20,
+    init?: RequestInit
+  ): Promise<DashboardBundle> {
+    return this.fetchApi(`/api/dashboard/bundle?sections=${sections.join(',')}&limit=${limit}&leaderboard_limit=${leaderboardLimit}`, init);
+  }
+
+  // Delta sync: pass the cursor from the previous response ('0' for a full sync).
+  // Keep calling while has_more; aggregates is null when nothing changed.
+  async getChanges(since: string = '0', limit: number = 500): Promise<ChangesResponse> {
+    return this.fetchApi<ChangesResponse>(`/api/changes?since=${encodeURIComponent(since)}&limit=${limit}`);
+  }
+
+  // Live feed over Server-Sent Events. EventSource reconnects by itself and resumes
+  // from Last-Event-ID; on 'reset' the client should resync via getChanges().
+  subscribeToStream(handlers: {
+    onTweet?: (tweet: ChangedTweet) => void;
+    onAggregates?: (update: { aggregates: Aggregates; delta: Partial<Aggregates>; cursor: string }) => void;
+    onReset?: (cursor: string) => void;
+  }): () => void {
+    const source = new EventSource(`${API_BASE}/api/stream`);
+    source.addEventListener('tweet', (event) => {
+      handlers.onTweet?.(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('aggregates', (event) => {
+      handlers.onAggregates?.(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('reset', (event) => {
+      handlers.onReset?.(JSON.parse((event as MessageEvent).data).cursor);
+    });
+    return () => source.close();
+  }
+
+  // Activity by hour-of-day x day-of-week, optionally sliced by project and search keyword
+  async getHeatmap(options: { project?: string; keyword?: string; days?: number } = {}): Promise<{ success: boolean; data: Heatmap }> {
+    const params = new URLSearchParams();
+    if (options.project) params.set('project', options.project);
+    if (options.keyword) params.set('keyword', options.keyword);
+    params.set('days', String(options.days ?? 14));
+    return this.fetchApi(`/api/metrics/heatmap?${params.toString()}`);
+  }
+
+  // Reply/quote/mention graph with recency-weighted edges; omit username for the whole community
+  async getGraph(options: { username?: string; project?: string; k?: number } = {}): Promise<{ success: boolean; data: InteractionGraph }> {
+    const params = new URLSearchParams();
+    if (options.username) params.set('username', options.username);
+    if (options.project) params.set('project', options.project);
+    params.set('k', String(options.k ?? 25));
+    return this.fetchApi(`/api/graph?${params.toString()}`);
+  }
+
   async searchTweets(query: string, limit: number = 50): Promise<ApiResponse<Tweet[]>> {
     return this.fetchApi<ApiResponse<Tweet[]>>(`/api/search?q=${encodeURIComponent(query)}&limit=${limit}`);
   }